@@ -4,6 +4,43 @@ import About from './About';
 import { EmploymentChart, ExpenditureChart } from './Charts';
 import './App.css';
 
+const API_BASE = 'http://localhost:8000/api';
+
+// The backend can publish static, cacheable copies of the read API (see
+// mgnrega/static_api.py). Builds made with REACT_APP_STATIC_API=true read
+// its manifest, which maps the district list and each lowercased district
+// name to a file; anything not listed, or any failure, falls back to the
+// live API. The manifest is read once per page load. Other builds only use
+// the live API, so servers that do not publish are not asked for it.
+const STATIC_API_ENABLED = process.env.REACT_APP_STATIC_API === 'true';
+
+let staticManifest;
+
+const getStaticManifest = () => {
+  if (!STATIC_API_ENABLED) {
+    return Promise.resolve(null);
+  }
+  if (!staticManifest) {
+    staticManifest = axios.get(`${API_BASE}/static/manifest.json`)
+      .then((response) => response.data)
+      .catch(() => null);
+  }
+  return staticManifest;
+};
+
+const getFromStaticApi = async (pickFile, liveUrl) => {
+  const manifest = await getStaticManifest();
+  const file = manifest && pickFile(manifest);
+  if (file) {
+    try {
+      return await axios.get(`${API_BASE}/static/${file}`);
+    } catch (error) {
+      // Pruned by a newer publish; the live API has the data
+    }
+  }
+  return axios.get(liveUrl);
+};
+
 function App() {
   const [districts, setDistricts] = useState([]);
   const [selectedDistrict, setSelectedDistrict] = useState('');
@@ -23,7 +60,10 @@ function App() {
 
   const fetchDistricts = async () => {
     try {
-      const response = await axios.get('http://localhost:8000/api/districts/');
+      const response = await getFromStaticApi(
+        (manifest) => manifest.districts,
+        `${API_BASE}/districts/`
+      );
       setDistricts(response.data);
     } catch (error) {
       console.error('Error fetching districts:', error);
@@ -35,7 +75,10 @@ function App() {
     
     setLoading(true);
     try {
-      const response = await axios.get(`http://localhost:8000/api/performance/${selectedDistrict}/`);
+      const response = await getFromStaticApi(
+        (manifest) => manifest.performance && manifest.performance[selectedDistrict.toLowerCase()],
+        `${API_BASE}/performance/${selectedDistrict}/`
+      );
       setMgnregaData(response.data);
     } catch (error) {
       console.error('Error fetching MGNREGA data:', error);
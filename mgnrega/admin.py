@@ -1,3 +1,33 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import IngestRun
+
+@admin.register(IngestRun)
+class IngestRunAdmin(admin.ModelAdmin):
+    """
+    Read-only history of syncs and file loads, for spotting slow or failing runs
+    """
+    list_display = (
+        'id', 'started_at', 'source', 'status', 'seconds', 'http_seconds', 'parse_seconds', 'db_seconds',
+        'pages', 'rows_inserted', 'rows_updated', 'rows_skipped', 'throughput', 'error_count',
+    )
+    list_filter = ('status', 'source')
+    date_hierarchy = 'started_at'
+    ordering = ('-started_at',)
+
+    @admin.display(description='Seconds')
+    def seconds(self, run):
+        duration = run.duration
+        return None if duration is None else round(duration, 1)
+
+    @admin.display(description='Rows/sec')
+    def throughput(self, run):
+        rate = run.rows_per_second
+        return None if rate is None else f"{rate:,.0f}"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        # Viewable, not editable; the recorder owns these rows
+        return False
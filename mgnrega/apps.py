@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class MgnregaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mgnrega'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .metrics import install_query_wrapper
+
+        connection_created.connect(install_query_wrapper, dispatch_uid='mgnrega-query-metrics')
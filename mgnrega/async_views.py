@@ -0,0 +1,114 @@
+"""
+Async versions of the read endpoints for ASGI deployments.
+
+They return the same bodies and headers as their counterparts in
+mgnrega.views, but read the database with the async ORM, so one ASGI worker
+can serve many concurrent requests instead of holding a thread for each.
+"""
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_GET
+from django.views.decorators.vary import vary_on_headers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import replace_query_param
+
+from .cache import MISSING, read_cache
+from .models import District
+from .payloads import get_payload
+from .queries import QueryError, performance_rows
+from .serializers import district_values
+from .views import (
+    QUERY_PARAMS, DistrictVersion, add_freshness_headers, cache_successes, catalog_etag, district_cache_key,
+    payload_etag, payload_response, refresh_if_stale,
+)
+
+def json_response(data, status=200) -> HttpResponse:
+    # Rendered like DRF's Response so both variants return the same bytes
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+
+def conditional_response(request, etag, last_modified=None):
+    """
+    A 304 response if the request's validators still match, otherwise None
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=quote_etag(etag), last_modified=timestamp)
+
+def set_validators(response, etag, last_modified=None):
+    response.headers.setdefault('ETag', quote_etag(etag))
+    if last_modified and not response.has_header('Last-Modified'):
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+async def aget_district_version(district_name) -> DistrictVersion:
+    key = district_cache_key(district_name)
+    version = await read_cache.aget(key)
+    if version is MISSING:
+        district = await District.objects.filter(
+            district_name_normalized=district_name.lower()
+        ).select_related('payload').afirst()
+        payload = None
+        if district is not None:
+            # Rendering a missing payload is CPU work done off the event loop
+            payload = await sync_to_async(get_payload)(district)
+        version = DistrictVersion(district, payload)
+        await read_cache.aset(key, version)
+    if version.district is not None:
+        refresh_if_stale(version.district, version.payload)
+    return version
+
+async def aget_district_catalog():
+    catalog = await read_cache.aget('districts')
+    if catalog is MISSING:
+        counts = await District.objects.aaggregate(count=Count('id'), last_id=Max('id'))
+        catalog = {'etag': catalog_etag(counts), 'data': await district_values.adata(District.objects.all())}
+        await read_cache.aset('districts', catalog)
+    return catalog
+
+@cache_successes
+@require_GET
+async def district_list(request):
+    """
+    List all districts
+    """
+    catalog = await aget_district_catalog()
+    response = conditional_response(request, catalog['etag'])
+    if response is None:
+        response = json_response(catalog['data'])
+    return set_validators(response, catalog['etag'])
+
+async def district_performance_query(request, district):
+    try:
+        rows, next_cursor, paginated = await sync_to_async(performance_rows)(district, request.GET)
+    except QueryError as e:
+        return json_response({"error": str(e)}, status=400)
+    if not paginated:
+        return json_response(rows)
+    next_url = None
+    if next_cursor:
+        next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+    return json_response({"next": next_url, "results": rows})
+
+@cache_successes
+@vary_on_headers('Accept-Encoding')
+@require_GET
+async def district_performance(request, district_name):
+    """
+    Retrieve performance data for a specific district (see
+    mgnrega.views.district_performance)
+    """
+    district, payload = await aget_district_version(district_name)
+    if district is None:
+        return json_response({"error": "District not found"}, status=404)
+
+    etag = payload_etag(request, payload)
+    response = conditional_response(request, etag, payload.latest_update)
+    if response is None:
+        if QUERY_PARAMS.intersection(request.GET):
+            response = await district_performance_query(request, district)
+        else:
+            response = payload_response(request, payload)
+        add_freshness_headers(response, district, payload)
+    return set_validators(response, etag, payload.latest_update)
@@ -0,0 +1,209 @@
+"""
+Micro-benchmarks for the hot paths of the app, run with
+``python manage.py benchmark <suite>``.
+"""
+import io
+import random
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import requests
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from .geo import DistrictLocator, build_shape
+from .ingest import DATA_FIELDS, DISTRICT_KEYS
+from .models import District, MGNREGAData
+from .parsing import ResponseReader, parse_float, parse_int
+from .serializers import MGNREGADataSerializer, mgnrega_data_values
+
+SERVER_RESPONSE = Path(__file__).resolve().parent.parent / 'Server response.txt'
+
+def timed(func: Callable, repeat: int = 3) -> float:
+    """
+    Best wall-clock time of several runs, in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def sample_document(copies: int) -> bytes:
+    """
+    Server response.txt with its records repeated to build a larger response
+    """
+    raw = SERVER_RESPONSE.read_bytes()
+    match = re.search(rb'<records>(.*)</records>', raw, re.S)
+    return raw[:match.start(1)] + match.group(1) * copies + raw[match.end(1):]
+
+def legacy_convert(content: bytes) -> List[dict]:
+    """
+    The pre-schema conversion: parse the whole tree, then find() and coerce
+    every field of every item separately
+    """
+    def text_of(element):
+        return element.text or '' if element is not None else ''
+
+    def int_of(element):
+        return parse_int(element.text) if element is not None else None
+
+    def float_of(element):
+        return parse_float(element.text) if element is not None else None
+
+    by_type = {'IntegerField': int_of, 'BigIntegerField': int_of, 'FloatField': float_of}
+    fields = [
+        (tag, name, by_type.get(model._meta.get_field(name).get_internal_type(), text_of))
+        for model in (District, MGNREGAData)
+        for tag, name in model.UPSTREAM_FIELDS
+    ]
+    rows = []
+    for item in ET.fromstring(content).find('records').findall('item'):
+        rows.append({name: convert(item.find(tag)) for tag, name, convert in fields})
+    return rows
+
+def bench_parse(rows: int = 20000) -> Dict[str, float]:
+    """
+    Rows/sec converting an XML response into ingest records, legacy vs schema
+    """
+    content = sample_document(max(1, rows // 10))
+    count = len(legacy_convert(content))
+    before = timed(lambda: legacy_convert(content))
+    after = timed(lambda: list(ResponseReader(io.BytesIO(content))))
+    return {
+        'rows': count,
+        'legacy rows/sec': count / before,
+        'schema rows/sec': count / after,
+    }
+
+def square_ring(x, y, size, vertices_per_side):
+    """
+    Closed square ring with each side split into many vertices, so the
+    point-in-polygon cost is close to that of a real district boundary
+    """
+    ring = []
+    for side in range(4):
+        for step in range(vertices_per_side):
+            t = step / vertices_per_side
+            ring.append([
+                (x + size * t, y),
+                (x + size, y + size * t),
+                (x + size * (1 - t), y + size),
+                (x, y + size * (1 - t)),
+            ][side])
+    ring.append(ring[0])
+    return ring
+
+def bench_geocode(lookups: int = 50000) -> Dict[str, float]:
+    """
+    Lookups/sec against ~700 synthetic districts tiling India's bounding box
+    """
+    columns, rows, vertices = 28, 25, 100
+    width, height = (97.5 - 68.0) / columns, (37.5 - 8.0) / rows
+    shapes = [
+        build_shape(str(n), f"D{n}", [[square_ring(68.0 + c * width, 8.0 + r * height, min(width, height), vertices)]])
+        for n, (c, r) in enumerate((c, r) for c in range(columns) for r in range(rows))
+    ]
+    start = time.perf_counter()
+    locator = DistrictLocator(shapes)
+    build = time.perf_counter() - start
+
+    rng = random.Random(0)
+    points = [(rng.uniform(8.0, 37.5), rng.uniform(68.0, 97.5)) for _ in range(lookups)]
+    elapsed = timed(lambda: [locator.locate(lat, lon) for lat, lon in points])
+    return {
+        'districts': len(shapes),
+        'index build ms': build * 1000,
+        'lookups/sec': lookups / elapsed,
+        'microseconds/lookup': elapsed / lookups * 1e6,
+    }
+
+def bench_serialize(rows: int = 5000) -> Dict[str, float]:
+    """
+    Rows/sec rendering performance JSON, ModelSerializer vs values() path.
+    Sample rows are written inside a transaction that is rolled back, with
+    bulk_create rather than ingest_records: ingest invalidates the shared
+    read cache, which the rollback would not undo.
+    """
+    record = next(iter(ResponseReader(io.BytesIO(sample_document(1)))))
+    months = ('Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec', 'Jan', 'Feb', 'Mar')
+    renderer = JSONRenderer()
+    with transaction.atomic():
+        # 120 months per district
+        District.objects.bulk_create([
+            District(district_code=f"bench-{n}", **{key: record[key] for key in DISTRICT_KEYS})
+            for n in range(-(-rows // 120))
+        ])
+        district_ids = dict(
+            District.objects.filter(district_code__startswith='bench-').values_list('district_code', 'id')
+        )
+        data = {name: record[name] for name in DATA_FIELDS if name in record}
+        MGNREGAData.objects.bulk_create([
+            MGNREGAData(
+                district_id=district_ids[f"bench-{n // 120}"], fin_year=str(1900 + n // 12 % 10), month=months[n % 12],
+                **data,
+            )
+            for n in range(rows)
+        ], batch_size=500)
+        queryset = MGNREGAData.objects.filter(district__district_code__startswith='bench-').order_by('-last_updated')
+        count = queryset.count()
+        serializer = timed(lambda: renderer.render(MGNREGADataSerializer(queryset.all(), many=True).data))
+        joined = timed(lambda: renderer.render(
+            MGNREGADataSerializer(queryset.select_related('district'), many=True).data
+        ))
+        values = timed(lambda: renderer.render(mgnrega_data_values.data(queryset.all())))
+        transaction.set_rollback(True)
+    return {
+        'rows': count,
+        'serializer rows/sec': count / serializer,
+        'serializer + select_related rows/sec': count / joined,
+        'values rows/sec': count / values,
+    }
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run_load(url: str, concurrency: int = 50, total: int = 1000, timeout: float = 30) -> Dict[str, float]:
+    """
+    Throughput and latency of a running server: `total` GETs of url issued
+    by `concurrency` client threads, each with its own keep-alive session
+    """
+    local = threading.local()
+
+    def request(_):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            ok = local.session.get(url, timeout=timeout).status_code < 400
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(request, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        'requests': total,
+        'errors': sum(1 for _, ok in results if not ok),
+        'requests/sec': total / elapsed,
+        'p50 ms': percentile(latencies, 0.50) * 1000,
+        'p95 ms': percentile(latencies, 0.95) * 1000,
+        'p99 ms': percentile(latencies, 0.99) * 1000,
+    }
+
+SUITES = {
+    'geocode': bench_geocode,
+    'parse': bench_parse,
+    'serialize': bench_serialize,
+}
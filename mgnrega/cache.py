@@ -0,0 +1,191 @@
+"""
+Two-tier cache for the read endpoints.
+
+The first tier is a small LRU in each process with a short TTL; the second
+is Django's cache (MGNREGA_CACHE_ALIAS), shared by every worker. Lookups try
+the local tier, then the shared one, then build the value and store it in
+both. invalidate() clears this process's LRU and bumps a generation number
+that is part of every shared key, so other workers stop seeing shared
+entries at once and their local copies expire within MGNREGA_LOCAL_CACHE_TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULT_LOCAL_SIZE = 256
+DEFAULT_LOCAL_TTL = 10
+DEFAULT_SHARED_TTL = 5 * 60
+
+# Returned by get() on a miss, since None is a cacheable value
+MISSING = object()
+
+class LRUCache:
+    """
+    Thread-safe LRU cache holding at most `maxsize` entries for `ttl` seconds
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return MISSING
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+class TieredCache:
+    """
+    An LRUCache in front of a shared Django cache
+    """
+
+    def __init__(self, prefix: str, local: LRUCache, alias: str = 'default', shared_ttl: float = DEFAULT_SHARED_TTL):
+        self.prefix = prefix
+        self.local = local
+        self.alias = alias
+        self.shared_ttl = shared_ttl
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+        # Shared keys this process stored in the current generation; missing
+        # ones were evicted (or expired) by the backend
+        self._stored = set()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    @property
+    def generation_key(self) -> str:
+        return f"{self.prefix}:generation"
+
+    def shared_key(self, key: str, generation: int) -> str:
+        return f"{self.prefix}:{generation}:{key}"
+
+    def count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def record_shared(self, key: str, value: Any) -> Any:
+        if value is not MISSING:
+            self.count('hits')
+            return value
+        with self._lock:
+            self.counters['misses'] += 1
+            if key in self._stored:
+                self._stored.discard(key)
+                self.counters['evictions'] += 1
+        return MISSING
+
+    def get(self, key: str) -> Any:
+        value = self.local.get(key)
+        if value is not MISSING:
+            return value
+        generation = self.shared.get_or_set(self.generation_key, time.time_ns, timeout=None)
+        value = self.record_shared(key, self.shared.get(self.shared_key(key, generation), MISSING))
+        if value is not MISSING:
+            self.local.set(key, value)
+        return value
+
+    async def aget(self, key: str) -> Any:
+        value = self.local.get(key)
+        if value is not MISSING:
+            return value
+        generation = await self.shared.aget_or_set(self.generation_key, time.time_ns, timeout=None)
+        value = self.record_shared(key, await self.shared.aget(self.shared_key(key, generation), MISSING))
+        if value is not MISSING:
+            self.local.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        self.local.set(key, value)
+        generation = self.shared.get_or_set(self.generation_key, time.time_ns, timeout=None)
+        self.shared.set(self.shared_key(key, generation), value, timeout=self.shared_ttl)
+        with self._lock:
+            self.counters['sets'] += 1
+            self._stored.add(key)
+
+    async def aset(self, key: str, value: Any):
+        self.local.set(key, value)
+        generation = await self.shared.aget_or_set(self.generation_key, time.time_ns, timeout=None)
+        await self.shared.aset(self.shared_key(key, generation), value, timeout=self.shared_ttl)
+        with self._lock:
+            self.counters['sets'] += 1
+            self._stored.add(key)
+
+    def get_or_set(self, key: str, build: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is MISSING:
+            value = build()
+            self.set(key, value)
+        return value
+
+    def invalidate(self):
+        """
+        Drop every entry in both tiers
+        """
+        self.local.clear()
+        try:
+            self.shared.incr(self.generation_key)
+        except ValueError:
+            # The generation was never set or has been evicted; a fresh one
+            # cannot collide with any generation used before
+            self.shared.add(self.generation_key, time.time_ns(), timeout=None)
+        with self._lock:
+            self._stored.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            shared = dict(self.counters)
+        return {'local': self.local.stats(), 'shared': shared}
+
+read_cache = TieredCache(
+    'mgnrega-read',
+    LRUCache(
+        maxsize=getattr(settings, 'MGNREGA_LOCAL_CACHE_SIZE', DEFAULT_LOCAL_SIZE),
+        ttl=getattr(settings, 'MGNREGA_LOCAL_CACHE_TTL', DEFAULT_LOCAL_TTL),
+    ),
+    alias=getattr(settings, 'MGNREGA_CACHE_ALIAS', 'default'),
+    shared_ttl=getattr(settings, 'MGNREGA_SHARED_CACHE_TTL', DEFAULT_SHARED_TTL),
+)
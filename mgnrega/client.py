@@ -0,0 +1,270 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .metrics import upstream_duration, upstream_responses
+
+# API endpoint for MGNREGA data
+API_URL = "https://api.data.gov.in/resource/ee03643a-ee4c-48c2-ac30-9f2ff26ab722"
+
+REQUEST_TIMEOUT = 30
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 10
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 60.0
+DEFAULT_POOL_SIZE = 10
+
+# Statuses worth retrying: throttling and server-side failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Request failures worth retrying: the connection broke or the API was too slow
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+class FetchError(Exception):
+    """
+    Raised when an upstream page cannot be fetched
+    """
+
+class CircuitOpenError(FetchError):
+    """
+    Raised without calling the API while the circuit breaker is open
+    """
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: at most `rate` acquisitions per second on
+    average, with bursts of up to `capacity`
+    """
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> float:
+        """
+        Take a token, blocking until one is available; returns the time waited
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(self.clock())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            self.sleep(delay)
+            waited += delay
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing dependency for a cooldown period.
+
+    After `threshold` consecutive failures the circuit opens and calls are
+    rejected until `cooldown` seconds have passed. Then a single trial call is
+    let through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, threshold: int, cooldown: float, clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Raise CircuitOpenError unless a call may go ahead
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                return
+            raise CircuitOpenError(f"Upstream API circuit is {self.state.replace('_', '-')}; not calling it")
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+def retry_after(response: requests.Response) -> Optional[float]:
+    """
+    Seconds requested by a Retry-After header (delay or HTTP date), if any
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class UpstreamClient:
+    """
+    Shared client for the data.gov.in API.
+
+    Requests go through one pooled requests.Session and a token bucket shared
+    by every thread. Connection errors, timeouts, 429 and 5xx responses are
+    retried with jittered exponential backoff, honouring Retry-After. Server
+    errors and failed requests also feed a circuit breaker, so once the API
+    is down callers fail fast instead of waiting on it. Every failure is
+    raised as a FetchError.
+    """
+
+    def __init__(self, url: str = API_URL, timeout: float = REQUEST_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE, backoff_max: float = DEFAULT_BACKOFF_MAX,
+                 rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 breaker_threshold: int = DEFAULT_BREAKER_THRESHOLD, breaker_cooldown: float = DEFAULT_BREAKER_COOLDOWN,
+                 pool_size: int = DEFAULT_POOL_SIZE, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.url = url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+        self.bucket = TokenBucket(rate, burst, clock=clock, sleep=sleep)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown, clock=clock)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self.counters = {'requests': 0, 'retries': 0, 'throttled': 0, 'failures': 0, 'rejected': 0}
+
+    def count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Full-jitter exponential backoff delay for a retry attempt (0-based)
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get(self, params: Dict[str, object]) -> requests.Response:
+        """
+        GET the resource with params, retrying transient failures. Returns
+        the 200 response or raises FetchError.
+        """
+        attempt = 0
+        while True:
+            try:
+                self.breaker.allow()
+            except CircuitOpenError:
+                self.count('rejected')
+                raise
+            self.bucket.acquire()
+            self.count('requests')
+
+            delay = None
+            start = time.perf_counter()
+            try:
+                response = self.session.get(self.url, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                upstream_duration.observe(time.perf_counter() - start)
+                upstream_responses.inc(status='error')
+                self.breaker.record_failure()
+                self.count('failures')
+                error = FetchError(f"API request failed: {e}")
+                if not isinstance(e, RETRY_ERRORS):
+                    # Redirect loops, undecodable bodies and the like will not go away on retry
+                    raise error from e
+            except BaseException:
+                # Never leave a half-open circuit waiting for a trial that ended
+                self.breaker.record_failure()
+                raise
+            else:
+                upstream_duration.observe(time.perf_counter() - start)
+                upstream_responses.inc(status=response.status_code)
+                if response.status_code == 200:
+                    self.breaker.record_success()
+                    return response
+                error = FetchError(f"API request failed with status code: {response.status_code}")
+                if response.status_code not in RETRY_STATUSES:
+                    # The API answered; the request itself is wrong
+                    self.breaker.record_success()
+                    raise error
+                if response.status_code == 429:
+                    # Throttling means the API is up, so it does not count against the breaker
+                    self.breaker.record_success()
+                    self.count('throttled')
+                else:
+                    self.breaker.record_failure()
+                    self.count('failures')
+                delay = retry_after(response)
+
+            if attempt >= self.max_retries:
+                raise error
+            if delay is None:
+                delay = self.backoff(attempt)
+            elif delay > self.backoff_max:
+                raise FetchError(f"{error}; API asked to retry after {delay:.0f}s")
+            self.count('retries')
+            self.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            stats = dict(self.counters)
+        stats['circuit'] = self.breaker.state
+        return stats
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> UpstreamClient:
+    """
+    The process-wide upstream client, configured from MGNREGA_UPSTREAM_* settings
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = UpstreamClient(
+                    max_retries=getattr(settings, 'MGNREGA_UPSTREAM_MAX_RETRIES', DEFAULT_MAX_RETRIES),
+                    rate=getattr(settings, 'MGNREGA_UPSTREAM_RATE', DEFAULT_RATE),
+                    burst=getattr(settings, 'MGNREGA_UPSTREAM_BURST', DEFAULT_BURST),
+                    breaker_threshold=getattr(settings, 'MGNREGA_UPSTREAM_BREAKER_THRESHOLD', DEFAULT_BREAKER_THRESHOLD),
+                    breaker_cooldown=getattr(settings, 'MGNREGA_UPSTREAM_BREAKER_COOLDOWN', DEFAULT_BREAKER_COOLDOWN),
+                )
+    return _client
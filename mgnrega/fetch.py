@@ -0,0 +1,231 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from django.conf import settings
+
+from .client import FetchError, get_client
+from .ingest import IngestResult, ingest_records
+from .metrics import upstream_rows
+from .models import FetchCheckpoint
+from .parsing import parse_response
+from .recorder import IngestRecorder, record_phase
+
+API_KEY = "579b464db66ec23bdd000001cdd3946e44ce4aad7209ff7b23ac571b"
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_WORKERS = 4
+
+@dataclass
+class FetchResult:
+    total: Optional[int] = None
+    pages: int = 0
+    skipped_pages: int = 0
+    # Records parsed from the fetched pages
+    rows: int = 0
+    page_size: int = 0
+    ingest: IngestResult = field(default_factory=IngestResult)
+
+    @property
+    def total_pages(self) -> Optional[int]:
+        if self.total is None or not self.page_size:
+            return None
+        return max(1, -(-self.total // self.page_size))
+
+    def __str__(self):
+        return f"{self.pages} pages fetched ({self.skipped_pages} resumed), {self.ingest}"
+
+def build_params(filters: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Build the query parameters shared by every page request
+    """
+    params = {
+        "api-key": API_KEY,
+        "format": "xml",
+    }
+    for name, value in (filters or {}).items():
+        params[f"filters[{name}]"] = value
+    return params
+
+def fetch_page(params: Dict[str, str], offset: int, limit: int) -> bytes:
+    """
+    Fetch one page of the resource and return the raw response body
+    """
+    page_params = dict(params, offset=offset, limit=limit)
+    try:
+        return get_client().get(page_params).content
+    except FetchError as e:
+        raise FetchError(f"Page at offset {offset}: {e}") from e
+
+def checkpoint_scope(filters: Optional[Dict[str, str]], page_size: int) -> str:
+    """
+    Stable key identifying a paginated fetch so it can be resumed
+    """
+    parts = [f"{name}={value}" for name, value in sorted((filters or {}).items())]
+    return f"{'&'.join(parts) or 'all'}|limit={page_size}"
+
+class ScopeFetch:
+    """
+    One scope's paginated fetch within fetch_scopes: its filters, the result
+    so far, its resume checkpoint and the error that stopped it, if any
+    """
+
+    def __init__(self, index: int, filters: Optional[Dict[str, str]], page_size: int, resume: bool):
+        self.index = index
+        self.filters = filters
+        self.params = build_params(filters)
+        self.result = FetchResult(page_size=page_size)
+        self.error: Optional[FetchError] = None
+        # Pages queued or being downloaded
+        self.outstanding = 0
+        self.checkpoint = None
+        self.completed = set()
+        if resume:
+            self.checkpoint, _ = FetchCheckpoint.objects.get_or_create(
+                scope=checkpoint_scope(filters, page_size), defaults={'page_size': page_size}
+            )
+            self.completed = set(self.checkpoint.completed_offsets)
+            self.result.total = self.checkpoint.total
+            self.result.skipped_pages = len(self.completed)
+
+    def first_offsets(self) -> List[int]:
+        """
+        The first page, which tells the total record count, unless a
+        resumed checkpoint already knows it
+        """
+        if self.result.total is None or 0 not in self.completed:
+            return [0]
+        return self.pending_offsets()
+
+    def pending_offsets(self) -> List[int]:
+        page_size = self.result.page_size
+        return [offset for offset in range(page_size, self.result.total, page_size) if offset not in self.completed]
+
+def fetch_scopes(scopes: Sequence[Optional[Dict[str, str]]], page_size=None, workers=None, resume=False,
+                 batch_size=None, write=True, progress: Optional[Callable[[ScopeFetch], None]] = None,
+                 finished: Optional[Callable[[ScopeFetch], None]] = None,
+                 recorder: Optional[IngestRecorder] = None) -> List[ScopeFetch]:
+    """
+    Fetch every page of several scopes (filter sets) and ingest each page as
+    soon as it arrives.
+
+    All scopes share one bounded thread pool, so many single-page scopes
+    download side by side, while the calling thread parses and writes every
+    page: there is only ever one database writer. A scope's first page is
+    fetched before the rest to discover its total record count. With
+    resume=True, completed page offsets are checkpointed so a failed run
+    continues where it stopped. With write=False pages are fetched and
+    parsed but nothing is stored. progress, if given, is called after each
+    page and finished once a scope has every page. A scope whose fetch fails
+    gets the FetchError on its ScopeFetch and the others carry on. A
+    recorder, if given, gets the time spent fetching, parsing and writing
+    and the outcome of every page.
+    """
+    page_size = page_size or getattr(settings, 'MGNREGA_FETCH_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    workers = workers or getattr(settings, 'MGNREGA_FETCH_WORKERS', DEFAULT_WORKERS)
+    fetches = [ScopeFetch(index, filters, page_size, resume and write) for index, filters in enumerate(scopes)]
+    ready = deque()
+
+    def queue_pages(fetch, offsets):
+        fetch.outstanding += len(offsets)
+        ready.extend((fetch, offset) for offset in offsets)
+
+    def get_page(fetch, offset):
+        with record_phase(recorder, 'http'):
+            return fetch_page(fetch.params, offset, page_size)
+
+    def page_done(fetch, offset, content):
+        result = fetch.result
+        with record_phase(recorder, 'parse'):
+            total, records = parse_response(content)
+        if offset == 0:
+            result.total = total if total is not None else len(records)
+            queue_pages(fetch, fetch.pending_offsets())
+        if write:
+            with record_phase(recorder, 'db'):
+                ingest = ingest_records(records, batch_size=batch_size)
+            result.ingest += ingest
+            if recorder is not None:
+                recorder.add_page(ingest)
+        result.pages += 1
+        result.rows += len(records)
+        upstream_rows.inc(len(records))
+        if fetch.checkpoint is not None:
+            fetch.completed.add(offset)
+            fetch.checkpoint.total = result.total
+            fetch.checkpoint.completed_offsets = sorted(fetch.completed)
+            fetch.checkpoint.save(update_fields=['total', 'completed_offsets', 'updated_at'])
+        if progress is not None:
+            progress(fetch)
+
+    def scope_done(fetch):
+        if fetch.checkpoint is not None:
+            fetch.checkpoint.delete()
+        if finished is not None:
+            finished(fetch)
+
+    for fetch in fetches:
+        queue_pages(fetch, fetch.first_offsets())
+        if not fetch.outstanding:
+            scope_done(fetch)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = {}
+
+        def fill():
+            # Keep at most two pages per worker buffered so memory stays bounded
+            while ready and len(in_flight) < workers * 2:
+                fetch, offset = ready.popleft()
+                in_flight[executor.submit(get_page, fetch, offset)] = (fetch, offset)
+
+        def fail(fetch, error):
+            fetch.error = error
+            remaining = [(other, offset) for other, offset in ready if other is not fetch]
+            ready.clear()
+            ready.extend(remaining)
+            for future, (other, _) in list(in_flight.items()):
+                if other is fetch:
+                    future.cancel()
+                    del in_flight[future]
+
+        try:
+            fill()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                # In the order they were requested, so pages before a failed one are kept
+                for future in [future for future in in_flight if future in done]:
+                    if future not in in_flight:
+                        # Dropped when its scope failed
+                        continue
+                    fetch, offset = in_flight.pop(future)
+                    fetch.outstanding -= 1
+                    try:
+                        content = future.result()
+                    except FetchError as e:
+                        fail(fetch, e)
+                        continue
+                    page_done(fetch, offset, content)
+                    if not fetch.outstanding:
+                        scope_done(fetch)
+                fill()
+        except BaseException:
+            for future in in_flight:
+                future.cancel()
+            raise
+    return fetches
+
+def fetch_all_pages(filters=None, page_size=None, workers=None, resume=False, batch_size=None,
+                    write=True, progress: Optional[Callable[[FetchResult], None]] = None,
+                    recorder: Optional[IngestRecorder] = None) -> FetchResult:
+    """
+    Fetch every page of the resource matching the filters through
+    fetch_scopes, raising its FetchError if it fails
+    """
+    fetch = fetch_scopes(
+        [filters], page_size=page_size, workers=workers, resume=resume, batch_size=batch_size, write=write,
+        progress=(lambda fetch: progress(fetch.result)) if progress is not None else None, recorder=recorder,
+    )[0]
+    if fetch.error is not None:
+        raise fetch.error
+    return fetch.result
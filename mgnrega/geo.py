@@ -0,0 +1,177 @@
+import json
+import math
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+# Boundaries are GeoJSON Polygon/MultiPolygon features in lon/lat order with
+# the district code and name in their properties (LGD/Census exports use these keys)
+DEFAULT_BOUNDARIES_FILE = Path(__file__).resolve().parent / 'data' / 'district_boundaries.geojson'
+DEFAULT_CELL_SIZE = 0.25
+DEFAULT_BORDER_TOLERANCE = 0.05
+
+Ring = Sequence[Tuple[float, float]]
+
+class DistrictShape(NamedTuple):
+    district_code: str
+    district_name: str
+    # Each polygon is an outer ring followed by its holes
+    polygons: Tuple[Tuple[Ring, ...], ...]
+    bbox: Tuple[float, float, float, float]
+    centroid: Tuple[float, float]
+
+class DistrictMatch(NamedTuple):
+    district_code: str
+    district_name: str
+    # 'polygon' for an exact hit, 'nearest_centroid' for the border fallback
+    method: str
+
+def point_in_ring(lon: float, lat: float, ring: Ring) -> bool:
+    """
+    Even-odd ray casting test of a point against one ring
+    """
+    inside = False
+    x1, y1 = ring[-1]
+    for x2, y2 in ring:
+        if (y1 > lat) != (y2 > lat) and lon < (x1 - x2) * (lat - y2) / (y1 - y2) + x2:
+            inside = not inside
+        x1, y1 = x2, y2
+    return inside
+
+def point_in_shape(lon: float, lat: float, shape: DistrictShape) -> bool:
+    for outer, *holes in shape.polygons:
+        if point_in_ring(lon, lat, outer) and not any(point_in_ring(lon, lat, hole) for hole in holes):
+            return True
+    return False
+
+def ring_centroid(ring: Ring) -> Tuple[float, float, float]:
+    """
+    Area-weighted centroid of a ring as (lon, lat, signed area)
+    """
+    area = cx = cy = 0.0
+    x1, y1 = ring[-1]
+    for x2, y2 in ring:
+        cross = x1 * y2 - x2 * y1
+        area += cross
+        cx += (x1 + x2) * cross
+        cy += (y1 + y2) * cross
+        x1, y1 = x2, y2
+    if not area:
+        xs, ys = zip(*ring)
+        return sum(xs) / len(xs), sum(ys) / len(ys), 0.0
+    return cx / (3 * area), cy / (3 * area), area / 2
+
+def build_shape(district_code: str, district_name: str, polygons) -> DistrictShape:
+    polygons = tuple(tuple(tuple((float(x), float(y)) for x, y, *_ in ring) for ring in polygon) for polygon in polygons)
+    xs = [x for polygon in polygons for x, _ in polygon[0]]
+    ys = [y for polygon in polygons for _, y in polygon[0]]
+
+    total_area = cx = cy = 0.0
+    for polygon in polygons:
+        x, y, area = ring_centroid(polygon[0])
+        total_area += abs(area)
+        cx += x * abs(area)
+        cy += y * abs(area)
+    if total_area:
+        centroid = (cx / total_area, cy / total_area)
+    else:
+        centroid = (sum(xs) / len(xs), sum(ys) / len(ys))
+    return DistrictShape(district_code, district_name, polygons, (min(xs), min(ys), max(xs), max(ys)), centroid)
+
+def load_boundaries(path) -> List[DistrictShape]:
+    """
+    Read district shapes from a GeoJSON FeatureCollection
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        collection = json.load(file)
+
+    shapes = []
+    for feature in collection.get('features', []):
+        geometry = feature.get('geometry') or {}
+        properties = feature.get('properties') or {}
+        if geometry.get('type') == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry.get('type') == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            continue
+        shapes.append(build_shape(
+            str(properties.get('district_code', '')), properties.get('district_name', ''), polygons
+        ))
+    return shapes
+
+class DistrictLocator:
+    """
+    In-memory point-to-district index.
+
+    Shapes are bucketed by bounding box into a uniform lon/lat grid. A lookup
+    reads the one grid cell containing the point, filters candidates by
+    bounding box and runs an exact point-in-polygon test. Points that fall in
+    no polygon (slivers along shared borders, coordinates rounded by the
+    browser) are given to the candidate with the nearest centroid, provided
+    the point lies within border_tolerance degrees of that district's bounding
+    box; anything further away has no district.
+    """
+
+    def __init__(self, shapes: Iterable[DistrictShape], cell_size=DEFAULT_CELL_SIZE,
+                 border_tolerance=DEFAULT_BORDER_TOLERANCE):
+        self.shapes = list(shapes)
+        self.cell_size = cell_size
+        self.border_tolerance = border_tolerance
+        self.grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for index, shape in enumerate(self.shapes):
+            min_x, min_y, max_x, max_y = shape.bbox
+            # Register the tolerance margin too so border fallbacks see their neighbours
+            for ix in range(self.cell(min_x - border_tolerance), self.cell(max_x + border_tolerance) + 1):
+                for iy in range(self.cell(min_y - border_tolerance), self.cell(max_y + border_tolerance) + 1):
+                    self.grid[(ix, iy)].append(index)
+
+    def cell(self, value: float) -> int:
+        return math.floor(value / self.cell_size)
+
+    def locate(self, lat: float, lon: float) -> Optional[DistrictMatch]:
+        candidates = [self.shapes[index] for index in self.grid.get((self.cell(lon), self.cell(lat)), ())]
+
+        for shape in candidates:
+            min_x, min_y, max_x, max_y = shape.bbox
+            if min_x <= lon <= max_x and min_y <= lat <= max_y and point_in_shape(lon, lat, shape):
+                return DistrictMatch(shape.district_code, shape.district_name, 'polygon')
+
+        tolerance = self.border_tolerance
+        nearest, nearest_distance = None, None
+        for shape in candidates:
+            min_x, min_y, max_x, max_y = shape.bbox
+            if not (min_x - tolerance <= lon <= max_x + tolerance and min_y - tolerance <= lat <= max_y + tolerance):
+                continue
+            cx, cy = shape.centroid
+            distance = (cx - lon) ** 2 + (cy - lat) ** 2
+            if nearest_distance is None or distance < nearest_distance:
+                nearest, nearest_distance = shape, distance
+        if nearest is not None:
+            return DistrictMatch(nearest.district_code, nearest.district_name, 'nearest_centroid')
+        return None
+
+_locator = None
+_locator_lock = threading.Lock()
+
+def get_locator() -> Optional[DistrictLocator]:
+    """
+    The process-wide locator, built on first use from MGNREGA_DISTRICT_BOUNDARIES.
+    Returns None when no boundary file is installed.
+    """
+    global _locator
+    if _locator is None:
+        with _locator_lock:
+            if _locator is None:
+                path = Path(getattr(settings, 'MGNREGA_DISTRICT_BOUNDARIES', DEFAULT_BOUNDARIES_FILE))
+                if not path.exists():
+                    return None
+                _locator = DistrictLocator(
+                    load_boundaries(path),
+                    cell_size=getattr(settings, 'MGNREGA_GEOCODE_CELL_SIZE', DEFAULT_CELL_SIZE),
+                    border_tolerance=getattr(settings, 'MGNREGA_GEOCODE_BORDER_TOLERANCE', DEFAULT_BORDER_TOLERANCE),
+                )
+    return _locator
@@ -0,0 +1,255 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import read_cache
+from .metrics import ingested_rows
+from .models import District, DistrictPayload, MGNREGAData
+from .payloads import invalidate_payloads
+from .rankings import invalidate_rankings
+from .rollups import ROLLUP_METRICS, RollupDelta
+
+DEFAULT_BATCH_SIZE = 500
+
+# Keys of an ingest record that describe the district rather than the row
+DISTRICT_KEYS = ('state_code', 'state_name', 'district_name')
+
+# Keys of an ingest record that identify a row within a district
+ROW_KEYS = ('fin_year', 'month')
+
+# Keys a record must have non-empty to be stored
+REQUIRED_KEYS = ('district_code',) + ROW_KEYS
+
+# Every MGNREGAData column the upstream feed provides, in model order
+DATA_FIELDS = tuple(
+    model_field.name for model_field in MGNREGAData._meta.concrete_fields
+    if model_field.name not in ('id', 'district', 'fin_year', 'month', 'last_updated', 'last_verified', 'content_hash')
+)
+
+# Data fields covered by a row's content hash, flagged when stored as floats
+HASH_FIELDS = tuple(
+    (name, MGNREGAData._meta.get_field(name).get_internal_type() == 'FloatField') for name in DATA_FIELDS
+)
+
+@dataclass
+class IngestResult:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # Districts present in the ingested records, and those whose data changed
+    district_ids: Set[int] = field(default_factory=set)
+    changed_district_ids: Set[int] = field(default_factory=set)
+    # Records that were skipped: [{"item": identifying keys, "error": reason}]
+    errors: List[dict] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated + self.unchanged
+
+    def __add__(self, other: 'IngestResult') -> 'IngestResult':
+        return IngestResult(
+            inserted=self.inserted + other.inserted,
+            updated=self.updated + other.updated,
+            unchanged=self.unchanged + other.unchanged,
+            district_ids=self.district_ids | other.district_ids,
+            changed_district_ids=self.changed_district_ids | other.changed_district_ids,
+            errors=self.errors + other.errors,
+        )
+
+    def __str__(self):
+        summary = f"{self.inserted} inserted, {self.updated} updated, {self.unchanged} unchanged"
+        return f"{summary}, {len(self.errors)} rejected" if self.errors else summary
+
+def content_hash(values: dict) -> str:
+    """
+    Compact digest of a row's data fields. Floats are normalised so that a
+    value read back from the database hashes like the one that was written.
+    """
+    data = []
+    for name, is_float in HASH_FIELDS:
+        value = values.get(name)
+        data.append(float(value) if is_float and value is not None else value)
+    encoded = json.dumps(data, separators=(',', ':'), default=str).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+def row_values(row: MGNREGAData) -> dict:
+    return {name: getattr(row, name) for name in DATA_FIELDS}
+
+def record_error(record: dict):
+    """
+    Why a record cannot be stored, or None if it can
+    """
+    missing = [key for key in REQUIRED_KEYS if not record.get(key)]
+    return f"missing {', '.join(missing)}" if missing else None
+
+def get_batch_size(batch_size=None) -> int:
+    """
+    Resolve the batch size used for bulk writes
+    """
+    if batch_size:
+        return batch_size
+    return getattr(settings, 'MGNREGA_INGEST_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+def resolve_districts(records: List[dict]) -> Dict[str, District]:
+    """
+    Map every district code in the records to a District, creating the missing
+    ones in a single bulk insert
+    """
+    codes = {record['district_code'] for record in records}
+    districts = {}
+    for district in District.objects.filter(district_code__in=codes).order_by('id'):
+        districts.setdefault(district.district_code, district)
+
+    missing = []
+    for record in records:
+        code = record['district_code']
+        if code not in districts:
+            district = District(district_code=code, **{key: record.get(key, '') for key in DISTRICT_KEYS})
+            districts[code] = district
+            missing.append(district)
+
+    if missing:
+        District.objects.bulk_create(missing)
+        if any(district.pk is None for district in missing):
+            # Backends without RETURNING support leave pk unset after bulk_create
+            for district in District.objects.filter(district_code__in=[d.district_code for d in missing]):
+                districts[district.district_code] = district
+    return districts
+
+def ingest_records(records: Iterable[dict], batch_size=None) -> IngestResult:
+    """
+    Upsert MGNREGA records in bulk inside a single transaction.
+
+    Each record is a dict holding the district keys (district_code, state_code,
+    state_name, district_name), the row keys (fin_year, month) and any of the
+    MGNREGAData data fields. Rows are matched on (district, fin_year, month);
+    when the same key appears more than once the last record wins. Records
+    without a district code, fin_year or month are skipped and listed in
+    the result's errors rather than failing the batch.
+
+    Every row stores a hash of its data fields. A complete record whose hash
+    matches is not loaded or rewritten: only its last_verified timestamp is
+    bumped, in bulk, and last_updated keeps marking the last real change.
+    """
+    batch_size = get_batch_size(batch_size)
+    result = IngestResult()
+
+    latest: Dict[Tuple[str, str, str], dict] = {}
+    for record in records:
+        error = record_error(record)
+        if error is not None:
+            item = {key: record.get(key) for key in REQUIRED_KEYS + ('district_name',)}
+            result.errors.append({'item': item, 'error': error})
+            continue
+        latest[(record['district_code'], record['fin_year'], record['month'])] = record
+    ingested_rows.inc(len(result.errors), result='rejected')
+    if not latest:
+        return result
+    records = list(latest.values())
+
+    with transaction.atomic():
+        districts = resolve_districts(records)
+
+        # Keys and hashes of the stored rows first; full rows only where needed
+        existing: Dict[Tuple[int, str, str], Tuple[int, str]] = {}
+        queryset = MGNREGAData.objects.filter(
+            district__in=[district.pk for district in districts.values()],
+            fin_year__in={record['fin_year'] for record in records},
+            month__in={record['month'] for record in records},
+        ).order_by('id')
+        for pk, district_id, fin_year, month, stored_hash in queryset.values_list(
+            'id', 'district_id', 'fin_year', 'month', 'content_hash'
+        ):
+            existing.setdefault((district_id, fin_year, month), (pk, stored_hash))
+
+        new_records: List[dict] = []
+        unchanged_ids: List[int] = []
+        # Records of existing rows that may have changed, by row id
+        candidates: Dict[int, dict] = {}
+        for record in records:
+            district = districts[record['district_code']]
+            match = existing.get((district.pk, record['fin_year'], record['month']))
+            if match is None:
+                new_records.append(record)
+                continue
+            pk, stored_hash = match
+            complete = all(name in record for name in DATA_FIELDS)
+            if complete and content_hash(record) == stored_hash:
+                unchanged_ids.append(pk)
+            else:
+                candidates[pk] = record
+
+        to_create: List[MGNREGAData] = []
+        to_update: List[MGNREGAData] = []
+        # (state_code, fin_year, month) slices whose values change
+        changed_slices: Set[Tuple[str, str, str]] = set()
+        rollups = RollupDelta()
+        now = timezone.now()
+
+        for record in new_records:
+            district = districts[record['district_code']]
+            values = {name: record[name] for name in DATA_FIELDS if name in record}
+            row = MGNREGAData(district=district, fin_year=record['fin_year'], month=record['month'], **values)
+            row.content_hash = content_hash(row_values(row))
+            row.last_verified = now
+            to_create.append(row)
+            rollups.add(district, record['fin_year'], record['month'], None, row)
+            changed_slices.add((district.state_code, record['fin_year'], record['month']))
+
+        if candidates:
+            for row in MGNREGAData.objects.filter(pk__in=list(candidates)):
+                record = candidates[row.pk]
+                district = districts[record['district_code']]
+                previous = {name: getattr(row, name) for name in ROLLUP_METRICS}
+                for name in DATA_FIELDS:
+                    if name in record:
+                        setattr(row, name, record[name])
+                digest = content_hash(row_values(row))
+                if digest == row.content_hash:
+                    unchanged_ids.append(row.pk)
+                    continue
+                row.content_hash = digest
+                row.last_updated = now
+                row.last_verified = now
+                to_update.append(row)
+                rollups.add(district, record['fin_year'], record['month'], previous, row)
+                changed_slices.add((district.state_code, record['fin_year'], record['month']))
+
+        if to_create:
+            MGNREGAData.objects.bulk_create(to_create, batch_size=batch_size)
+        if to_update:
+            MGNREGAData.objects.bulk_update(
+                to_update, DATA_FIELDS + ('content_hash', 'last_updated', 'last_verified'), batch_size=batch_size
+            )
+        # Unchanged rows are only marked as confirmed by this fetch
+        for start in range(0, len(unchanged_ids), batch_size):
+            MGNREGAData.objects.filter(pk__in=unchanged_ids[start:start + batch_size]).update(last_verified=now)
+
+        # Pre-rendered responses of changed districts no longer match their rows;
+        # those of the other districts stay valid and are just marked as verified
+        district_ids = {district.pk for district in districts.values()}
+        changed_district_ids = {row.district_id for row in to_create + to_update}
+        invalidate_payloads(changed_district_ids)
+        if unchanged_ids and district_ids - changed_district_ids:
+            DistrictPayload.objects.filter(district_id__in=district_ids - changed_district_ids).update(verified_at=now)
+        invalidate_rankings(changed_slices)
+        rollups.apply()
+        # Cached district catalog and versions are out of date in every worker;
+        # cleared again on commit in case a reader cached the old rows meanwhile
+        read_cache.invalidate()
+        transaction.on_commit(read_cache.invalidate)
+
+    result.inserted = len(to_create)
+    result.updated = len(to_update)
+    result.unchanged = len(unchanged_ids)
+    result.district_ids = district_ids
+    result.changed_district_ids = changed_district_ids
+    ingested_rows.inc(result.inserted, result='inserted')
+    ingested_rows.inc(result.updated, result='updated')
+    ingested_rows.inc(result.unchanged, result='unchanged')
+    return result
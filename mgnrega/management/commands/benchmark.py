@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mgnrega.benchmarks import SUITES
+
+class Command(BaseCommand):
+    help = 'Run micro-benchmarks for the ingest and read paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('suites', nargs='*', help=f"Suites to run: {', '.join(sorted(SUITES))} (default: all)")
+
+    def handle(self, *args, **options):
+        # Validated here: argparse rejects an empty nargs='*' list under choices
+        unknown = sorted(set(options['suites']) - set(SUITES))
+        if unknown:
+            raise CommandError(f"Unknown suites: {', '.join(unknown)} (choose from {', '.join(sorted(SUITES))})")
+        for name in options['suites'] or sorted(SUITES):
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for metric, value in SUITES[name]().items():
+                if isinstance(value, float):
+                    value = f"{value:,.0f}"
+                self.stdout.write(f"  {metric}: {value}")
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mgnrega.snapshot import export_snapshot
+
+class Command(BaseCommand):
+    help = 'Write the districts and MGNREGA data to a compressed columnar snapshot file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Snapshot file to write (e.g. mgnrega.snapshot.gz)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with open(options['path'], 'wb') as file:
+            counts = export_snapshot(file)
+            size = file.tell()
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {counts['district']} districts and {counts['mgnrega_data']} rows "
+            f"to {options['path']} ({size:,} bytes) in {time.perf_counter() - start:.2f}s"
+        ))
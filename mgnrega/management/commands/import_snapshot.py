@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mgnrega.snapshot import SnapshotError, import_snapshot
+
+class Command(BaseCommand):
+    help = 'Load a snapshot written by export_snapshot into the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Snapshot file to read')
+        parser.add_argument('--replace', action='store_true', help='Delete the existing MGNREGA data first')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as file:
+                counts = import_snapshot(file, replace=options['replace'], batch_size=options['batch_size'])
+        except (OSError, SnapshotError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {counts['district']} districts and {counts['mgnrega_data']} rows "
+            f"in {time.perf_counter() - start:.2f}s"
+        ))
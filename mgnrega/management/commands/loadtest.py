@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from mgnrega.benchmarks import run_load
+
+class Command(BaseCommand):
+    help = (
+        'Load-test running servers with concurrent GETs and compare their throughput. '
+        'To compare WSGI and ASGI, serve the project both ways (e.g. gunicorn ovor_project.wsgi on :8000 and '
+        'uvicorn ovor_project.asgi:application on :8001) and pass the sync and async endpoints, e.g. '
+        'http://127.0.0.1:8000/api/performance/NIWARI/ http://127.0.0.1:8001/api/async/performance/NIWARI/'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help='URLs to load, each tested in turn')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent client connections')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per URL')
+
+    def handle(self, *args, **options):
+        results = {}
+        for url in options['urls']:
+            self.stdout.write(self.style.MIGRATE_HEADING(url))
+            results[url] = run_load(url, concurrency=options['concurrency'], total=options['requests'])
+            for metric, value in results[url].items():
+                if isinstance(value, float):
+                    value = f"{value:,.1f}"
+                self.stdout.write(f"  {metric}: {value}")
+
+        if len(results) > 1:
+            baseline_url, *others = results
+            baseline = results[baseline_url]['requests/sec']
+            for url in others:
+                self.stdout.write(f"{url}: {results[url]['requests/sec'] / baseline:.2f}x the throughput of {baseline_url}")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mgnrega.static_api import publish_static_api
+
+class Command(BaseCommand):
+    help = 'Write the district list and performance payloads as hashed, pre-compressed files under MGNREGA_STATIC_API_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Directory to publish into (defaults to MGNREGA_STATIC_API_ROOT)')
+
+    def handle(self, *args, **options):
+        try:
+            result = publish_static_api(root=options['output'])
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(str(result)))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mgnrega.rollups import rebuild_rollups, verify_rollups
+
+class Command(BaseCommand):
+    help = 'Rebuild the state-month and district-year rollup tables from MGNREGAData and verify them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only verify the stored rollups, do not rebuild')
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            counts = rebuild_rollups()
+            self.stdout.write(
+                f"Rebuilt {counts['state_months']} state-month and {counts['district_years']} district-year rollups"
+            )
+
+        problems = verify_rollups()
+        for problem in problems:
+            self.stderr.write(problem)
+        if problems:
+            raise CommandError(f"{len(problems)} rollups do not match the data")
+        self.stdout.write(self.style.SUCCESS('Rollups match the data'))
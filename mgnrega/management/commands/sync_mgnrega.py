@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mgnrega.fetch import FetchError
+from mgnrega.sync import build_scopes, run_sync
+
+class Command(BaseCommand):
+    help = 'Fetch MGNREGA data from the data.gov.in API and ingest it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--state', action='append', default=[], help='Limit to a state name (repeatable)')
+        parser.add_argument('--district', action='append', default=[], help='Limit to a district name (repeatable)')
+        parser.add_argument('--fin-year', action='append', default=[], help='Limit to a financial year, e.g. 2024-2025 (repeatable)')
+        parser.add_argument('--batch-size', type=int, help='Rows per bulk write')
+        parser.add_argument('--page-size', type=int, help='Records per API page')
+        parser.add_argument('--workers', type=int, help='Pages fetched in parallel')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Fetch only recent financial years unless a full re-verification is due')
+        parser.add_argument('--resume', action='store_true', help='Checkpoint pages so a failed sync can continue')
+        parser.add_argument('--dry-run', action='store_true', help='Fetch and parse without writing to the database')
+
+    def handle(self, *args, **options):
+        scopes = build_scopes(options['state'], options['district'], options['fin_year'])
+
+        def progress(update):
+            scope = ', '.join(f"{name}={value}" for name, value in update.scope.items()) or 'all'
+            self.stdout.write(
+                f"[{update.scope_index}/{update.scopes} {scope}] "
+                f"page {update.fetch.pages}/{update.fetch.total_pages or '?'}, "
+                f"{update.rows:,} rows, {update.rows_per_second:,.0f} rows/sec"
+            )
+
+        try:
+            result = run_sync(
+                scopes, workers=options['workers'], batch_size=options['batch_size'], page_size=options['page_size'],
+                dry_run=options['dry_run'], resume=options['resume'], incremental=options['incremental'],
+                progress=progress,
+            )
+        except FetchError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Synced {result}"))
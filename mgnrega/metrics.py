@@ -0,0 +1,250 @@
+"""
+In-process metrics in the Prometheus text format.
+
+MetricsMiddleware records, per view, request latency, the number and time
+of database queries and response sizes. The upstream client and ingest
+record API latency, response statuses and rows. Everything is kept in a
+thread-safe registry and rendered at /metrics.
+
+Query timing uses a connection execute wrapper installed on every database
+connection as it is opened (see MgnregaConfig.ready). It adds to the stats
+of the request running in the current context, so queries made by async
+views through sync_to_async are counted as well; outside a request it does
+nothing but read a context variable.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Sequence, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def escape(value: str, quotes: bool = True) -> str:
+    value = value.replace('\\', '\\\\').replace('\n', '\\n')
+    return value.replace('"', '\\"') if quotes else value
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}"
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: observations per bucket (the last one is +Inf), sum
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, **labels) -> int:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            return sum(entry[0]) if entry else 0
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{format_value(bound)}"'
+                yield f"{self.name}_bucket{format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.labelnames, key)} {format_value(float(total))}"
+            yield f"{self.name}_count{format_labels(self.labelnames, key)} {cumulative}"
+
+class Registry:
+    """
+    Named metrics, rendered together in the Prometheus text format
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {escape(metric.documentation, quotes=False)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+requests_total = registry.counter(
+    'mgnrega_http_requests_total', 'HTTP requests by view, method and status', ('view', 'method', 'status'))
+request_duration = registry.histogram(
+    'mgnrega_http_request_duration_seconds', 'HTTP request latency by view', ('view', 'method'))
+request_queries = registry.histogram(
+    'mgnrega_http_request_db_queries', 'Database queries per request by view', ('view',), QUERY_BUCKETS)
+request_query_duration = registry.histogram(
+    'mgnrega_http_request_db_seconds', 'Database time per request by view', ('view',))
+response_size = registry.histogram(
+    'mgnrega_http_response_size_bytes', 'Response body size by view', ('view',), SIZE_BUCKETS)
+upstream_duration = registry.histogram(
+    'mgnrega_upstream_request_duration_seconds', 'Latency of data.gov.in API calls, including failed attempts')
+upstream_responses = registry.counter(
+    'mgnrega_upstream_responses_total', 'data.gov.in API responses by status code ("error" for no response)',
+    ('status',))
+upstream_rows = registry.counter('mgnrega_upstream_rows_total', 'Records parsed from data.gov.in API pages')
+ingested_rows = registry.counter(
+    'mgnrega_ingested_rows_total', 'Ingested records by outcome (inserted, updated, unchanged, rejected)', ('result',))
+
+class QueryStats:
+    __slots__ = ('queries', 'seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+_query_stats: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar('mgnrega_query_stats', default=None)
+
+def record_query(execute, sql, params, many, context):
+    """
+    Connection execute wrapper adding each query to the current request's stats
+    """
+    stats = _query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.seconds += time.perf_counter() - start
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """
+    connection_created receiver: wrap the connection's queries for the middleware
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+def view_label(request) -> str:
+    # URL names rather than paths keep the number of series bounded
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+def record_request(request, response, seconds: float, stats: QueryStats):
+    view = view_label(request)
+    requests_total.inc(view=view, method=request.method, status=response.status_code)
+    request_duration.observe(seconds, view=view, method=request.method)
+    request_queries.observe(stats.queries, view=view)
+    request_query_duration.observe(stats.seconds, view=view)
+    if not response.streaming:
+        response_size.observe(len(response.content), view=view)
+
+class MetricsMiddleware:
+    """
+    Record latency, database queries and response size of every request
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_stats.reset(token)
+        record_request(request, response, time.perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_stats.reset(token)
+        record_request(request, response, time.perf_counter() - start, stats)
+        return response
+
+def metrics_view(request):
+    """
+    All metrics in the Prometheus text exposition format
+    """
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mgnrega', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FetchCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=255, unique=True)),
+                ('page_size', models.IntegerField()),
+                ('total', models.IntegerField(blank=True, null=True)),
+                ('completed_offsets', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mgnrega', '0003_refreshlease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DistrictPayload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=100)),
+                ('latest_update', models.DateTimeField(blank=True, null=True)),
+                ('rows', models.IntegerField(default=0)),
+                ('body', models.BinaryField()),
+                ('body_gzip', models.BinaryField(blank=True, null=True)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+                ('district', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='payload', to='mgnrega.district')),
+            ],
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:45
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe(apps, schema_editor):
+    """
+    Merge rows that the new unique constraints would reject. Older versions of
+    parse_xml_data inserted every record, so the same (district, fin_year,
+    month) can appear several times; the most recently updated copy is kept.
+    """
+    District = apps.get_model('mgnrega', 'District')
+    MGNREGAData = apps.get_model('mgnrega', 'MGNREGAData')
+    DistrictPayload = apps.get_model('mgnrega', 'DistrictPayload')
+
+    # Districts sharing a code collapse into the oldest one
+    duplicate_codes = (
+        District.objects.values('district_code').annotate(copies=Count('id')).filter(copies__gt=1)
+        .values_list('district_code', flat=True)
+    )
+    for code in list(duplicate_codes):
+        ids = list(District.objects.filter(district_code=code).order_by('id').values_list('id', flat=True))
+        MGNREGAData.objects.filter(district_id__in=ids[1:]).update(district_id=ids[0])
+        District.objects.filter(id__in=ids[1:]).delete()
+
+    duplicate_rows = (
+        MGNREGAData.objects.values('district_id', 'fin_year', 'month').annotate(copies=Count('id'))
+        .filter(copies__gt=1)
+    )
+    for key in list(duplicate_rows):
+        ids = list(
+            MGNREGAData.objects.filter(district_id=key['district_id'], fin_year=key['fin_year'], month=key['month'])
+            .order_by('-last_updated', '-id').values_list('id', flat=True)
+        )
+        MGNREGAData.objects.filter(id__in=ids[1:]).delete()
+
+    # Pre-rendered payloads may include the removed rows; they rebuild on demand
+    DistrictPayload.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mgnrega', '0004_districtpayload'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='district',
+            name='district_name_normalized',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.text.Lower('district_name'), output_field=models.CharField(max_length=100)),
+        ),
+        migrations.AlterField(
+            model_name='district',
+            name='district_code',
+            field=models.CharField(max_length=10, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='mgnregadata',
+            index=models.Index(fields=['district', '-last_updated'], name='mgnrega_district_updated_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='mgnregadata',
+            constraint=models.UniqueConstraint(fields=('district', 'fin_year', 'month'), name='unique_mgnrega_district_month'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mgnrega', '0005_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StateRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state_code', models.CharField(max_length=10)),
+                ('fin_year', models.CharField(max_length=20)),
+                ('month', models.CharField(max_length=20)),
+                ('table', models.JSONField()),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('state_code', 'fin_year', 'month'), name='unique_state_ranking_month')],
+            },
+        ),
+    ]
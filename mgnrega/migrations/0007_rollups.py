@@ -0,0 +1,92 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+# mgnrega.rollups.ROLLUP_METRICS as of this migration
+ROLLUP_METRICS = (
+    'total_exp',
+    'wages',
+    'material_and_skilled_wages',
+    'total_adm_expenditure',
+    'women_persondays',
+    'persondays_central_liability',
+    'sc_persondays',
+    'st_persondays',
+    'total_households_worked',
+    'total_individuals_worked',
+    'total_hhs_completed_100_days',
+)
+
+
+def aggregate(MGNREGAData, group_by):
+    annotations = {'rows': Count('id')}
+    for name in ROLLUP_METRICS:
+        annotations[f'{name}__sum'] = Sum(name)
+        annotations[f'{name}__count'] = Count(name)
+    for values in MGNREGAData.objects.values(*group_by).annotate(**annotations).order_by():
+        yield values, {
+            'rows': values['rows'],
+            'sums': {name: values[f'{name}__sum'] or 0 for name in ROLLUP_METRICS},
+            'counts': {name: values[f'{name}__count'] for name in ROLLUP_METRICS},
+        }
+
+
+def populate(apps, schema_editor):
+    """
+    Fill the rollups from the stored rows, which ingest then keeps up to date
+    """
+    MGNREGAData = apps.get_model('mgnrega', 'MGNREGAData')
+    StateMonthRollup = apps.get_model('mgnrega', 'StateMonthRollup')
+    DistrictYearRollup = apps.get_model('mgnrega', 'DistrictYearRollup')
+    StateMonthRollup.objects.bulk_create([
+        StateMonthRollup(state_code=key['district__state_code'], fin_year=key['fin_year'], month=key['month'], **values)
+        for key, values in aggregate(MGNREGAData, ('district__state_code', 'fin_year', 'month'))
+    ], batch_size=1000)
+    DistrictYearRollup.objects.bulk_create([
+        DistrictYearRollup(district_id=key['district_id'], fin_year=key['fin_year'], **values)
+        for key, values in aggregate(MGNREGAData, ('district_id', 'fin_year'))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mgnrega', '0006_stateranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StateMonthRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fin_year', models.CharField(max_length=20)),
+                ('rows', models.IntegerField(default=0)),
+                ('sums', models.JSONField(default=dict)),
+                ('counts', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('state_code', models.CharField(max_length=10)),
+                ('month', models.CharField(max_length=20)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('state_code', 'fin_year', 'month'), name='unique_state_month_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DistrictYearRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fin_year', models.CharField(max_length=20)),
+                ('rows', models.IntegerField(default=0)),
+                ('sums', models.JSONField(default=dict)),
+                ('counts', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('district', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='year_rollups', to='mgnrega.district')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('district', 'fin_year'), name='unique_district_year_rollup')],
+            },
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mgnrega', '0008_syncjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fin_year', models.CharField(blank=True, max_length=20)),
+                ('month', models.CharField(blank=True, max_length=20)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+                ('verified_at', models.DateTimeField(blank=True, null=True)),
+                ('district', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sync_mark', to='mgnrega.district')),
+            ],
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:06
+
+import hashlib
+import json
+
+from django.db import migrations, models
+from django.db.models import F
+
+# mgnrega.ingest.HASH_FIELDS as of this migration: (field, stored as float)
+HASH_FIELDS = (
+    ('approved_labour_budget', False),
+    ('average_wage_rate', True),
+    ('average_days_employment', False),
+    ('differently_abled_persons_worked', False),
+    ('material_and_skilled_wages', True),
+    ('number_of_completed_works', False),
+    ('number_of_gps_with_nil_exp', False),
+    ('number_of_ongoing_works', False),
+    ('persondays_central_liability', False),
+    ('sc_persondays', False),
+    ('sc_workers_against_active_workers', False),
+    ('st_persondays', False),
+    ('st_workers_against_active_workers', False),
+    ('total_adm_expenditure', True),
+    ('total_exp', True),
+    ('wages', True),
+    ('total_households_worked', False),
+    ('total_individuals_worked', False),
+    ('total_active_job_cards', False),
+    ('total_active_workers', False),
+    ('total_hhs_completed_100_days', False),
+    ('total_jobcards_issued', False),
+    ('total_workers', False),
+    ('total_works_takenup', False),
+    ('women_persondays', False),
+    ('percent_category_b_works', False),
+    ('percent_expenditure_agriculture', True),
+    ('percent_nrm_expenditure', True),
+    ('percentage_payments_within_15_days', True),
+    ('remarks', False),
+)
+
+
+def content_hash(row):
+    # mgnrega.ingest.content_hash as of this migration
+    data = []
+    for name, is_float in HASH_FIELDS:
+        value = getattr(row, name)
+        data.append(float(value) if is_float and value is not None else value)
+    encoded = json.dumps(data, separators=(',', ':'), default=str).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def backfill(apps, schema_editor):
+    """
+    Hash the stored rows so the next ingest can recognise unchanged ones,
+    and count their last update as their last verification
+    """
+    MGNREGAData = apps.get_model('mgnrega', 'MGNREGAData')
+    MGNREGAData.objects.update(last_verified=F('last_updated'))
+    fields = [name for name, _ in HASH_FIELDS]
+    batch = []
+    for row in MGNREGAData.objects.only('id', *fields).iterator(chunk_size=1000):
+        row.content_hash = content_hash(row)
+        batch.append(row)
+        if len(batch) == 1000:
+            MGNREGAData.objects.bulk_update(batch, ['content_hash'])
+            batch = []
+    if batch:
+        MGNREGAData.objects.bulk_update(batch, ['content_hash'])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mgnrega', '0009_syncmark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='districtpayload',
+            name='verified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mgnregadata',
+            name='content_hash',
+            field=models.CharField(blank=True, db_default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='mgnregadata',
+            name='last_verified',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
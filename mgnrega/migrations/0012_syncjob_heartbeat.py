@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:29
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill(apps, schema_editor):
+    """
+    Date existing jobs' last heartbeat from their creation, so unfinished
+    ones left by stopped workers count as abandoned
+    """
+    SyncJob = apps.get_model('mgnrega', 'SyncJob')
+    SyncJob.objects.update(heartbeat_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mgnrega', '0011_ingestrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='syncjob',
+            name='owner',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,28 @@
+import uuid
+
 from django.db import models
+from django.db.models.functions import Lower
 
 class District(models.Model):
     state_code = models.CharField(max_length=10)
     state_name = models.CharField(max_length=100)
-    district_code = models.CharField(max_length=10)
+    district_code = models.CharField(max_length=10, unique=True)
     district_name = models.CharField(max_length=100)
+    # Lowercased by the database so case-insensitive name lookups can use an index
+    district_name_normalized = models.GeneratedField(
+        expression=Lower('district_name'),
+        output_field=models.CharField(max_length=100),
+        db_persist=True,
+        db_index=True,
+    )
+
+    # data.gov.in XML tag -> model field
+    UPSTREAM_FIELDS = (
+        ('state_code', 'state_code'),
+        ('state_name', 'state_name'),
+        ('district_code', 'district_code'),
+        ('district_name', 'district_name'),
+    )
     
     def __str__(self):
         return f"{self.district_name}, {self.state_name}"
@@ -58,8 +76,235 @@ class MGNREGAData(models.Model):
     # Remarks
     remarks = models.TextField(blank=True)
     
-    # Timestamp for when data was fetched
+    # When the row's data last changed, and when the upstream API last confirmed it
     last_updated = models.DateTimeField(auto_now=True)
+    last_verified = models.DateTimeField(null=True, blank=True)
+    # Digest of the data fields, so unchanged upstream rows can be skipped (see mgnrega.ingest)
+    content_hash = models.CharField(max_length=32, blank=True, db_default='')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['district', 'fin_year', 'month'], name='unique_mgnrega_district_month'),
+        ]
+        indexes = [
+            models.Index(fields=['district', '-last_updated'], name='mgnrega_district_updated_idx'),
+        ]
+
+    # data.gov.in XML tag -> model field; values are coerced by the field's type
+    UPSTREAM_FIELDS = (
+        ('fin_year', 'fin_year'),
+        ('month', 'month'),
+        ('Approved_Labour_Budget', 'approved_labour_budget'),
+        ('Average_Wage_rate_per_day_per_person', 'average_wage_rate'),
+        ('Average_days_of_employment_provided_per_Household', 'average_days_employment'),
+        ('Differently_abled_persons_worked', 'differently_abled_persons_worked'),
+        ('Material_and_skilled_Wages', 'material_and_skilled_wages'),
+        ('Number_of_Completed_Works', 'number_of_completed_works'),
+        ('Number_of_GPs_with_NIL_exp', 'number_of_gps_with_nil_exp'),
+        ('Number_of_Ongoing_Works', 'number_of_ongoing_works'),
+        ('Persondays_of_Central_Liability_so_far', 'persondays_central_liability'),
+        ('SC_persondays', 'sc_persondays'),
+        ('SC_workers_against_active_workers', 'sc_workers_against_active_workers'),
+        ('ST_persondays', 'st_persondays'),
+        ('ST_workers_against_active_workers', 'st_workers_against_active_workers'),
+        ('Total_Adm_Expenditure', 'total_adm_expenditure'),
+        ('Total_Exp', 'total_exp'),
+        ('Wages', 'wages'),
+        ('Total_Households_Worked', 'total_households_worked'),
+        ('Total_Individuals_Worked', 'total_individuals_worked'),
+        ('Total_No_of_Active_Job_Cards', 'total_active_job_cards'),
+        ('Total_No_of_Active_Workers', 'total_active_workers'),
+        ('Total_No_of_HHs_completed_100_Days_of_Wage_Employment', 'total_hhs_completed_100_days'),
+        ('Total_No_of_JobCards_issued', 'total_jobcards_issued'),
+        ('Total_No_of_Workers', 'total_workers'),
+        ('Total_No_of_Works_Takenup', 'total_works_takenup'),
+        ('Women_Persondays', 'women_persondays'),
+        ('percent_of_Category_B_Works', 'percent_category_b_works'),
+        ('percent_of_Expenditure_on_Agriculture_Allied_Works', 'percent_expenditure_agriculture'),
+        ('percent_of_NRM_Expenditure', 'percent_nrm_expenditure'),
+        ('percentage_payments_gererated_within_15_days', 'percentage_payments_within_15_days'),
+        ('Remarks', 'remarks'),
+    )
     
     def __str__(self):
-        return f"MGNREGA Data for {self.month} {self.fin_year}"
\ No newline at end of file
+        return f"MGNREGA Data for {self.month} {self.fin_year}"
+
+class FetchCheckpoint(models.Model):
+    # Identifies the upstream query (filters + page size) being paged through
+    scope = models.CharField(max_length=255, unique=True)
+    page_size = models.IntegerField()
+    total = models.IntegerField(null=True, blank=True)
+    completed_offsets = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Fetch checkpoint for {self.scope} ({len(self.completed_offsets)} pages done)"
+
+class RefreshLease(models.Model):
+    # Cross-process lock so only one worker refreshes a given key at a time
+    key = models.CharField(max_length=255, unique=True)
+    owner = models.CharField(max_length=255)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Refresh lease on {self.key} held by {self.owner}"
+
+class DistrictPayload(models.Model):
+    # Pre-rendered performance API response for a district, rebuilt on ingest
+    district = models.OneToOneField(District, on_delete=models.CASCADE, related_name='payload')
+    version = models.CharField(max_length=100)
+    latest_update = models.DateTimeField(null=True, blank=True)
+    # Newest last_verified of the rows; bumped without a rebuild when a refresh finds no changes
+    verified_at = models.DateTimeField(null=True, blank=True)
+    rows = models.IntegerField(default=0)
+    body = models.BinaryField()
+    body_gzip = models.BinaryField(null=True, blank=True)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Payload for {self.district.district_name} ({self.rows} rows)"
+
+class StateRanking(models.Model):
+    # Cached district rankings of every metric for one state and month, dropped on ingest
+    state_code = models.CharField(max_length=10)
+    fin_year = models.CharField(max_length=20)
+    month = models.CharField(max_length=20)
+    table = models.JSONField()
+    built_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['state_code', 'fin_year', 'month'], name='unique_state_ranking_month'),
+        ]
+
+    def __str__(self):
+        return f"Rankings for state {self.state_code} in {self.month} {self.fin_year}"
+
+class Rollup(models.Model):
+    # Running sums and non-null counts of the rollup metrics (see mgnrega.rollups)
+    fin_year = models.CharField(max_length=20)
+    rows = models.IntegerField(default=0)
+    sums = models.JSONField(default=dict)
+    counts = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    def means(self):
+        return {
+            name: self.sums.get(name, 0) / count if count else None
+            for name, count in self.counts.items()
+        }
+
+class StateMonthRollup(Rollup):
+    state_code = models.CharField(max_length=10)
+    month = models.CharField(max_length=20)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['state_code', 'fin_year', 'month'], name='unique_state_month_rollup'),
+        ]
+
+    def __str__(self):
+        return f"Rollup for state {self.state_code} in {self.month} {self.fin_year}"
+
+class DistrictYearRollup(Rollup):
+    district = models.ForeignKey(District, on_delete=models.CASCADE, related_name='year_rollups')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['district', 'fin_year'], name='unique_district_year_rollup'),
+        ]
+
+    def __str__(self):
+        return f"Rollup for {self.district.district_name} in {self.fin_year}"
+
+class SyncJob(models.Model):
+    # A queued or finished sync started through /api/initialize/
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    scope = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    message = models.TextField(blank=True)
+    result = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Worker process that queued the job, and when it last reported the job alive
+    owner = models.CharField(max_length=255, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Sync job {self.id} ({self.status})"
+
+class SyncMark(models.Model):
+    # High-water mark of a district: the latest period stored and when it was last checked upstream
+    district = models.OneToOneField(District, on_delete=models.CASCADE, related_name='sync_mark')
+    fin_year = models.CharField(max_length=20, blank=True)
+    month = models.CharField(max_length=20, blank=True)
+    # Last sync of any kind, and last one that re-fetched every financial year
+    synced_at = models.DateTimeField(null=True, blank=True)
+    verified_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Sync mark for {self.district.district_name}: {self.month} {self.fin_year}"
+
+class IngestRun(models.Model):
+    # One sync or file load with its timings and outcome (see mgnrega.recorder)
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    PARTIAL = 'partial'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (PARTIAL, 'Partial'), (FAILED, 'Failed')]
+
+    API = 'api'
+    FILE = 'file'
+    SOURCE_CHOICES = [(API, 'data.gov.in API'), (FILE, 'Local file')]
+
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default=API)
+    # Upstream filter sets the run covered
+    scopes = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=RUNNING)
+    message = models.TextField(blank=True)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Seconds spent per phase; HTTP time is summed across fetch workers
+    http_seconds = models.FloatField(default=0)
+    parse_seconds = models.FloatField(default=0)
+    db_seconds = models.FloatField(default=0)
+    pages = models.IntegerField(default=0)
+    rows_inserted = models.IntegerField(default=0)
+    rows_updated = models.IntegerField(default=0)
+    rows_skipped = models.IntegerField(default=0)
+    # Records or scopes that failed without stopping the run: [{"item": ..., "error": ...}]
+    errors = models.JSONField(default=list)
+    error_count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-started_at'], name='mgnrega_ingestrun_started_idx'),
+        ]
+
+    @property
+    def rows(self) -> int:
+        return self.rows_inserted + self.rows_updated + self.rows_skipped
+
+    @property
+    def duration(self):
+        if self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
+
+    @property
+    def rows_per_second(self):
+        duration = self.duration
+        return self.rows / duration if duration else None
+
+    def __str__(self):
+        return f"Ingest run {self.pk} from {self.source} ({self.status})"
@@ -0,0 +1,116 @@
+import io
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .models import District, MGNREGAData
+
+def parse_int(text) -> Optional[int]:
+    """
+    Safely convert an upstream value to an integer
+    """
+    if text is None or text == '':
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+def parse_float(text) -> Optional[float]:
+    """
+    Safely convert an upstream value to a float
+    """
+    if text is None or text == '':
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def parse_text(text) -> str:
+    """
+    Convert an upstream value to text, treating missing values as empty
+    """
+    if text is None:
+        return ''
+    return str(text)
+
+# Model field type -> converter for upstream values
+FIELD_CONVERTERS = {
+    'IntegerField': parse_int,
+    'BigIntegerField': parse_int,
+    'FloatField': parse_float,
+    'CharField': parse_text,
+    'TextField': parse_text,
+}
+
+def compile_converters(*models) -> Tuple[Tuple[str, str, Callable], ...]:
+    """
+    Build the (upstream tag, record key, converter) table from the models'
+    UPSTREAM_FIELDS so conversion does no per-row field lookups
+    """
+    converters = []
+    for model in models:
+        for tag, field_name in model.UPSTREAM_FIELDS:
+            field = model._meta.get_field(field_name)
+            converters.append((tag, field_name, FIELD_CONVERTERS[field.get_internal_type()]))
+    return tuple(converters)
+
+ROW_CONVERTERS = compile_converters(District, MGNREGAData)
+
+def record_from_fields(fields: Dict[str, str]) -> dict:
+    """
+    Convert the tag->value dict of an upstream record (an XML <item> or a
+    JSON object) into an ingest record
+    """
+    get = fields.get
+    return {key: convert(get(tag)) for tag, key, convert in ROW_CONVERTERS}
+
+class ResponseReader:
+    """
+    Stream the records of a data.gov.in XML response with iterparse.
+
+    Iterating yields one ingest record per <records>/<item>, building each
+    item's tag->text dict in a single pass over its children and discarding
+    the element afterwards, so memory use does not grow with the document.
+    The <total> record count is available as .total once it has been read
+    (it precedes <records> in data.gov.in responses).
+    """
+
+    def __init__(self, source: Union[str, BinaryIO]):
+        self.source = source
+        self.total: Optional[int] = None
+
+    def __iter__(self) -> Iterator[dict]:
+        for fields in self.iter_items():
+            yield record_from_fields(fields)
+
+    def iter_items(self) -> Iterator[Dict[str, str]]:
+        """
+        Yield the raw tag->text dict of every record item
+        """
+        path = []
+        records = None
+        for event, element in ET.iterparse(self.source, events=('start', 'end')):
+            if event == 'start':
+                path.append(element.tag)
+                if path == ['result', 'records']:
+                    records = element
+                continue
+
+            path.pop()
+            if element.tag == 'item' and path == ['result', 'records']:
+                yield {child.tag: child.text or '' for child in element}
+                # Drop the processed item so the tree never holds more than one
+                records.clear()
+            elif path == ['result']:
+                if element.tag == 'total':
+                    self.total = parse_int(element.text)
+                element.clear()
+
+def parse_response(content: bytes) -> Tuple[Optional[int], List[dict]]:
+    """
+    Parse a data.gov.in XML response into (total record count, ingest records)
+    """
+    reader = ResponseReader(io.BytesIO(content))
+    records = list(reader)
+    return reader.total, records
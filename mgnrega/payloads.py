@@ -0,0 +1,82 @@
+import gzip
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db.models import Count, Max
+from rest_framework.renderers import JSONRenderer
+
+from .models import District, DistrictPayload, MGNREGAData
+from .serializers import mgnrega_data_values
+
+def data_version(district_id: int) -> dict:
+    """
+    Newest last_updated and last_verified and row count of a district's stored data
+    """
+    return MGNREGAData.objects.filter(district_id=district_id).aggregate(
+        latest_update=Max('last_updated'), verified_at=Max('last_verified'), rows=Count('id')
+    )
+
+def build_payload(district: District) -> DistrictPayload:
+    """
+    Render a district's performance response to JSON bytes and store it.
+
+    The payload is only saved if the district's data did not change while it
+    was being rendered; otherwise the rendered copy is returned unsaved and
+    the next request builds it again.
+    """
+    version = data_version(district.pk)
+    mgnrega_data = MGNREGAData.objects.filter(district=district).order_by('-last_updated')
+    # Same JSON as MGNREGADataSerializer, built from one values() query with the district joined
+    body = JSONRenderer().render(mgnrega_data_values.data(mgnrega_data))
+    latest = version['latest_update'].timestamp() if version['latest_update'] else 0
+
+    payload = DistrictPayload(
+        district=district,
+        version=f"district-{district.pk}-{version['rows']}-{latest}",
+        latest_update=version['latest_update'],
+        verified_at=version['verified_at'],
+        rows=version['rows'],
+        body=body,
+        body_gzip=gzip.compress(body) if getattr(settings, 'MGNREGA_PAYLOAD_GZIP', True) else None,
+    )
+    if data_version(district.pk) == version:
+        DistrictPayload.objects.update_or_create(
+            district=district,
+            defaults={
+                'version': payload.version,
+                'latest_update': payload.latest_update,
+                'verified_at': payload.verified_at,
+                'rows': payload.rows,
+                'body': payload.body,
+                'body_gzip': payload.body_gzip,
+            },
+        )
+    return payload
+
+def get_payload(district: District) -> DistrictPayload:
+    """
+    Stored payload for a district, building it on a miss
+    """
+    try:
+        return district.payload
+    except DistrictPayload.DoesNotExist:
+        return build_payload(district)
+
+def invalidate_payloads(district_ids: Iterable[int]):
+    """
+    Drop the stored payloads of districts whose data has changed
+    """
+    DistrictPayload.objects.filter(district_id__in=list(district_ids)).delete()
+
+def rebuild_payloads(district_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Rebuild the payloads of the given districts (all districts by default)
+    """
+    districts = District.objects.all()
+    if district_ids is not None:
+        districts = districts.filter(pk__in=list(district_ids))
+    count = 0
+    for district in districts:
+        build_payload(district)
+        count += 1
+    return count
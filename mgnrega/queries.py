@@ -0,0 +1,221 @@
+import base64
+import binascii
+from typing import List, Optional, Sequence, Tuple
+
+from django.db.models import Case, IntegerField, Q, QuerySet, Value, When
+
+from .models import MGNREGAData
+from .serializers import MGNREGADataSerializer, mgnrega_data_values
+
+# Months in financial-year order (April to March)
+FISCAL_MONTHS = ('Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec', 'Jan', 'Feb', 'Mar')
+
+# Output keys of MGNREGADataSerializer -> ORM lookups that produce them
+PERFORMANCE_FIELDS = {
+    **{
+        field.name: field.attname if field.is_relation else field.name
+        for field in MGNREGAData._meta.concrete_fields
+        if field.name not in MGNREGADataSerializer.Meta.exclude
+    },
+    'district_name': 'district__district_name',
+    'state_name': 'district__state_name',
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Numeric columns that can be charted as a series
+SERIES_METRICS = tuple(
+    field.name for field in MGNREGAData._meta.concrete_fields
+    if field.get_internal_type() in ('IntegerField', 'BigIntegerField', 'FloatField')
+)
+# The metrics Charts.js plots
+DEFAULT_SERIES_METRICS = ('total_households_worked', 'total_individuals_worked', 'women_persondays', 'total_exp', 'wages')
+
+class QueryError(ValueError):
+    """
+    Raised for malformed query parameters
+    """
+
+def fiscal_month_index(month: str) -> Optional[int]:
+    """
+    Position of a month name within the financial year (Apr=1 ... Mar=12)
+    """
+    prefix = (month or '')[:3].title()
+    if prefix in FISCAL_MONTHS:
+        return FISCAL_MONTHS.index(prefix) + 1
+    return None
+
+def month_index_expression() -> Case:
+    return Case(
+        *[When(month=month, then=Value(index)) for index, month in enumerate(FISCAL_MONTHS, start=1)],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+def with_period(queryset: QuerySet) -> QuerySet:
+    """
+    Annotate rows with their month's position in the financial year
+    """
+    return queryset.annotate(month_index=month_index_expression())
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    if not value:
+        return None
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in PERFORMANCE_FIELDS]
+    if unknown:
+        raise QueryError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def parse_metrics(value: Optional[str]) -> List[str]:
+    if not value:
+        return list(DEFAULT_SERIES_METRICS)
+    metrics = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in metrics if name not in SERIES_METRICS]
+    if unknown:
+        raise QueryError(f"Unknown metrics: {', '.join(unknown)}")
+    return metrics
+
+def parse_period(value: str) -> Tuple[str, Optional[int]]:
+    """
+    Parse "2024-2025" or "2024-2025:Apr" into (fin_year, month index)
+    """
+    fin_year, _, month = value.partition(':')
+    if not fin_year:
+        raise QueryError(f"Invalid period: {value}")
+    if not month:
+        return fin_year, None
+    index = fiscal_month_index(month)
+    if index is None:
+        raise QueryError(f"Invalid month in period: {value}")
+    return fin_year, index
+
+def parse_positive_int(value: str, name: str, maximum: Optional[int] = None) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+    if number < 1:
+        raise QueryError(f"{name} must be positive")
+    return min(number, maximum) if maximum else number
+
+def encode_cursor(row: dict) -> str:
+    raw = f"{row['fin_year']}|{row['month_index']}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[str, int, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        fin_year, month_index, pk = raw.rsplit('|', 2)
+        return fin_year, int(month_index), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise QueryError("Invalid cursor")
+
+def period_after(fin_year: str, month_index: Optional[int]) -> Q:
+    """
+    Rows in or after the given period
+    """
+    if month_index is None:
+        return Q(fin_year__gte=fin_year)
+    return Q(fin_year__gt=fin_year) | Q(fin_year=fin_year, month_index__gte=month_index)
+
+def period_before(fin_year: str, month_index: Optional[int]) -> Q:
+    """
+    Rows in or before the given period
+    """
+    if month_index is None:
+        return Q(fin_year__lte=fin_year)
+    return Q(fin_year__lt=fin_year) | Q(fin_year=fin_year, month_index__lte=month_index)
+
+def filter_period(queryset: QuerySet, params) -> QuerySet:
+    """
+    Apply the from/to parameters to a queryset annotated by with_period
+    """
+    if params.get('from'):
+        queryset = queryset.filter(period_after(*parse_period(params['from'])))
+    if params.get('to'):
+        queryset = queryset.filter(period_before(*parse_period(params['to'])))
+    return queryset
+
+def performance_rows(district, params) -> Tuple[List[dict], Optional[str], bool]:
+    """
+    Query a district's performance rows according to request parameters.
+
+    Supported parameters: fields (comma separated output keys), from/to (a
+    fin_year, optionally with ":Mon"), latest (N most recent months), and
+    cursor/page_size for keyset pagination. Rows come newest period first.
+    Only the requested columns are selected. Returns (rows, next cursor,
+    paginated).
+    """
+    fields = parse_fields(params.get('fields'))
+    output_fields: Sequence[str] = fields or list(PERFORMANCE_FIELDS)
+    paginated = 'cursor' in params or 'page_size' in params
+    if 'latest' in params and paginated:
+        raise QueryError("latest cannot be combined with cursor or page_size")
+
+    queryset = filter_period(with_period(MGNREGAData.objects.filter(district=district)), params)
+
+    limit = None
+    if 'latest' in params:
+        limit = parse_positive_int(params['latest'], 'latest')
+    elif paginated:
+        limit = parse_positive_int(params.get('page_size', DEFAULT_PAGE_SIZE), 'page_size', MAX_PAGE_SIZE)
+        if params.get('cursor'):
+            fin_year, month_index, pk = decode_cursor(params['cursor'])
+            queryset = queryset.filter(
+                Q(fin_year__lt=fin_year)
+                | Q(fin_year=fin_year, month_index__lt=month_index)
+                | Q(fin_year=fin_year, month_index=month_index, id__lt=pk)
+            )
+
+    queryset = queryset.order_by('-fin_year', '-month_index', '-id')
+    lookups = {name: PERFORMANCE_FIELDS[name] for name in output_fields}
+    # Cursor keys are selected alongside the requested columns
+    columns = ['id', 'fin_year', 'month_index'] + [
+        lookup for lookup in dict.fromkeys(lookups.values()) if lookup not in ('id', 'fin_year')
+    ]
+    rows = list(queryset.values(*columns)[:limit + 1 if paginated else limit])
+
+    next_cursor = None
+    if paginated and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+    # Dates are rendered by the serializer's own fields, as in the full payload
+    converters = {name: converter for name, _, converter in mgnrega_data_values.columns if converter is not None}
+    results = []
+    for row in rows:
+        result = {name: row[lookup] for name, lookup in lookups.items()}
+        for name in converters.keys() & result.keys():
+            if result[name] is not None:
+                result[name] = converters[name](result[name])
+        results.append(result)
+    return results, next_cursor, paginated
+
+def performance_series(district, params) -> dict:
+    """
+    A district's metrics in columnar form for charting.
+
+    Returns one month axis, oldest first in financial-year order, and a list
+    per metric aligned with it. Built from a single values_list query over
+    just the requested columns. Supports metrics (comma separated, defaults
+    to the charted ones) and the same from/to parameters as performance_rows.
+    """
+    metrics = parse_metrics(params.get('metrics'))
+    queryset = filter_period(with_period(MGNREGAData.objects.filter(district=district)), params)
+    rows = queryset.order_by('fin_year', 'month_index', 'id').values_list('fin_year', 'month', *metrics)
+
+    fin_years, months = [], []
+    columns = [[] for _ in metrics]
+    for fin_year, month, *values in rows:
+        fin_years.append(fin_year)
+        months.append(month)
+        for column, value in zip(columns, values):
+            column.append(value)
+    return {
+        'district_name': district.district_name,
+        'labels': [f"{month} {fin_year}" for fin_year, month in zip(fin_years, months)],
+        'fin_year': fin_years,
+        'month': months,
+        'series': dict(zip(metrics, columns)),
+    }
@@ -0,0 +1,130 @@
+from bisect import bisect_left, bisect_right
+from statistics import median
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from django.db.models import Count, Max, Q
+
+from .models import MGNREGAData, StateMonthRollup, StateRanking
+from .queries import SERIES_METRICS, with_period
+
+Slice = Tuple[str, str, str]
+
+def slice_rows(state_code: str, fin_year: str, month: str):
+    return MGNREGAData.objects.filter(district__state_code=state_code, fin_year=fin_year, month=month)
+
+def slice_version(state_code: str, fin_year: str, month: str) -> dict:
+    return slice_rows(state_code, fin_year, month).aggregate(rows=Count('id'), latest_update=Max('last_updated'))
+
+def rank_column(values: Sequence[Optional[float]]) -> dict:
+    """
+    Rank one metric across a month slice, highest value first.
+
+    Tied values share the best rank. The percentile is the share of the other
+    districts with a strictly lower value (0 for the lowest, 100 for the
+    highest). Districts without a value get neither.
+    """
+    present = sorted(value for value in values if value is not None)
+    count = len(present)
+    ranks: List[Optional[int]] = []
+    percentiles: List[Optional[float]] = []
+    for value in values:
+        if value is None:
+            ranks.append(None)
+            percentiles.append(None)
+            continue
+        below = bisect_left(present, value)
+        above = count - bisect_right(present, value)
+        ranks.append(above + 1)
+        percentiles.append(round(100 * below / (count - 1), 2) if count > 1 else 100.0)
+    return {
+        'count': count,
+        'median': median(present) if present else None,
+        'values': list(values),
+        'rank': ranks,
+        'percentile': percentiles,
+    }
+
+def compute_slice(state_code: str, fin_year: str, month: str) -> dict:
+    """
+    Rankings of every metric for every district of a state in one month.
+
+    The whole slice is read with a single query and each metric column is
+    ranked with one sort, rather than querying per district.
+    """
+    rows = list(
+        slice_rows(state_code, fin_year, month)
+        .order_by('district__district_name', 'district_id')
+        .values_list('district__district_code', 'district__district_name', *SERIES_METRICS)
+    )
+    columns = list(zip(*rows)) if rows else [()] * (len(SERIES_METRICS) + 2)
+    return {
+        'district_code': list(columns[0]),
+        'district_name': list(columns[1]),
+        'metrics': {
+            metric: rank_column(column) for metric, column in zip(SERIES_METRICS, columns[2:])
+        },
+    }
+
+def get_slice(state_code: str, fin_year: str, month: str) -> dict:
+    """
+    Cached rankings of a month slice, computed on a miss.
+
+    The computed table is only stored if the slice did not change while it
+    was being read, the same way district payloads are built.
+    """
+    cached = StateRanking.objects.filter(state_code=state_code, fin_year=fin_year, month=month).first()
+    if cached is not None:
+        return cached.table
+
+    version = slice_version(state_code, fin_year, month)
+    table = compute_slice(state_code, fin_year, month)
+    if version['rows'] and slice_version(state_code, fin_year, month) == version:
+        StateRanking.objects.update_or_create(
+            state_code=state_code, fin_year=fin_year, month=month, defaults={'table': table}
+        )
+    return table
+
+def latest_period(state_code: str) -> Optional[Tuple[str, str]]:
+    """
+    The most recent (fin_year, month) with data for a state, from its
+    state-month rollups rather than the data rows
+    """
+    row = (
+        with_period(StateMonthRollup.objects.filter(state_code=state_code, rows__gt=0))
+        .order_by('-fin_year', '-month_index')
+        .values_list('fin_year', 'month')
+        .first()
+    )
+    return tuple(row) if row else None
+
+def invalidate_rankings(slices: Iterable[Slice]):
+    """
+    Drop the cached rankings of month slices whose values have changed
+    """
+    condition = Q()
+    for state_code, fin_year, month in set(slices):
+        condition |= Q(state_code=state_code, fin_year=fin_year, month=month)
+    if condition:
+        StateRanking.objects.filter(condition).delete()
+
+def district_rankings(table: dict, metric: str) -> List[dict]:
+    """
+    One entry per district for a metric, best rank first
+    """
+    column = table['metrics'][metric]
+    entries = [
+        {
+            'district_code': code,
+            'district_name': name,
+            'value': value,
+            'rank': rank,
+            'percentile': percentile,
+        }
+        for code, name, value, rank, percentile in zip(
+            table['district_code'], table['district_name'],
+            column['values'], column['rank'], column['percentile'],
+        )
+    ]
+    # Districts without a value go last
+    entries.sort(key=lambda entry: (entry['rank'] is None, entry['rank'] or 0, entry['district_name']))
+    return entries
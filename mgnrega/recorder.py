@@ -0,0 +1,111 @@
+"""
+Ingest run history.
+
+Every sync from the API and every load of the local file is recorded as an
+IngestRun: the scopes it covered, when it started and finished, the time
+spent fetching (HTTP), parsing and writing to the database, the pages read
+and the rows inserted, updated and skipped as unchanged. Records and scopes
+that fail are listed on the run while the rest of it carries on. The admin
+and /api/ingest-runs/ show the history so throughput regressions stand out.
+"""
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional, Sequence
+
+from django.utils import timezone
+
+from .ingest import IngestResult
+from .models import IngestRun
+
+# Errors stored per run; the rest are only counted
+MAX_STORED_ERRORS = 100
+
+PHASES = ('http', 'parse', 'db')
+
+class IngestRecorder:
+    """
+    Collects timings, counts and errors of one ingest run into an IngestRun.
+
+    Use it as a context manager around the run: the IngestRun row is saved
+    as running on entry and completed on exit, failed if an exception
+    escapes. phase() may be used from several threads at once.
+    """
+
+    def __init__(self, scopes: Sequence[Dict[str, str]] = (), source: str = IngestRun.API):
+        self.run = IngestRun(scopes=list(scopes), source=source)
+        self.timings = {name: 0.0 for name in PHASES}
+        self.errors: List[dict] = []
+        self.error_count = 0
+        self.pages = 0
+        self.ingest = IngestResult()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.run.started_at = timezone.now()
+        self.run.save()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.finish(error=exc)
+        return False
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.timings[name] += elapsed
+
+    def add_error(self, item, error):
+        """
+        Record a record, page or scope that failed while the run carried on
+        """
+        with self._lock:
+            self.error_count += 1
+            if len(self.errors) < MAX_STORED_ERRORS:
+                self.errors.append({'item': item, 'error': str(error)})
+
+    def add_page(self, ingest: IngestResult):
+        """
+        Count a fetched page (or batch of a file) and the outcome of ingesting it
+        """
+        with self._lock:
+            self.pages += 1
+            self.ingest += IngestResult(
+                inserted=ingest.inserted, updated=ingest.updated, unchanged=ingest.unchanged,
+            )
+        for error in ingest.errors:
+            self.add_error(error['item'], error['error'])
+
+    def finish(self, error: Optional[BaseException] = None):
+        run = self.run
+        run.finished_at = timezone.now()
+        run.http_seconds = self.timings['http']
+        run.parse_seconds = self.timings['parse']
+        run.db_seconds = self.timings['db']
+        run.pages = self.pages
+        run.rows_inserted = self.ingest.inserted
+        run.rows_updated = self.ingest.updated
+        run.rows_skipped = self.ingest.unchanged
+        run.errors = self.errors
+        run.error_count = self.error_count
+        if error is not None:
+            written = self.ingest.total > 0
+            run.status = IngestRun.PARTIAL if written else IngestRun.FAILED
+            run.message = str(error)
+        elif self.error_count:
+            run.status = IngestRun.PARTIAL
+        else:
+            run.status = IngestRun.SUCCEEDED
+        run.save()
+        return run
+
+def record_phase(recorder: Optional[IngestRecorder], name: str):
+    """
+    recorder.phase(name), or a no-op without a recorder
+    """
+    return recorder.phase(name) if recorder is not None else nullcontext()
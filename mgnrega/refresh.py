@@ -0,0 +1,114 @@
+import logging
+import queue
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Hashable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FRESHNESS_WINDOW = 24 * 60 * 60
+DEFAULT_RETRY_INTERVAL = 15 * 60
+
+def get_freshness_window() -> timedelta:
+    """
+    How old stored data may get before a background refresh is queued
+    """
+    return timedelta(seconds=getattr(settings, 'MGNREGA_FRESHNESS_WINDOW', DEFAULT_FRESHNESS_WINDOW))
+
+def get_retry_interval() -> timedelta:
+    """
+    How long to wait after refreshing a district before trying it again
+    """
+    return timedelta(seconds=getattr(settings, 'MGNREGA_REFRESH_RETRY_INTERVAL', DEFAULT_RETRY_INTERVAL))
+
+class RefreshQueue:
+    """
+    In-process queue that runs refreshes on a background worker thread.
+
+    Each key is queued at most once at a time, so repeated requests for the
+    same stale district while a refresh is waiting do not pile up work.
+    With a retry_interval, a key is not queued again until that long after
+    its last refresh finished. A refresh that failed, or returned nothing
+    new, leaves the data stale; without the wait every request would call
+    the API again.
+    """
+
+    def __init__(self, handler: Callable[[Hashable], object], retry_interval: Optional[timedelta] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.handler = handler
+        self.retry_interval = retry_interval
+        self.clock = clock
+        self._queue = queue.Queue()
+        self._pending = set()
+        # Key -> clock() when its last refresh finished
+        self._attempted: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.queued = 0
+        self.deduplicated = 0
+        self.throttled = 0
+
+    def enqueue(self, key: Hashable) -> bool:
+        """
+        Queue a refresh for key; returns False if one is already pending
+        """
+        with self._lock:
+            if key in self._pending:
+                self.deduplicated += 1
+                return False
+            attempted = self._attempted.get(key)
+            if (self.retry_interval is not None and attempted is not None
+                    and self.clock() - attempted < self.retry_interval.total_seconds()):
+                self.throttled += 1
+                return False
+            self._pending.add(key)
+            self.queued += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='mgnrega-refresh', daemon=True)
+                self._thread.start()
+        self._queue.put(key)
+        return True
+
+    def is_pending(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._pending
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'queued': self.queued,
+                'deduplicated': self.deduplicated,
+                'throttled': self.throttled,
+                'pending': len(self._pending),
+            }
+
+    def clear_attempts(self):
+        """
+        Forget when keys were last refreshed, so any may be queued again
+        """
+        with self._lock:
+            self._attempted.clear()
+
+    def join(self):
+        """
+        Block until every queued refresh has finished
+        """
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            try:
+                self.handler(key)
+            except Exception:
+                logger.exception("Background refresh for %s failed", key)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+                    self._attempted[key] = self.clock()
+                close_old_connections()
+                self._queue.task_done()
@@ -0,0 +1,211 @@
+import math
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import DistrictYearRollup, MGNREGAData, StateMonthRollup
+from .queries import with_period
+
+# Metrics summed (and averaged) in the rollup tables
+ROLLUP_METRICS = (
+    'total_exp',
+    'wages',
+    'material_and_skilled_wages',
+    'total_adm_expenditure',
+    'women_persondays',
+    'persondays_central_liability',
+    'sc_persondays',
+    'st_persondays',
+    'total_households_worked',
+    'total_individuals_worked',
+    'total_hhs_completed_100_days',
+)
+
+class _Delta:
+    def __init__(self):
+        self.rows = 0
+        self.sums = defaultdict(int)
+        self.counts = defaultdict(int)
+
+class RollupDelta:
+    """
+    Changes to the rollup tables accumulated while ingesting.
+
+    Every inserted or changed row is recorded with its previous metric values
+    (None for a new row); apply() then adjusts the affected rollup rows by the
+    difference in a fixed number of queries.
+    """
+
+    def __init__(self):
+        self.state_months: Dict[tuple, _Delta] = defaultdict(_Delta)
+        self.district_years: Dict[tuple, _Delta] = defaultdict(_Delta)
+
+    def add(self, district, fin_year: str, month: str, previous: Optional[dict], row: MGNREGAData):
+        deltas = (
+            self.state_months[(district.state_code, fin_year, month)],
+            self.district_years[(district.pk, fin_year)],
+        )
+        for delta in deltas:
+            if previous is None:
+                delta.rows += 1
+            for name in ROLLUP_METRICS:
+                old = previous.get(name) if previous else None
+                new = getattr(row, name)
+                if old == new:
+                    continue
+                delta.sums[name] += (new or 0) - (old or 0)
+                delta.counts[name] += (new is not None) - (old is not None)
+
+    def apply(self):
+        """
+        Fold the accumulated deltas into the rollup tables
+        """
+        apply_deltas(
+            StateMonthRollup,
+            self.state_months,
+            StateMonthRollup.objects.filter(
+                state_code__in={state_code for state_code, _, _ in self.state_months},
+                fin_year__in={fin_year for _, fin_year, _ in self.state_months},
+                month__in={month for _, _, month in self.state_months},
+            ),
+            lambda rollup: (rollup.state_code, rollup.fin_year, rollup.month),
+            lambda key: {'state_code': key[0], 'fin_year': key[1], 'month': key[2]},
+        )
+        apply_deltas(
+            DistrictYearRollup,
+            self.district_years,
+            DistrictYearRollup.objects.filter(
+                district_id__in={district_id for district_id, _ in self.district_years},
+                fin_year__in={fin_year for _, fin_year in self.district_years},
+            ),
+            lambda rollup: (rollup.district_id, rollup.fin_year),
+            lambda key: {'district_id': key[0], 'fin_year': key[1]},
+        )
+
+def apply_deltas(model, deltas: Dict[Hashable, _Delta], queryset, key_of, fields_of):
+    if not deltas:
+        return
+    existing = {key_of(rollup): rollup for rollup in queryset.select_for_update()}
+    to_create, to_update = [], []
+    for key, delta in deltas.items():
+        rollup = existing.get(key)
+        if rollup is None:
+            rollup = model(**fields_of(key))
+            to_create.append(rollup)
+        else:
+            to_update.append(rollup)
+        rollup.rows += delta.rows
+        for name, value in delta.sums.items():
+            rollup.sums[name] = rollup.sums.get(name, 0) + value
+        for name, value in delta.counts.items():
+            rollup.counts[name] = rollup.counts.get(name, 0) + value
+    if to_create:
+        model.objects.bulk_create(to_create)
+    if to_update:
+        model.objects.bulk_update(to_update, ['rows', 'sums', 'counts'])
+
+def rollup_values(rollup) -> dict:
+    """
+    The rows, sums and means of a rollup for every rollup metric
+    """
+    means = rollup.means()
+    return {
+        'rows': rollup.rows,
+        'sums': {name: rollup.sums.get(name, 0) for name in ROLLUP_METRICS},
+        'means': {name: means.get(name) for name in ROLLUP_METRICS},
+    }
+
+def state_month_rollups(state_code: str) -> List[dict]:
+    """
+    A state's totals for every month with data, oldest first
+    """
+    rollups = with_period(StateMonthRollup.objects.filter(state_code=state_code, rows__gt=0))
+    return [
+        {'fin_year': rollup.fin_year, 'month': rollup.month, **rollup_values(rollup)}
+        for rollup in rollups.order_by('fin_year', 'month_index')
+    ]
+
+def district_year_rollups(district) -> List[dict]:
+    """
+    A district's totals for every financial year with data, oldest first
+    """
+    rollups = DistrictYearRollup.objects.filter(district=district, rows__gt=0).order_by('fin_year')
+    return [{'fin_year': rollup.fin_year, **rollup_values(rollup)} for rollup in rollups]
+
+def aggregate_rollups(group_by) -> Dict[tuple, dict]:
+    """
+    Rollup values computed from MGNREGAData, keyed by the group_by columns
+    """
+    annotations = {'rows': Count('id')}
+    for name in ROLLUP_METRICS:
+        annotations[f'{name}__sum'] = Sum(name)
+        annotations[f'{name}__count'] = Count(name)
+
+    rollups = {}
+    for values in MGNREGAData.objects.values(*group_by).annotate(**annotations).order_by():
+        rollups[tuple(values[column] for column in group_by)] = {
+            'rows': values['rows'],
+            'sums': {name: values[f'{name}__sum'] or 0 for name in ROLLUP_METRICS},
+            'counts': {name: values[f'{name}__count'] for name in ROLLUP_METRICS},
+        }
+    return rollups
+
+def expected_rollups():
+    """
+    The rollup tables as they should be, as (state-month, district-year) dicts
+    """
+    return (
+        aggregate_rollups(('district__state_code', 'fin_year', 'month')),
+        aggregate_rollups(('district_id', 'fin_year')),
+    )
+
+def rebuild_rollups() -> Dict[str, int]:
+    """
+    Recompute both rollup tables from scratch
+    """
+    state_months, district_years = expected_rollups()
+    with transaction.atomic():
+        StateMonthRollup.objects.all().delete()
+        DistrictYearRollup.objects.all().delete()
+        StateMonthRollup.objects.bulk_create([
+            StateMonthRollup(state_code=state_code, fin_year=fin_year, month=month, **values)
+            for (state_code, fin_year, month), values in state_months.items()
+        ])
+        DistrictYearRollup.objects.bulk_create([
+            DistrictYearRollup(district_id=district_id, fin_year=fin_year, **values)
+            for (district_id, fin_year), values in district_years.items()
+        ])
+    return {'state_months': len(state_months), 'district_years': len(district_years)}
+
+def compare(expected: dict, rollup) -> bool:
+    if rollup is None or rollup.rows != expected['rows']:
+        return False
+    for name in ROLLUP_METRICS:
+        if rollup.counts.get(name, 0) != expected['counts'][name]:
+            return False
+        if not math.isclose(rollup.sums.get(name, 0), expected['sums'][name], rel_tol=1e-9, abs_tol=1e-6):
+            return False
+    return True
+
+def verify_rollups() -> List[str]:
+    """
+    Compare the stored rollups with freshly computed ones; returns the
+    mismatches (empty when the tables are correct)
+    """
+    state_months, district_years = expected_rollups()
+    problems = []
+    for label, model, expected, key_of in (
+        ('state-month', StateMonthRollup, state_months, lambda r: (r.state_code, r.fin_year, r.month)),
+        ('district-year', DistrictYearRollup, district_years, lambda r: (r.district_id, r.fin_year)),
+    ):
+        stored = {key_of(rollup): rollup for rollup in model.objects.all()}
+        for key, values in expected.items():
+            if not compare(values, stored.pop(key, None)):
+                problems.append(f"{label} {key} does not match the data")
+        for key, rollup in stored.items():
+            # Rows whose data has all been removed may remain as empty rollups
+            if rollup.rows:
+                problems.append(f"{label} {key} has no data")
+    return problems
@@ -1,10 +1,13 @@
+from functools import cached_property
+from typing import Callable, List, Optional, Tuple
+
 from rest_framework import serializers
 from .models import District, MGNREGAData
 
 class DistrictSerializer(serializers.ModelSerializer):
     class Meta:
         model = District
-        fields = '__all__'
+        exclude = ['district_name_normalized']
 
 class MGNREGADataSerializer(serializers.ModelSerializer):
     district_name = serializers.CharField(source='district.district_name', read_only=True)
@@ -12,4 +15,62 @@ class MGNREGADataSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = MGNREGAData
-        fields = '__all__'
\ No newline at end of file
+        # Bookkeeping for ingest; leaving them out keeps payloads stable across no-op refreshes
+        exclude = ['content_hash', 'last_verified']
+
+# Serializer fields whose representation differs from the value the database returns
+CONVERTED_FIELDS = (serializers.DateTimeField, serializers.DateField, serializers.TimeField, serializers.DecimalField)
+
+class ValuesSerializer:
+    """
+    Read-only fast path producing the same data as a ModelSerializer.
+
+    Rows are read with queryset.values(), with relations followed by
+    source='relation.field' joined in the same query, and turned into plain
+    dicts with the serializer's keys in the same order. Only fields whose
+    representation differs from the database value (dates, decimals) go
+    through their DRF field; everything else is copied as is. Supports
+    model fields, primary key relations and dotted sources.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    @cached_property
+    def columns(self) -> List[Tuple[str, str, Optional[Callable]]]:
+        """
+        (output key, values() lookup, converter) for each serializer field
+        """
+        model = self.serializer_class.Meta.model
+        columns = []
+        for name, field in self.serializer_class().fields.items():
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                lookup = model._meta.get_field(field.source).attname
+            else:
+                lookup = field.source.replace('.', '__')
+            converter = field.to_representation if isinstance(field, CONVERTED_FIELDS) else None
+            columns.append((name, lookup, converter))
+        return columns
+
+    @cached_property
+    def lookups(self) -> List[str]:
+        return list(dict.fromkeys(lookup for _, lookup, _ in self.columns))
+
+    def row(self, values: dict) -> dict:
+        row = {}
+        for name, lookup, converter in self.columns:
+            value = values[lookup]
+            row[name] = converter(value) if converter is not None and value is not None else value
+        return row
+
+    def data(self, queryset) -> List[dict]:
+        return [self.row(values) for values in queryset.values(*self.lookups).iterator(chunk_size=2000)]
+
+    async def adata(self, queryset) -> List[dict]:
+        """
+        data() for async views, reading the rows with the async ORM
+        """
+        return [self.row(values) async for values in queryset.values(*self.lookups)]
+
+district_values = ValuesSerializer(DistrictSerializer)
+mgnrega_data_values = ValuesSerializer(MGNREGADataSerializer)
@@ -0,0 +1,106 @@
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import RefreshLease
+
+DEFAULT_LEASE_SECONDS = 5 * 60
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time.
+
+    Within a process, callers that arrive while a call for the same key is
+    running share its result instead of starting their own. Across processes
+    a RefreshLease row acts as the lock: if another process holds an unexpired
+    lease for the key, the call is skipped and None is returned. Leases expire
+    after MGNREGA_REFRESH_LEASE seconds so a crashed worker cannot block a key
+    forever.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced_local = 0
+        self.coalesced_remote = 0
+
+    def run(self, key: str, func: Callable[..., Any], *args, wait: bool = True, **kwargs) -> Any:
+        """
+        Call func(*args, **kwargs) unless a call for key is already in flight
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced_local += 1
+
+        if not leader:
+            if wait:
+                call.done.wait()
+            return call.result
+
+        try:
+            lease_key = f"{self.namespace}:{key}"
+            owner = self.lease_owner()
+            if not self.acquire_lease(lease_key, owner):
+                with self._lock:
+                    self.coalesced_remote += 1
+                return None
+            try:
+                with self._lock:
+                    self.executed += 1
+                call.result = func(*args, **kwargs)
+            finally:
+                self.release_lease(lease_key, owner)
+            return call.result
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced_local + self.coalesced_remote,
+                'coalesced_local': self.coalesced_local,
+                'coalesced_remote': self.coalesced_remote,
+                'in_flight': len(self._calls),
+            }
+
+    @staticmethod
+    def lease_owner() -> str:
+        return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex[:8]}"
+
+    @staticmethod
+    def acquire_lease(key: str, owner: str) -> bool:
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=getattr(settings, 'MGNREGA_REFRESH_LEASE', DEFAULT_LEASE_SECONDS))
+        try:
+            with transaction.atomic():
+                RefreshLease.objects.create(key=key, owner=owner, expires_at=expires_at)
+            return True
+        except IntegrityError:
+            # Take over the lease only if its holder let it expire
+            taken = RefreshLease.objects.filter(key=key, expires_at__lt=now).update(owner=owner, expires_at=expires_at)
+            return taken == 1
+
+    @staticmethod
+    def release_lease(key: str, owner: str):
+        RefreshLease.objects.filter(key=key, owner=owner).delete()
@@ -0,0 +1,150 @@
+"""
+Compact snapshots of the District and MGNREGAData tables.
+
+A snapshot is gzip-compressed JSON holding each table column by column
+rather than row by row, so repeated values such as fin_year and month
+compress to almost nothing:
+
+    {"format": "mgnrega-snapshot", "version": 1, "created": "...",
+     "tables": {"district": {"rows": N, "columns": {"id": [...], ...}},
+                "mgnrega_data": {...}}}
+
+Primary keys are kept, so a snapshot restores the exact tables.
+"""
+import gzip
+import json
+from typing import BinaryIO, Dict
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import read_cache
+from .models import District, MGNREGAData, StateRanking
+from .rollups import rebuild_rollups
+
+SNAPSHOT_FORMAT = 'mgnrega-snapshot'
+SNAPSHOT_VERSION = 1
+
+# Snapshot table name -> model
+TABLES = {
+    'district': District,
+    'mgnrega_data': MGNREGAData,
+}
+
+class SnapshotError(Exception):
+    """
+    Raised for unreadable or incompatible snapshots
+    """
+
+def snapshot_columns(model):
+    """
+    The stored columns of a model, by attname (generated columns are left out)
+    """
+    return [field for field in model._meta.concrete_fields if not field.generated]
+
+def export_snapshot(file: BinaryIO) -> Dict[str, int]:
+    """
+    Write a snapshot of both tables to a binary file
+    """
+    tables = {}
+    for name, model in TABLES.items():
+        fields = snapshot_columns(model)
+        rows = list(model.objects.order_by('pk').values_list(*[field.attname for field in fields]))
+        columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in fields]
+        for field, column in zip(fields, columns):
+            if field.get_internal_type() == 'DateTimeField':
+                column[:] = [value.isoformat() if value is not None else None for value in column]
+        tables[name] = {
+            'rows': len(rows),
+            'columns': {field.attname: column for field, column in zip(fields, columns)},
+        }
+
+    document = {
+        'format': SNAPSHOT_FORMAT,
+        'version': SNAPSHOT_VERSION,
+        'created': timezone.now().isoformat(),
+        'tables': tables,
+    }
+    with gzip.GzipFile(fileobj=file, mode='wb', mtime=0) as compressed:
+        compressed.write(json.dumps(document, separators=(',', ':')).encode('utf-8'))
+    return {name: table['rows'] for name, table in tables.items()}
+
+def read_snapshot(file: BinaryIO) -> dict:
+    try:
+        with gzip.GzipFile(fileobj=file, mode='rb') as compressed:
+            document = json.loads(compressed.read())
+    except (OSError, EOFError, ValueError) as e:
+        raise SnapshotError(f"Not a readable snapshot: {e}")
+    if not isinstance(document, dict) or document.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError("Not an MGNREGA snapshot")
+    if document.get('version') != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {document.get('version')} (expected {SNAPSHOT_VERSION})")
+    return document
+
+def table_rows(model, table: dict):
+    """
+    The fields present in a snapshot table and its rows as database-ready
+    tuples. Columns missing from the snapshot (added to the model later)
+    are left to their database defaults.
+    """
+    columns = table['columns']
+    fields = [field for field in snapshot_columns(model) if field.attname in columns]
+    data = []
+    for field in fields:
+        column = columns[field.attname]
+        if len(column) != table['rows']:
+            raise SnapshotError(f"Column {model.__name__}.{field.attname} has the wrong length")
+        if field.get_internal_type() == 'DateTimeField':
+            adapt = connection.ops.adapt_datetimefield_value
+            column = [adapt(parse_datetime(value)) if value is not None else None for value in column]
+        data.append(column)
+    return fields, list(zip(*data))
+
+def insert_rows(model, fields, rows, batch_size: int):
+    """
+    Insert prepared rows with executemany, bypassing per-object model overhead
+    """
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[start:start + batch_size])
+
+def import_snapshot(file: BinaryIO, replace: bool = False, batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Load a snapshot with bulk inserts in a single transaction.
+
+    The tables must be empty unless replace=True, in which case the existing
+    districts and everything derived from them are deleted first. Rollups
+    are rebuilt afterwards; district payloads and rankings are rebuilt on
+    demand.
+    """
+    document = read_snapshot(file)
+    tables = {name: table_rows(model, document['tables'][name]) for name, model in TABLES.items()
+              if name in document['tables']}
+
+    with transaction.atomic():
+        if District.objects.exists() or MGNREGAData.objects.exists():
+            if not replace:
+                raise SnapshotError("The database already holds MGNREGA data; import with replace to overwrite it")
+            District.objects.all().delete()
+            StateRanking.objects.all().delete()
+
+        for name, model in TABLES.items():
+            if name in tables:
+                insert_rows(model, *tables[name], batch_size=batch_size)
+
+        # Explicit primary keys leave sequences behind on backends that use them
+        with connection.cursor() as cursor:
+            for statement in connection.ops.sequence_reset_sql(no_style(), list(TABLES.values())):
+                cursor.execute(statement)
+
+        rebuild_rollups()
+    read_cache.invalidate()
+    return {name: len(tables[name][1]) if name in tables else 0 for name in TABLES}
@@ -0,0 +1,217 @@
+"""
+Static copies of the read API for a CDN or the web server.
+
+publish_static_api() writes the district list and every district's
+performance payload under MGNREGA_STATIC_API_ROOT with a content hash in
+each file name, next to gzip (and, when the Brotli package is installed,
+brotli) compressed copies:
+
+    districts.<hash>.json
+    performance/<district>.<hash>.json
+    manifest.json
+
+Hashed files never change, so they can be cached forever. manifest.json
+maps the district list and each lowercased district name to its current
+file; frontend builds made with REACT_APP_STATIC_API=true read it first and
+fall back to the live API for anything it does not list or cannot fetch.
+Files of the previous manifest are kept so clients holding it keep working;
+older ones are removed. The directory is kept out of STATIC_ROOT because
+WhiteNoise indexes that once at startup and would go on serving the
+manifest it saw then; static_api_file() serves it instead, or a CDN or web
+server can be pointed at it directly.
+"""
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils import timezone
+from django.utils._os import safe_join
+from django.utils.text import slugify
+from rest_framework.renderers import JSONRenderer
+from whitenoise.compress import Compressor
+
+from .models import District
+from .payloads import get_payload
+from .serializers import district_values
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+MANIFEST_VERSION = 1
+
+@dataclass
+class PublishResult:
+    root: str
+    written: int = 0
+    reused: int = 0
+    removed: int = 0
+    districts: int = 0
+
+    def __str__(self):
+        return (
+            f"{self.districts} districts published to {self.root} "
+            f"({self.written} files written, {self.reused} unchanged, {self.removed} removed)"
+        )
+
+def get_publish_root() -> Optional[str]:
+    root = getattr(settings, 'MGNREGA_STATIC_API_ROOT', None)
+    return str(root) if root else None
+
+def published_file(path: str, accept_encoding: str = '') -> Optional[Tuple[bytes, Optional[str]]]:
+    """
+    (content, content coding) of a published file, using the brotli or gzip
+    copy when the client accepts it; None if there is no such file
+    """
+    root = get_publish_root()
+    if not root or path.endswith(COMPRESSED_SUFFIXES):
+        return None
+    try:
+        full_path = safe_join(root, path)
+    except SuspiciousFileOperation:
+        return None
+    if not os.path.isfile(full_path):
+        return None
+    encoding = None
+    for coding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if path != MANIFEST_NAME and coding in accept_encoding and os.path.isfile(full_path + suffix):
+            encoding, full_path = coding, full_path + suffix
+            break
+    try:
+        with open(full_path, 'rb') as file:
+            return file.read(), encoding
+    except OSError:
+        # Pruned since the check
+        return None
+
+def hashed_name(name: str, content: bytes) -> str:
+    """
+    name with a content hash before its extension, like ManifestStaticFilesStorage
+    """
+    base, extension = os.path.splitext(name)
+    return f"{base}.{hashlib.md5(content).hexdigest()[:12]}{extension}"
+
+def read_manifest(root: str) -> dict:
+    try:
+        with open(os.path.join(root, MANIFEST_NAME), 'rb') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get('version') == MANIFEST_VERSION else {}
+
+def manifest_files(manifest: dict) -> Set[str]:
+    files = set(manifest.get('performance', {}).values())
+    if manifest.get('districts'):
+        files.add(manifest['districts'])
+    return files
+
+class Publisher:
+    def __init__(self, root: str, result: PublishResult):
+        self.root = root
+        self.result = result
+        self.compressor = Compressor(quiet=True)
+
+    def write(self, name: str, content: bytes) -> str:
+        """
+        Write content under a hashed name (unless it is already there) and
+        compress it; returns the path relative to the publish root
+        """
+        relative = hashed_name(name, content)
+        path = os.path.join(self.root, relative)
+        if os.path.exists(path):
+            self.result.reused += 1
+            return relative
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as file:
+            file.write(content)
+        os.replace(temporary, path)
+        self.compressor.compress(path)
+        self.result.written += 1
+        return relative
+
+    def write_manifest(self, manifest: dict):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, MANIFEST_NAME)
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=1, sort_keys=True)
+        os.replace(temporary, path)
+
+    def prune(self, keep: Set[str]):
+        """
+        Remove published data files (and compressed copies) not in keep
+        """
+        for folder, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(folder, name)
+                relative = os.path.relpath(path, self.root).replace(os.sep, '/')
+                original = relative.removesuffix('.gz').removesuffix('.br')
+                if relative == MANIFEST_NAME or original in keep:
+                    continue
+                os.remove(path)
+                if original == relative:
+                    self.result.removed += 1
+
+def publish_static_api(root: Optional[str] = None, district_ids: Optional[Iterable[int]] = None) -> PublishResult:
+    """
+    Publish the district list and performance payloads as static files.
+
+    With district_ids only those districts' payloads are rewritten and the
+    others are taken from the current manifest; without, every district is.
+    """
+    root = root or get_publish_root()
+    if not root:
+        raise ValueError("MGNREGA_STATIC_API_ROOT is not set")
+    result = PublishResult(root=root)
+    publisher = Publisher(root, result)
+    previous = read_manifest(root)
+
+    incremental = district_ids is not None and bool(previous)
+    changed = set(district_ids or ())
+    performance: Dict[str, str] = dict(previous.get('performance', {})) if incremental else {}
+
+    names = set()
+    for district in District.objects.select_related('payload').order_by('id'):
+        key = district.district_name_normalized
+        if key in names:
+            # Two districts share a name; like the API, serve the first one
+            continue
+        names.add(key)
+        if incremental and key in performance and district.pk not in changed:
+            continue
+        body = bytes(get_payload(district).body)
+        performance[key] = publisher.write(f"performance/{slugify(key) or district.pk}.json", body)
+    performance = {key: path for key, path in performance.items() if key in names}
+    result.districts = len(performance)
+
+    catalog = JSONRenderer().render(district_values.data(District.objects.all()))
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'published': timezone.now().isoformat(),
+        'districts': publisher.write('districts.json', catalog),
+        'performance': performance,
+    }
+    publisher.write_manifest(manifest)
+    publisher.prune(manifest_files(manifest) | manifest_files(previous))
+    return result
+
+def publish_after_sync(district_ids: Iterable[int]):
+    """
+    Republish the changed districts when MGNREGA_STATIC_API is on. Failures
+    are reported but do not fail the sync; the dynamic API still serves.
+    """
+    if not getattr(settings, 'MGNREGA_STATIC_API', False) or not get_publish_root():
+        return None
+    try:
+        result = publish_static_api(district_ids=district_ids)
+    except Exception:
+        logger.exception("Error publishing static API")
+        return None
+    logger.info("Published static API: %s", result)
+    return result
@@ -0,0 +1,281 @@
+import itertools
+import os
+import re
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from .fetch import FetchError, FetchResult, ScopeFetch, fetch_scopes
+from .ingest import IngestResult
+from .models import District, SyncJob
+from .payloads import rebuild_payloads
+from .recorder import IngestRecorder, record_phase
+from .static_api import publish_after_sync
+from .watermarks import plan_scopes, record_sync
+
+# Queued or running jobs whose worker has not reported them alive for this
+# long are treated as abandoned
+DEFAULT_JOB_TIMEOUT = 10 * 60
+
+# How often a worker running a job reports its jobs alive
+HEARTBEAT_INTERVAL = 60
+
+# Identifies this worker process on the jobs it queues
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Upstream filter name for each scope option
+SCOPE_FILTERS = ('state_name', 'district_name', 'fin_year')
+
+FIN_YEAR = re.compile(r'^(\d{4})-(\d{4})$')
+
+class ScopeError(ValueError):
+    pass
+
+@dataclass
+class SyncProgress:
+    scope: Dict[str, str]
+    scope_index: int
+    scopes: int
+    fetch: FetchResult
+    rows: int
+    elapsed: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+@dataclass
+class SyncResult:
+    scopes: int = 0
+    pages: int = 0
+    rows: int = 0
+    elapsed: float = 0.0
+    dry_run: bool = False
+    ingest: IngestResult = field(default_factory=IngestResult)
+    # IngestRun recording the sync; None for dry runs
+    run_id: Optional[int] = None
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> dict:
+        return {
+            'scopes': self.scopes,
+            'pages': self.pages,
+            'rows': self.rows,
+            'inserted': self.ingest.inserted,
+            'updated': self.ingest.updated,
+            'unchanged': self.ingest.unchanged,
+            'rejected': len(self.ingest.errors),
+            'seconds': round(self.elapsed, 2),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'dry_run': self.dry_run,
+            'ingest_run': self.run_id,
+        }
+
+    def __str__(self):
+        written = 'dry run, nothing written' if self.dry_run else str(self.ingest)
+        return (
+            f"{self.rows} rows in {self.pages} pages from {self.scopes} scopes "
+            f"in {self.elapsed:.1f}s ({self.rows_per_second:,.0f} rows/sec; {written})"
+        )
+
+def build_scopes(state_names: Sequence[str] = (), district_names: Sequence[str] = (),
+                 fin_years: Sequence[str] = ()) -> List[Dict[str, str]]:
+    """
+    One upstream filter set per combination of the given states, districts
+    and financial years; a single unfiltered scope when none are given
+    """
+    options = [
+        [(name, value) for value in values]
+        for name, values in zip(SCOPE_FILTERS, (state_names, district_names, fin_years))
+        if values
+    ]
+    return [dict(combination) for combination in itertools.product(*options)]
+
+def clean_scope(values: Dict[str, str]) -> Dict[str, str]:
+    """
+    A sync scope from user input. States and districts must be ones already
+    stored and are returned in their stored spelling; fin_year must look
+    like 2024-2025. Raises ScopeError otherwise.
+    """
+    scope = {}
+    state_name = values.get('state_name')
+    if state_name:
+        scope['state_name'] = District.objects.filter(state_name__iexact=state_name).values_list(
+            'state_name', flat=True
+        ).first()
+        if scope['state_name'] is None:
+            raise ScopeError(f"Unknown state: {state_name}")
+    district_name = values.get('district_name')
+    if district_name:
+        districts = District.objects.filter(district_name_normalized=district_name.lower())
+        if 'state_name' in scope:
+            districts = districts.filter(state_name=scope['state_name'])
+        scope['district_name'] = districts.values_list('district_name', flat=True).first()
+        if scope['district_name'] is None:
+            raise ScopeError(f"Unknown district: {district_name}")
+    fin_year = values.get('fin_year')
+    if fin_year:
+        match = FIN_YEAR.match(fin_year)
+        if match is None or int(match[2]) != int(match[1]) + 1:
+            raise ScopeError(f"Invalid fin_year: {fin_year} (expected e.g. 2024-2025)")
+        scope['fin_year'] = fin_year
+    return scope
+
+def run_sync(scopes: Sequence[Dict[str, str]], workers=None, batch_size=None, page_size=None, dry_run=False,
+             resume=False, incremental=False,
+             progress: Optional[Callable[[SyncProgress], None]] = None) -> SyncResult:
+    """
+    Fetch and ingest every scope.
+
+    The pages of all scopes are downloaded by one pool of `workers` threads
+    while this thread writes them, so there is only ever one database
+    writer. With incremental=True scopes are narrowed to the recent
+    financial years unless a full re-verification is due (see
+    mgnrega.watermarks). The high-water marks of synced districts move as
+    each scope completes; payloads of districts whose data changed are
+    rebuilt at the end, and republished as static files when
+    MGNREGA_STATIC_API is on.
+
+    Unless dry_run is set the sync is recorded as an IngestRun. A scope
+    whose fetch fails is noted on the run and the remaining scopes still
+    sync; a FetchError naming the failed scopes is raised at the end.
+    """
+    if incremental:
+        scopes = [planned for scope in scopes for planned in plan_scopes(scope)]
+    if dry_run:
+        return sync_scopes(scopes, None, workers, batch_size, page_size, True, resume, progress)
+    with IngestRecorder(scopes) as recorder:
+        return sync_scopes(scopes, recorder, workers, batch_size, page_size, False, resume, progress)
+
+def sync_scopes(scopes, recorder: Optional[IngestRecorder], workers, batch_size, page_size, dry_run, resume,
+                progress: Optional[Callable[[SyncProgress], None]]) -> SyncResult:
+    result = SyncResult(dry_run=dry_run, run_id=recorder.run.pk if recorder is not None else None)
+    start = time.perf_counter()
+    scope_rows = [0] * len(scopes)
+
+    def page_progress(fetch: ScopeFetch):
+        scope_rows[fetch.index] = fetch.result.rows
+        if progress is not None:
+            progress(SyncProgress(
+                fetch.filters, fetch.index + 1, len(scopes), fetch.result, sum(scope_rows),
+                time.perf_counter() - start,
+            ))
+
+    def scope_finished(fetch: ScopeFetch):
+        if not dry_run:
+            # Only a sync across every financial year verifies the history
+            with record_phase(recorder, 'db'):
+                record_sync(fetch.result.ingest.district_ids, verified=not fetch.filters.get('fin_year'))
+
+    fetches = fetch_scopes(
+        scopes, page_size=page_size, workers=workers, resume=resume, batch_size=batch_size, write=not dry_run,
+        progress=page_progress, finished=scope_finished, recorder=recorder,
+    )
+    failed = [fetch for fetch in fetches if fetch.error is not None]
+    for fetch in fetches:
+        # Pages a failed scope did fetch are written and counted
+        result.pages += fetch.result.pages
+        result.rows += fetch.result.rows
+        result.ingest += fetch.result.ingest
+        if fetch.error is None:
+            result.scopes += 1
+        elif recorder is not None:
+            recorder.add_error({'scope': fetch.filters}, fetch.error)
+    if not dry_run:
+        with record_phase(recorder, 'db'):
+            rebuild_payloads(result.ingest.changed_district_ids)
+        publish_after_sync(result.ingest.changed_district_ids)
+    result.elapsed = time.perf_counter() - start
+    if failed:
+        first = failed[0]
+        if len(scopes) == 1:
+            raise first.error
+        raise FetchError(
+            f"{len(failed)} of {len(scopes)} scopes failed, first {first.filters or 'all'}: {first.error}"
+        )
+    return result
+
+def get_job_timeout() -> timedelta:
+    return timedelta(seconds=getattr(settings, 'MGNREGA_SYNC_JOB_TIMEOUT', DEFAULT_JOB_TIMEOUT))
+
+def heartbeat():
+    """
+    Report the jobs this worker has queued or is running as alive
+    """
+    SyncJob.objects.filter(owner=WORKER_ID, status__in=[SyncJob.QUEUED, SyncJob.RUNNING]).update(
+        heartbeat_at=timezone.now()
+    )
+
+def fail_abandoned_jobs() -> int:
+    """
+    Mark queued or running jobs of workers that stopped reporting (e.g.
+    because the process restarted) as failed; returns how many there were
+    """
+    now = timezone.now()
+    return SyncJob.objects.filter(
+        status__in=[SyncJob.QUEUED, SyncJob.RUNNING],
+        heartbeat_at__lt=now - get_job_timeout(),
+    ).exclude(owner=WORKER_ID).update(
+        status=SyncJob.FAILED, message="Abandoned: the worker holding this job stopped", finished_at=now,
+    )
+
+def queue_job(scope: Dict[str, str]) -> Tuple[SyncJob, bool]:
+    """
+    The active job for a scope, or a new queued one; returns (job, created)
+    """
+    fail_abandoned_jobs()
+    active = SyncJob.objects.filter(
+        scope=scope, status__in=[SyncJob.QUEUED, SyncJob.RUNNING],
+    ).order_by('-created_at').first()
+    if active is not None:
+        return active, False
+    return SyncJob.objects.create(scope=scope, owner=WORKER_ID, heartbeat_at=timezone.now()), True
+
+def run_job(job_id, fallback: Optional[Callable[[], IngestResult]] = None):
+    """
+    Run a queued job, recording its outcome. If a full (unscoped) API sync
+    fails and a fallback is given, the fallback's result is recorded instead.
+    While the sync runs, this worker's jobs are kept alive by heartbeats.
+    """
+    job = SyncJob.objects.get(pk=job_id)
+    if job.status != SyncJob.QUEUED:
+        # Already run, or given up on as abandoned
+        return job
+    job.status = SyncJob.RUNNING
+    job.started_at = job.heartbeat_at = timezone.now()
+    job.save(update_fields=['status', 'started_at', 'heartbeat_at'])
+    last_beat = time.monotonic()
+
+    def progress(update: SyncProgress):
+        nonlocal last_beat
+        if time.monotonic() - last_beat >= HEARTBEAT_INTERVAL:
+            heartbeat()
+            last_beat = time.monotonic()
+
+    try:
+        result = run_sync([job.scope], resume=not job.scope, incremental=True, progress=progress)
+        job.status = SyncJob.SUCCEEDED
+        job.message = f"Synced from live API: {result}"
+        job.result = result.summary()
+    except Exception as e:
+        job.message = f"API sync failed: {e}"
+        job.status = SyncJob.FAILED
+        if fallback is not None and not job.scope:
+            try:
+                ingest = fallback()
+                job.status = SyncJob.SUCCEEDED
+                job.message += f"; loaded local file instead: {ingest}"
+            except Exception as fallback_error:
+                job.message += f"; local file fallback failed: {fallback_error}"
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'message', 'result', 'finished_at'])
+    return job
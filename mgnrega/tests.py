@@ -1,7 +1,63 @@
-from django.test import TestCase
+from pathlib import Path
+import gzip
+import io
+import json
+import tempfile
+import unittest
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, modify_settings, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
+from . import geo, views
+from .benchmarks import bench_serialize
+from .cache import MISSING, LRUCache, TieredCache, read_cache
+from .metrics import Registry, requests_total, response_size, upstream_duration, upstream_responses
+from .client import CircuitOpenError, TokenBucket, UpstreamClient
+from .fetch import FetchError, fetch_all_pages
+from .serializers import DistrictSerializer, MGNREGADataSerializer, district_values, mgnrega_data_values
+from .ingest import DATA_FIELDS, ingest_records
+from .models import (
+    District, DistrictPayload, DistrictYearRollup, FetchCheckpoint, MGNREGAData, RefreshLease, StateMonthRollup,
+    IngestRun, StateRanking, SyncJob, SyncMark,
+)
+from .rollups import verify_rollups
+from .payloads import build_payload, rebuild_payloads
+from .parsing import ResponseReader, parse_response, record_from_fields
+from .singleflight import SingleFlight
+from .snapshot import SnapshotError, export_snapshot, import_snapshot
+from .static_api import publish_static_api
+from .sync import WORKER_ID, build_scopes, queue_job, run_job, run_sync
+from .watermarks import fin_year_of, plan_scopes, recent_fin_years, record_sync
+
+SERVER_RESPONSE = Path(__file__).resolve().parent.parent / 'Server response.txt'
+
+# The suite runs against a private in-memory cache, not the on-disk one in
+# settings, so nothing cached by an earlier run (or by the server) leaks in.
+# Syncs do not publish the static API unless a test turns it on with its own root
+test_settings = override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'mgnrega-tests'}},
+    MGNREGA_STATIC_API=False,
+)
+
+def setUpModule():
+    test_settings.enable()
+    read_cache.local.clear()
+    read_cache.shared.clear()
+
+def tearDownModule():
+    read_cache.local.clear()
+    test_settings.disable()
 
 class DistrictModelTest(TestCase):
     def test_district_model(self):
@@ -22,3 +78,1421 @@ class PerformanceAPITest(APITestCase):
     def test_get_district_performance(self):
         # This is a placeholder test since we're having issues with the linter
         self.assertEqual(1, 1)
+
+def make_record(**overrides):
+    record = {
+        'state_code': '17',
+        'state_name': 'MADHYA PRADESH',
+        'district_code': '1752',
+        'district_name': 'NIWARI',
+        'fin_year': '2024-2025',
+        'month': 'Dec',
+        'total_exp': 3884.1,
+        'total_households_worked': 17219,
+        'remarks': 'NA',
+    }
+    record.update(overrides)
+    return record
+
+class IngestRecordsTest(TestCase):
+    def test_inserts_new_rows_and_districts(self):
+        result = ingest_records([make_record(), make_record(month='Nov')])
+        self.assertEqual((result.inserted, result.updated, result.unchanged), (2, 0, 0))
+        self.assertEqual(District.objects.count(), 1)
+        self.assertEqual(MGNREGAData.objects.count(), 2)
+
+    def test_updates_changed_rows_and_counts_unchanged(self):
+        ingest_records([make_record(), make_record(month='Nov')])
+        result = ingest_records([make_record(total_exp=4000.0), make_record(month='Nov')])
+        self.assertEqual((result.inserted, result.updated, result.unchanged), (0, 1, 1))
+        self.assertEqual(MGNREGAData.objects.count(), 2)
+        self.assertEqual(MGNREGAData.objects.get(month='Dec').total_exp, 4000.0)
+
+    def test_duplicate_keys_keep_last_record(self):
+        result = ingest_records([make_record(total_exp=1.0), make_record(total_exp=2.0)])
+        self.assertEqual(result.inserted, 1)
+        self.assertEqual(MGNREGAData.objects.get().total_exp, 2.0)
+
+    def test_invalid_records_are_rejected_without_failing_the_batch(self):
+        result = ingest_records([make_record(), make_record(month=''), make_record(district_code='', month='Nov')])
+        self.assertEqual(result.inserted, 1)
+        self.assertEqual([error['error'] for error in result.errors], ['missing month', 'missing district_code'])
+        self.assertEqual(result.errors[0]['item']['district_name'], 'NIWARI')
+        self.assertIn('2 rejected', str(result))
+        self.assertEqual(MGNREGAData.objects.count(), 1)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        ingest_records([make_record(month=str(n)) for n in range(5)])
+        records = [make_record(month=str(n), total_exp=float(n)) for n in range(20)]
+        # savepoint, districts, existing hashes, changed rows, bulk insert, bulk update, payload and ranking
+        # invalidation, rollups (read, insert and update per table), release
+        with self.assertNumQueries(14):
+            result = ingest_records(records, batch_size=1000)
+        self.assertEqual((result.inserted, result.updated), (15, 5))
+
+    def test_unchanged_rows_are_only_marked_verified(self):
+        records = [dict(dict.fromkeys(DATA_FIELDS), **make_record(month=str(n))) for n in range(20)]
+        ingest_records(records)
+        MGNREGAData.objects.update(last_updated=timezone.now() - timedelta(days=2))
+        rebuild_payloads()
+        before = MGNREGAData.objects.order_by('id').values_list('last_updated', 'last_verified', 'content_hash')
+        before = list(before)
+
+        # savepoint, districts, existing hashes, bump last_verified on the rows and the payload, release
+        with self.assertNumQueries(6):
+            result = ingest_records(records)
+        self.assertEqual((result.unchanged, result.changed_district_ids), (20, set()))
+        after = list(MGNREGAData.objects.order_by('id').values_list('last_updated', 'last_verified', 'content_hash'))
+        self.assertEqual([row[0] for row in after], [row[0] for row in before])
+        self.assertEqual([row[2] for row in after], [row[2] for row in before])
+        self.assertTrue(all(new[1] > old[1] for new, old in zip(after, before)))
+        payload = DistrictPayload.objects.get()
+        self.assertEqual(payload.verified_at, after[0][1])
+
+    def test_partial_records_compare_merged_values(self):
+        ingest_records([make_record()])
+        row = MGNREGAData.objects.get()
+        result = ingest_records([make_record(total_exp=3884.1, wages=None)])
+        self.assertEqual(result.unchanged, 1)
+        self.assertEqual(MGNREGAData.objects.get().content_hash, row.content_hash)
+        result = ingest_records([make_record(wages=12)])
+        self.assertEqual(result.updated, 1)
+        self.assertNotEqual(MGNREGAData.objects.get().content_hash, row.content_hash)
+
+def make_page(total, months, district_code='1752'):
+    items = ''.join(
+        f"<item><fin_year>2024-2025</fin_year><month>{month}</month><state_code>17</state_code>"
+        f"<state_name>MADHYA PRADESH</state_name><district_code>{district_code}</district_code>"
+        f"<district_name>NIWARI</district_name><Total_Exp>1.5</Total_Exp></item>"
+        for month in months
+    )
+    return f"<result><total>{total}</total><records>{items}</records></result>".encode()
+
+class FetchAllPagesTest(TestCase):
+    def fake_pages(self, total, page_size, fail_offsets=()):
+        def fetch_page(params, offset, limit):
+            if offset in fail_offsets:
+                raise FetchError(f"failed at {offset}")
+            months = [str(n) for n in range(offset, min(offset + limit, total))]
+            return make_page(total, months)
+        return fetch_page
+
+    def test_fetches_every_page(self):
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=self.fake_pages(25, 10)) as fetch_page:
+            result = fetch_all_pages(page_size=10, workers=2)
+        self.assertEqual(result.total, 25)
+        self.assertEqual(result.pages, 3)
+        self.assertEqual(sorted(call.args[1] for call in fetch_page.call_args_list), [0, 10, 20])
+        self.assertEqual(MGNREGAData.objects.count(), 25)
+
+    def test_resumes_from_completed_pages(self):
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=self.fake_pages(30, 10, fail_offsets={20})):
+            with self.assertRaises(FetchError):
+                fetch_all_pages(page_size=10, workers=1, resume=True)
+        self.assertEqual(FetchCheckpoint.objects.get().completed_offsets, [0, 10])
+
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=self.fake_pages(30, 10)) as fetch_page:
+            result = fetch_all_pages(page_size=10, workers=1, resume=True)
+        self.assertEqual([call.args[1] for call in fetch_page.call_args_list], [20])
+        self.assertEqual((result.pages, result.skipped_pages), (1, 2))
+        self.assertEqual(MGNREGAData.objects.count(), 30)
+        self.assertFalse(FetchCheckpoint.objects.exists())
+
+class ResponseReaderTest(TestCase):
+    def test_reads_only_record_items(self):
+        reader = ResponseReader(str(SERVER_RESPONSE))
+        records = list(reader)
+        self.assertEqual(reader.total, 340006)
+        self.assertEqual(len(records), 10)
+        self.assertEqual(records[0]['district_name'], 'NIWARI')
+        self.assertEqual(records[0]['total_households_worked'], 17219)
+        self.assertEqual(records[0]['average_wage_rate'], 245.41163886348)
+
+    def test_missing_and_invalid_values(self):
+        content = b"<result><records><item><month>Dec</month><Total_Exp>n/a</Total_Exp></item></records></result>"
+        total, records = parse_response(content)
+        self.assertIsNone(total)
+        self.assertEqual(records[0]['month'], 'Dec')
+        self.assertEqual(records[0]['district_code'], '')
+        self.assertIsNone(records[0]['total_exp'])
+        self.assertIsNone(records[0]['wages'])
+
+class RecordFromFieldsTest(TestCase):
+    def test_json_values_are_coerced_by_model_field_type(self):
+        record = record_from_fields({
+            'district_code': 1752, 'Total_Exp': 12, 'Wages': '0', 'Total_Households_Worked': 0, 'Remarks': None,
+        })
+        self.assertEqual(record['district_code'], '1752')
+        self.assertEqual(record['total_exp'], 12.0)
+        self.assertEqual(record['wages'], 0.0)
+        self.assertEqual(record['total_households_worked'], 0)
+        self.assertEqual(record['remarks'], '')
+        self.assertIsNone(record['approved_labour_budget'])
+
+class StaleWhileRevalidateTest(APITestCase):
+    def setUp(self):
+        ingest_records([make_record()])
+        self.url = reverse('district_performance', args=['niwari'])
+        self.release = threading.Event()
+        patcher = mock.patch.object(views.refresh_queue, 'handler', side_effect=lambda name: self.release.wait(5))
+        self.handler = patcher.start()
+        self.addCleanup(patcher.stop)
+        views.refresh_queue.clear_attempts()
+        self.addCleanup(views.refresh_queue.clear_attempts)
+        self.addCleanup(views.refresh_queue.join)
+        self.addCleanup(self.release.set)
+
+    def test_fresh_data_is_served_without_refresh(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(response['X-Refresh-Pending'], 'false')
+        self.assertLess(int(response['X-Data-Age']), 60)
+        self.handler.assert_not_called()
+
+    def test_stale_data_is_served_and_refreshed_in_background(self):
+        two_days_ago = timezone.now() - timedelta(days=2)
+        MGNREGAData.objects.update(last_updated=two_days_ago, last_verified=two_days_ago)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(response['X-Refresh-Pending'], 'true')
+        self.assertGreaterEqual(int(response['X-Data-Age']), 2 * 24 * 60 * 60)
+
+        # A second request while the refresh is running does not queue another
+        self.client.get(self.url)
+        self.release.set()
+        views.refresh_queue.join()
+        self.handler.assert_called_once_with('NIWARI')
+
+    def test_refresh_is_not_retried_within_retry_interval(self):
+        two_days_ago = timezone.now() - timedelta(days=2)
+        MGNREGAData.objects.update(last_updated=two_days_ago, last_verified=two_days_ago)
+        self.release.set()
+        self.client.get(self.url)
+        views.refresh_queue.join()
+
+        # The refresh left the data stale (as a failed one would); no new call yet
+        throttled = views.refresh_queue.stats()['throttled']
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Refresh-Pending'], 'false')
+        self.assertEqual(views.refresh_queue.stats()['throttled'], throttled + 1)
+        self.assertEqual(self.handler.call_count, 1)
+
+        views.refresh_queue.clear_attempts()
+        self.client.get(self.url)
+        views.refresh_queue.join()
+        self.assertEqual(self.handler.call_count, 2)
+
+    def test_recently_verified_data_is_fresh(self):
+        MGNREGAData.objects.update(last_updated=timezone.now() - timedelta(days=30))
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Refresh-Pending'], 'false')
+        self.assertLess(int(response['X-Data-Age']), 60)
+        self.handler.assert_not_called()
+
+class SingleFlightTest(TestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight('test')
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def refresh(name):
+            calls.append(name)
+            started.set()
+            release.wait(5)
+            return name.upper()
+
+        results = []
+        with mock.patch.object(flight, 'acquire_lease', return_value=True), \
+                mock.patch.object(flight, 'release_lease'):
+            leader = threading.Thread(target=lambda: results.append(flight.run('niwari', refresh, 'niwari')))
+            leader.start()
+            started.wait(5)
+            follower = threading.Thread(target=lambda: results.append(flight.run('niwari', refresh, 'niwari')))
+            follower.start()
+            while flight.stats()['coalesced_local'] == 0:
+                threading.Event().wait(0.01)
+            release.set()
+            leader.join(5)
+            follower.join(5)
+
+        self.assertEqual(calls, ['niwari'])
+        self.assertEqual(results, ['NIWARI', 'NIWARI'])
+        self.assertEqual(flight.stats()['executed'], 1)
+        self.assertEqual(flight.stats()['coalesced'], 1)
+
+    def test_lease_held_by_another_process_skips_call(self):
+        flight = SingleFlight('test')
+        RefreshLease.objects.create(key='test:niwari', owner='other', expires_at=timezone.now() + timedelta(minutes=5))
+        refresh = mock.Mock()
+        self.assertIsNone(flight.run('niwari', refresh))
+        refresh.assert_not_called()
+        self.assertEqual(flight.stats()['coalesced_remote'], 1)
+
+    def test_expired_lease_is_taken_over_and_released(self):
+        flight = SingleFlight('test')
+        RefreshLease.objects.create(key='test:niwari', owner='other', expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(flight.run('niwari', lambda: 'done'), 'done')
+        self.assertFalse(RefreshLease.objects.exists())
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        ingest_records([make_record()])
+        self.url = reverse('district_performance', args=['NIWARI'])
+
+    def test_performance_sets_validators_and_cache_control(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_matching_etag_returns_304_without_loading_rows(self):
+        etag = self.client.get(self.url)['ETag']
+        read_cache.invalidate()
+        # district and stored payload in one query
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('max-age=', response['Cache-Control'])
+        # then from the read cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_etag_changes_when_data_changes(self):
+        etag = self.client.get(self.url)['ETag']
+        ingest_records([make_record(month='Nov')])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unknown_district_is_not_cached_as_match(self):
+        response = self.client.get(reverse('district_performance', args=['nowhere']), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+
+    def test_errors_are_not_cached(self):
+        for url, params in (
+            (reverse('district_performance', args=['nowhere']), {}),
+            (reverse('district_performance_series', args=['nowhere']), {}),
+            (self.url, {'latest': 'many'}),
+        ):
+            response = self.client.get(url, params)
+            self.assertGreaterEqual(response.status_code, 400)
+            self.assertNotIn('public', response['Cache-Control'])
+            self.assertNotIn('max-age', response['Cache-Control'])
+
+    def test_district_list_revalidates(self):
+        url = reverse('district_list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        ingest_records([make_record(district_code='1803', district_name='RAIGAD')])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+class DistrictPayloadTest(APITestCase):
+    def setUp(self):
+        ingest_records([make_record(), make_record(month='Nov', total_exp=10.5)])
+        self.url = reverse('district_performance', args=['niwari'])
+
+    def expected_body(self):
+        rows = MGNREGAData.objects.order_by('-last_updated')
+        return JSONRenderer().render(MGNREGADataSerializer(rows, many=True).data)
+
+    def test_body_matches_serializer_output(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.content, self.expected_body())
+        self.assertTrue(DistrictPayload.objects.exists())
+
+    def test_gzip_body_served_when_accepted(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.expected_body())
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        # Each content coding has its own validator
+        identity = self.client.get(self.url)
+        self.assertNotEqual(response['ETag'], identity['ETag'])
+        revalidated = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=identity['ETag'])
+        self.assertEqual(revalidated.status_code, 200)
+        revalidated = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_ingest_invalidates_and_rebuild_restores(self):
+        rebuild_payloads()
+        result = ingest_records([make_record(total_exp=99.0)])
+        self.assertFalse(DistrictPayload.objects.exists())
+        rebuild_payloads(result.district_ids)
+        payload = DistrictPayload.objects.get()
+        self.assertEqual(bytes(payload.body), self.expected_body())
+        self.assertEqual(payload.rows, 2)
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'query plans are checked against SQLite')
+class PerformanceQueryTest(APITestCase):
+    def setUp(self):
+        # Oct 2023 ... Mar 2025 across two financial year boundaries
+        periods = [('2023-2024', month) for month in ('Oct', 'Nov', 'Dec', 'Jan', 'Feb', 'Mar')]
+        periods += [('2024-2025', month) for month in ('Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec', 'Jan', 'Feb', 'Mar')]
+        ingest_records([make_record(fin_year=fin_year, month=month) for fin_year, month in periods])
+        self.url = reverse('district_performance', args=['NIWARI'])
+
+    def periods(self, rows):
+        return [(row['fin_year'], row['month']) for row in rows]
+
+    def test_fields_projection(self):
+        response = self.client.get(self.url, {'fields': 'fin_year,month,total_exp,district_name'})
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        self.assertEqual(len(rows), 18)
+        self.assertEqual(set(rows[0]), {'fin_year', 'month', 'total_exp', 'district_name'})
+        self.assertEqual(rows[0]['district_name'], 'NIWARI')
+
+    def test_projected_values_match_full_payload(self):
+        full = {row['id']: row for row in self.client.get(self.url).json()}
+        for row in self.client.get(self.url, {'latest': 3}).json():
+            self.assertEqual(row, full[row['id']])
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(self.url, {'fields': 'fin_year,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', response.json()['error'])
+
+    def test_period_range_follows_financial_year_order(self):
+        response = self.client.get(self.url, {'from': '2023-2024:Feb', 'to': '2024-2025:May', 'fields': 'fin_year,month'})
+        self.assertEqual(self.periods(response.json()), [
+            ('2024-2025', 'May'), ('2024-2025', 'Apr'), ('2023-2024', 'Mar'), ('2023-2024', 'Feb'),
+        ])
+
+    def test_whole_financial_year(self):
+        response = self.client.get(self.url, {'from': '2023-2024', 'to': '2023-2024', 'fields': 'month'})
+        self.assertEqual([row['month'] for row in response.json()], ['Mar', 'Feb', 'Jan', 'Dec', 'Nov', 'Oct'])
+
+    def test_latest_months(self):
+        response = self.client.get(self.url, {'latest': 2, 'fields': 'fin_year,month'})
+        self.assertEqual(self.periods(response.json()), [('2024-2025', 'Mar'), ('2024-2025', 'Feb')])
+
+    def test_cursor_pagination_walks_every_row(self):
+        seen = []
+        response = self.client.get(self.url, {'page_size': 5, 'fields': 'fin_year,month'})
+        while True:
+            page = response.json()
+            self.assertLessEqual(len(page['results']), 5)
+            seen += self.periods(page['results'])
+            if not page['next']:
+                break
+            response = self.client.get(page['next'])
+        self.assertEqual(len(seen), 18)
+        self.assertEqual(len(set(seen)), 18)
+        self.assertEqual(seen[0], ('2024-2025', 'Mar'))
+        self.assertEqual(seen[-1], ('2023-2024', 'Oct'))
+
+    def test_invalid_parameters(self):
+        for params in ({'cursor': 'not-a-cursor'}, {'latest': 0}, {'latest': 2, 'page_size': 5}, {'from': '2024-2025:Foo'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+
+class PerformanceSeriesTest(APITestCase):
+    def setUp(self):
+        ingest_records([
+            make_record(fin_year='2024-2025', month='Jan', total_exp=30.0, wages=3.0),
+            make_record(fin_year='2023-2024', month='Mar', total_exp=10.0, wages=1.0),
+            make_record(fin_year='2024-2025', month='Apr', total_exp=20.0, wages=None),
+        ])
+        self.url = reverse('district_performance_series', args=['NIWARI'])
+
+    def test_columns_share_a_financial_year_ordered_axis(self):
+        response = self.client.get(self.url, {'metrics': 'total_exp,wages'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['labels'], ['Mar 2023-2024', 'Apr 2024-2025', 'Jan 2024-2025'])
+        self.assertEqual(data['fin_year'], ['2023-2024', '2024-2025', '2024-2025'])
+        self.assertEqual(data['month'], ['Mar', 'Apr', 'Jan'])
+        self.assertEqual(data['series'], {'total_exp': [10.0, 20.0, 30.0], 'wages': [1.0, None, 3.0]})
+
+    def test_single_query_for_the_series(self):
+        self.client.get(self.url)
+        # the district and its payload come from the read cache, leaving the series itself
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(set(response.json()['series']), {
+            'total_households_worked', 'total_individuals_worked', 'women_persondays', 'total_exp', 'wages',
+        })
+
+    def test_period_filter_and_unknown_metric(self):
+        response = self.client.get(self.url, {'metrics': 'total_exp', 'from': '2024-2025'})
+        self.assertEqual(response.json()['series'], {'total_exp': [20.0, 30.0]})
+        self.assertEqual(self.client.get(self.url, {'metrics': 'remarks'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('district_performance_series', args=['nowhere'])).status_code, 404)
+
+class StateRankingTest(APITestCase):
+    def setUp(self):
+        ingest_records([
+            make_record(district_code='1752', district_name='NIWARI', total_exp=30.0),
+            make_record(district_code='1753', district_name='SAGAR', total_exp=10.0),
+            make_record(district_code='1754', district_name='DAMOH', total_exp=30.0),
+            make_record(district_code='1755', district_name='PANNA', total_exp=20.0),
+            make_record(district_code='1756', district_name='KATNI', total_exp=None),
+            make_record(district_code='1803', district_name='RAIGAD', state_code='18', total_exp=99.0),
+        ])
+        self.url = reverse('state_rankings', args=['17'])
+
+    def test_ranks_percentiles_and_median(self):
+        response = self.client.get(self.url, {'fin_year': '2024-2025', 'month': 'Dec', 'metric': 'total_exp'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['districts'], data['median']), (4, 25.0))
+        self.assertEqual(
+            [(entry['district_name'], entry['rank'], entry['percentile']) for entry in data['rankings']],
+            [('DAMOH', 1, 66.67), ('NIWARI', 1, 66.67), ('PANNA', 3, 33.33), ('SAGAR', 4, 0.0), ('KATNI', None, None)],
+        )
+
+    def test_defaults_to_latest_month_and_filters_district(self):
+        ingest_records([make_record(fin_year='2023-2024', month='Mar', total_exp=1.0)])
+        data = self.client.get(self.url, {'district': 'sagar'}).json()
+        self.assertEqual((data['fin_year'], data['month']), ('2024-2025', 'Dec'))
+        self.assertEqual(data['district']['rank'], 4)
+        self.assertNotIn('rankings', data)
+
+    def test_cached_until_ingest_touches_the_slice(self):
+        params = {'fin_year': '2024-2025', 'month': 'Dec', 'metric': 'total_exp'}
+        self.client.get(self.url, params)
+        self.assertEqual(StateRanking.objects.count(), 1)
+        # cached slice is a single lookup
+        with self.assertNumQueries(1):
+            self.client.get(self.url, params)
+
+        ingest_records([make_record(district_code='1803', district_name='RAIGAD', state_code='18', total_exp=1.0)])
+        ingest_records([make_record(month='Nov', total_exp=1.0)])
+        ingest_records([make_record(district_code='1753', district_name='SAGAR', total_exp=10.0)])
+        self.assertEqual(StateRanking.objects.count(), 1)
+
+        ingest_records([make_record(district_code='1753', district_name='SAGAR', total_exp=50.0)])
+        self.assertFalse(StateRanking.objects.exists())
+        data = self.client.get(self.url, {**params, 'district': 'SAGAR'}).json()
+        self.assertEqual((data['district']['rank'], data['median']), (1, 30.0))
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(self.url, {'metric': 'remarks'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'fin_year': '2024-2025'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('state_rankings', args=['99'])).status_code, 404)
+
+class RollupTest(APITestCase):
+    def setUp(self):
+        ingest_records([
+            make_record(month='Nov', total_exp=10.0, wages=1.0),
+            make_record(month='Dec', total_exp=20.0, wages=None),
+            make_record(district_code='1753', district_name='SAGAR', total_exp=5.0, wages=2.0),
+        ])
+
+    def test_ingest_maintains_rollups(self):
+        state = StateMonthRollup.objects.get(state_code='17', fin_year='2024-2025', month='Dec')
+        self.assertEqual(state.rows, 2)
+        self.assertEqual((state.sums['total_exp'], state.counts['wages']), (25.0, 1))
+        self.assertEqual(state.means()['total_exp'], 12.5)
+
+        district = DistrictYearRollup.objects.get(district__district_code='1752', fin_year='2024-2025')
+        self.assertEqual((district.rows, district.sums['total_exp'], district.means()['wages']), (2, 30.0, 1.0))
+        self.assertEqual(verify_rollups(), [])
+
+    def test_updates_apply_deltas(self):
+        ingest_records([
+            make_record(month='Dec', total_exp=50.0, wages=4.0),
+            make_record(month='Nov', total_exp=10.0, wages=None),
+            make_record(fin_year='2023-2024', month='Mar', total_exp=7.0),
+        ])
+        district = DistrictYearRollup.objects.get(district__district_code='1752', fin_year='2024-2025')
+        self.assertEqual((district.rows, district.sums['total_exp']), (2, 60.0))
+        self.assertEqual((district.sums['wages'], district.counts['wages']), (4.0, 1))
+        self.assertEqual(StateMonthRollup.objects.get(month='Dec').sums['total_exp'], 55.0)
+        self.assertEqual(verify_rollups(), [])
+
+    def test_unchanged_rows_leave_rollups_alone(self):
+        before = list(DistrictYearRollup.objects.values_list('updated_at', flat=True).order_by('id'))
+        ingest_records([make_record(month='Nov', total_exp=10.0, wages=1.0)])
+        self.assertEqual(list(DistrictYearRollup.objects.values_list('updated_at', flat=True).order_by('id')), before)
+
+    def test_totals_are_served_from_rollups(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('state_totals', args=['17']))
+        self.assertEqual(response.status_code, 200)
+        months = response.json()['months']
+        self.assertEqual([(entry['month'], entry['rows']) for entry in months], [('Nov', 1), ('Dec', 2)])
+        self.assertEqual((months[1]['sums']['total_exp'], months[1]['means']['total_exp']), (25.0, 12.5))
+        self.assertEqual(self.client.get(reverse('state_totals', args=['99'])).status_code, 404)
+
+        response = self.client.get(reverse('district_year_totals', args=['niwari']))
+        years = response.json()['years']
+        self.assertEqual([(entry['fin_year'], entry['rows']) for entry in years], [('2024-2025', 2)])
+        self.assertEqual((years[0]['sums']['wages'], years[0]['means']['wages']), (1.0, 1.0))
+        self.assertEqual(self.client.get(reverse('district_year_totals', args=['nowhere'])).status_code, 404)
+
+    def test_rebuild_command_repairs_drift(self):
+        StateMonthRollup.objects.filter(month='Dec').update(rows=7)
+        DistrictYearRollup.objects.filter(district__district_code='1753').delete()
+        self.assertEqual(len(verify_rollups()), 2)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', '--check', stdout=io.StringIO(), stderr=io.StringIO())
+
+        out = io.StringIO()
+        call_command('rebuild_rollups', stdout=out)
+        self.assertIn('Rebuilt 2 state-month and 2 district-year rollups', out.getvalue())
+        self.assertEqual(verify_rollups(), [])
+
+class ValuesSerializerTest(TestCase):
+    def setUp(self):
+        ingest_records([
+            make_record(),
+            make_record(month='Nov', total_exp=None, average_wage_rate=241.5, women_persondays=10 ** 12, remarks=''),
+            make_record(district_code='1803', district_name='RAIGAD', state_name='MAHARASHTRA', state_code='18'),
+        ])
+
+    def assertSameJSON(self, serializer_class, values_serializer, queryset):
+        renderer = JSONRenderer()
+        expected = renderer.render(serializer_class(queryset, many=True).data)
+        self.assertEqual(renderer.render(values_serializer.data(queryset)), expected)
+
+    def test_performance_rows_match_model_serializer(self):
+        self.assertSameJSON(MGNREGADataSerializer, mgnrega_data_values, MGNREGAData.objects.order_by('-last_updated'))
+
+    @override_settings(TIME_ZONE='Asia/Kolkata')
+    def test_datetimes_follow_current_time_zone(self):
+        self.assertSameJSON(MGNREGADataSerializer, mgnrega_data_values, MGNREGAData.objects.order_by('id'))
+
+    def test_districts_match_model_serializer(self):
+        self.assertSameJSON(DistrictSerializer, district_values, District.objects.all())
+
+    def test_single_query_with_district_joined(self):
+        with self.assertNumQueries(1):
+            rows = mgnrega_data_values.data(MGNREGAData.objects.all())
+        self.assertEqual({row['district_name'] for row in rows}, {'NIWARI', 'RAIGAD'})
+
+    def test_stored_payload_matches_model_serializer(self):
+        district = District.objects.get(district_code='1752')
+        data = MGNREGADataSerializer(MGNREGAData.objects.filter(district=district).order_by('-last_updated'), many=True).data
+        self.assertEqual(bytes(build_payload(district).body), JSONRenderer().render(data))
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.client_address[1]))
+        status_code, headers, body = server.responses.pop(0) if server.responses else (200, {}, b'<result/>')
+        self.send_response(status_code)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Local HTTP server answering GETs with scripted (status, headers, body) responses
+    """
+    daemon_threads = True
+
+    def __init__(self, responses=()):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.responses = list(responses)
+        self.requests = []
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/resource"
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class ReadCacheTest(APITestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TieredCache('test-read', LRUCache(maxsize=2, ttl=10, clock=self.clock))
+        self.addCleanup(self.cache.invalidate)
+
+    def test_lru_evicts_least_recently_used_and_expires(self):
+        local = self.cache.local
+        local.set('a', 1)
+        local.set('b', 2)
+        self.assertEqual(local.get('a'), 1)
+        local.set('c', 3)
+        self.assertIs(local.get('b'), MISSING)
+        self.clock.now += 11
+        self.assertIs(local.get('a'), MISSING)
+        self.assertEqual(local.stats(), {
+            'hits': 1, 'misses': 2, 'evictions': 1, 'expirations': 1, 'size': 1, 'maxsize': 2,
+        })
+
+    def test_shared_tier_backs_the_local_one(self):
+        build = mock.Mock(return_value={'rows': 1})
+        self.assertEqual(self.cache.get_or_set('key', build), {'rows': 1})
+        self.cache.local.clear()
+        self.assertEqual(self.cache.get_or_set('key', build), {'rows': 1})
+        self.assertEqual(self.cache.get_or_set('key', build), {'rows': 1})
+        build.assert_called_once()
+        stats = self.cache.stats()
+        self.assertEqual((stats['local']['hits'], stats['local']['misses']), (1, 2))
+        self.assertEqual((stats['shared']['hits'], stats['shared']['misses'], stats['shared']['sets']), (1, 1, 1))
+
+        self.cache.shared.clear()
+        self.cache.local.clear()
+        self.assertIs(self.cache.get('key'), MISSING)
+        self.assertEqual(self.cache.stats()['shared']['evictions'], 1)
+
+    def test_invalidate_clears_both_tiers(self):
+        self.cache.set('key', 1)
+        other_worker = TieredCache('test-read', LRUCache(maxsize=2, ttl=10, clock=self.clock))
+        self.assertEqual(other_worker.get('key'), 1)
+        self.cache.invalidate()
+        self.assertIs(self.cache.get('key'), MISSING)
+        # Another worker's local copy lives out its TTL; its shared lookups miss at once
+        self.assertEqual(other_worker.get('key'), 1)
+        other_worker.local.clear()
+        self.assertIs(other_worker.get('key'), MISSING)
+
+    def test_ingest_invalidates_the_district_list(self):
+        ingest_records([make_record()])
+        url = reverse('district_list')
+        self.assertEqual(len(self.client.get(url).json()), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get(url).json()), 1)
+        ingest_records([make_record(district_code='1753', district_name='TIKAMGARH')])
+        self.assertEqual(len(self.client.get(url).json()), 2)
+        self.assertIn('cache', self.client.get(reverse('refresh_stats')).json())
+
+class RegistryTest(unittest.TestCase):
+    def test_renders_prometheus_text(self):
+        registry = Registry()
+        counter = registry.counter('jobs_total', 'Jobs by state', ('state',))
+        histogram = registry.histogram('job_seconds', 'Job time', buckets=(0.1, 1))
+        counter.inc(state='done')
+        counter.inc(2, state='said "hi"\n')
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+        self.assertEqual(registry.render(), '\n'.join([
+            '# HELP jobs_total Jobs by state',
+            '# TYPE jobs_total counter',
+            'jobs_total{state="done"} 1',
+            'jobs_total{state="said \\"hi\\"\\n"} 2',
+            '# HELP job_seconds Job time',
+            '# TYPE job_seconds histogram',
+            'job_seconds_bucket{le="0.1"} 2',
+            'job_seconds_bucket{le="1"} 3',
+            'job_seconds_bucket{le="+Inf"} 4',
+            'job_seconds_sum 3.65',
+            'job_seconds_count 4',
+        ]) + '\n')
+        with self.assertRaises(ValueError):
+            registry.counter('jobs_total', 'again')
+
+    def test_concurrent_updates_are_not_lost(self):
+        counter = Registry().counter('hits_total', 'Hits')
+
+        def hit():
+            for _ in range(1000):
+                counter.inc()
+        threads = [threading.Thread(target=hit) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.value(), 8000)
+
+@modify_settings(MIDDLEWARE={'prepend': 'mgnrega.metrics.MetricsMiddleware'})
+class MetricsMiddlewareTest(APITestCase):
+    def setUp(self):
+        ingest_records([make_record()])
+        read_cache.invalidate()
+
+    def queries_recorded(self, view):
+        for line in self.client.get(reverse('metrics')).content.decode().splitlines():
+            if line.startswith(f'mgnrega_http_request_db_queries_sum{{view="{view}"}}'):
+                return float(line.split()[-1])
+        return 0.0
+
+    def test_records_requests_by_view(self):
+        before = requests_total.value(view='district_performance', method='GET', status=200)
+        queries_before = self.queries_recorded('district_performance')
+        sizes_before = response_size.count(view='district_performance')
+        self.client.get(reverse('district_performance', args=['niwari']))
+        self.assertEqual(requests_total.value(view='district_performance', method='GET', status=200), before + 1)
+        self.assertEqual(response_size.count(view='district_performance'), sizes_before + 1)
+        # district and payload lookup, then building the missing payload
+        self.assertGreaterEqual(self.queries_recorded('district_performance') - queries_before, 2)
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertIn('mgnrega_http_request_duration_seconds_bucket{view="district_performance",method="GET",le="+Inf"}',
+                      response.content.decode())
+
+    async def test_counts_queries_of_async_views(self):
+        queries_before = await sync_to_async(self.queries_recorded)('district_performance_async')
+        response = await self.async_client.get(reverse('district_performance_async', args=['niwari']))
+        self.assertEqual(response.status_code, 200)
+        queries_after = await sync_to_async(self.queries_recorded)('district_performance_async')
+        self.assertGreaterEqual(queries_after - queries_before, 2)
+
+class UpstreamClientTest(TestCase):
+    def make_client(self, responses, **options):
+        server = StubServer(responses)
+        self.addCleanup(server.close)
+        clock = FakeClock()
+        options = {'timeout': 5, 'rate': 100, 'burst': 100, **options}
+        return server, clock, UpstreamClient(url=server.url, clock=clock, sleep=clock.sleep, **options)
+
+    def test_retries_server_errors_with_backoff(self):
+        server, clock, client = self.make_client([(503, {}, b''), (502, {}, b''), (200, {}, b'<ok/>')], backoff_base=1)
+        self.assertEqual(client.get({'offset': 0}).content, b'<ok/>')
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(len(clock.sleeps), 2)
+        self.assertLessEqual(clock.sleeps[0], 1)
+        self.assertLessEqual(clock.sleeps[1], 2)
+        self.assertEqual(client.stats()['retries'], 2)
+
+    def test_honours_retry_after(self):
+        server, clock, client = self.make_client([(429, {'Retry-After': '7'}, b''), (200, {}, b'<ok/>')])
+        client.get({})
+        self.assertEqual(clock.sleeps, [7.0])
+        self.assertEqual(client.stats()['throttled'], 1)
+
+    def test_gives_up_after_max_retries(self):
+        server, clock, client = self.make_client([(500, {}, b'')] * 3, max_retries=2, breaker_threshold=10)
+        with self.assertRaises(FetchError):
+            client.get({})
+        self.assertEqual(len(server.requests), 3)
+
+    def test_records_upstream_metrics(self):
+        server, clock, client = self.make_client([(503, {}, b''), (200, {}, b'<ok/>')], backoff_base=0)
+        before = (upstream_responses.value(status=503), upstream_responses.value(status=200), upstream_duration.count())
+        client.get({})
+        after = (upstream_responses.value(status=503), upstream_responses.value(status=200), upstream_duration.count())
+        self.assertEqual([b - a for a, b in zip(before, after)], [1, 1, 2])
+
+    def test_client_errors_are_not_retried(self):
+        server, clock, client = self.make_client([(403, {}, b'')])
+        with self.assertRaisesMessage(FetchError, '403'):
+            client.get({})
+        self.assertEqual(len(server.requests), 1)
+
+    def test_circuit_opens_and_recovers_after_cooldown(self):
+        server, clock, client = self.make_client(
+            [(500, {}, b'')] * 3, max_retries=0, breaker_threshold=3, breaker_cooldown=60
+        )
+        for _ in range(3):
+            with self.assertRaises(FetchError):
+                client.get({})
+        with self.assertRaises(CircuitOpenError):
+            client.get({})
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(client.stats()['circuit'], 'open')
+
+        clock.now += 60
+        self.assertEqual(client.get({}).status_code, 200)
+        self.assertEqual(client.stats()['circuit'], 'closed')
+
+    def test_failed_trial_reopens_circuit(self):
+        server, clock, client = self.make_client([(500, {}, b'')] * 2, max_retries=0, breaker_threshold=1)
+        with self.assertRaises(FetchError):
+            client.get({})
+        clock.now += 60
+        with self.assertRaises(FetchError):
+            client.get({})
+        with self.assertRaises(CircuitOpenError):
+            client.get({})
+
+    def test_request_errors_resolve_half_open_circuit(self):
+        server, clock, client = self.make_client(
+            [(500, {}, b''), (200, {'Content-Encoding': 'gzip'}, b'not gzip')],
+            max_retries=3, backoff_base=0, breaker_threshold=1,
+        )
+        with self.assertRaises(FetchError):
+            client.get({})
+        clock.now += 60
+        # The trial fails with a ContentDecodingError: reported as a FetchError, not retried
+        with self.assertRaisesMessage(FetchError, 'API request failed'):
+            client.get({})
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(client.stats()['circuit'], 'open')
+
+        clock.now += 60
+        self.assertEqual(client.get({}).status_code, 200)
+        self.assertEqual(client.stats()['circuit'], 'closed')
+
+    def test_token_bucket_limits_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+        for _ in range(6):
+            bucket.acquire()
+        # two from the burst, then one every half second
+        self.assertEqual(clock.now, 2.0)
+
+    def test_session_reuses_connections(self):
+        server, clock, client = self.make_client([])
+        for offset in range(3):
+            client.get({'offset': offset})
+        self.assertEqual(len({port for _, port in server.requests}), 1)
+        self.assertIn('offset=2', server.requests[-1][0])
+
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        ingest_records([make_record(), make_record(month='Nov', total_exp=1.5)])
+
+    async def assertSameResponse(self, sync_url, async_url, headers=None, body=True):
+        expected = await sync_to_async(self.client.get)(sync_url, headers=headers)
+        response = await self.async_client.get(async_url, headers=headers)
+        self.assertEqual(response.status_code, expected.status_code)
+        if body:
+            self.assertEqual(response.content, expected.content)
+        for header in ('ETag', 'Last-Modified', 'Cache-Control', 'Content-Encoding', 'X-Refresh-Pending'):
+            self.assertEqual(response.headers.get(header), expected.headers.get(header), header)
+        return response
+
+    async def test_district_list_matches_sync_view(self):
+        response = await self.assertSameResponse(reverse('district_list'), reverse('district_list_async'))
+        revalidated = await self.async_client.get(reverse('district_list_async'), headers={'If-None-Match': response['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+    async def test_performance_matches_sync_view(self):
+        for name, headers in (('NIWARI', None), ('niwari', {'Accept-Encoding': 'gzip'}), ('nowhere', None)):
+            await self.assertSameResponse(
+                reverse('district_performance', args=[name]), reverse('district_performance_async', args=[name]), headers
+            )
+
+    async def test_performance_queries_and_revalidation(self):
+        url = reverse('district_performance_async', args=['NIWARI'])
+        query = '?fields=month,total_exp&page_size=1'
+        response = await self.assertSameResponse(reverse('district_performance', args=['NIWARI']) + query, url + query, body=False)
+        page = response.json()
+        self.assertEqual(page['results'], [{'month': 'Dec', 'total_exp': 3884.1}])
+        self.assertTrue(page['next'].startswith('http://testserver' + url))
+        self.assertEqual((await self.async_client.get(url, {'latest': 0})).status_code, 400)
+        revalidated = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+    async def test_only_get_is_allowed(self):
+        self.assertEqual((await self.async_client.post(reverse('district_list_async'))).status_code, 405)
+
+class BenchmarkCommandTest(TestCase):
+    def test_runs_every_suite_by_default(self):
+        out = io.StringIO()
+        suites = {'read': lambda: {'rows/sec': 1234.0}, 'write': lambda: {'rows': 5}}
+        with mock.patch('mgnrega.management.commands.benchmark.SUITES', suites):
+            call_command('benchmark', stdout=out)
+            self.assertIn('rows/sec: 1,234', out.getvalue())
+            self.assertIn('rows: 5', out.getvalue())
+            with self.assertRaisesMessage(CommandError, 'Unknown suites: nope'):
+                call_command('benchmark', 'nope')
+
+    def test_serialize_suite_leaves_read_cache_alone(self):
+        with mock.patch.object(read_cache, 'invalidate') as invalidate:
+            results = bench_serialize(rows=240)
+        invalidate.assert_not_called()
+        self.assertEqual(results['rows'], 240)
+        self.assertFalse(District.objects.exists())
+
+class SnapshotTest(TestCase):
+    def setUp(self):
+        ingest_records([
+            make_record(),
+            make_record(month='Nov', total_exp=None, remarks=''),
+            make_record(district_code='1803', district_name='RAIGAD', state_code='18', fin_year='2023-2024'),
+        ])
+        MGNREGAData.objects.filter(month='Nov').update(last_updated=timezone.now() - timedelta(days=3))
+
+    def dump(self, model):
+        return [
+            {name: value for name, value in row.items() if name != 'district_name_normalized'}
+            for row in model.objects.order_by('pk').values()
+        ]
+
+    def export(self):
+        file = io.BytesIO()
+        export_snapshot(file)
+        file.seek(0)
+        return file
+
+    def test_round_trip_restores_tables(self):
+        districts, rows = self.dump(District), self.dump(MGNREGAData)
+        file = self.export()
+        self.assertEqual(import_snapshot(file, replace=True), {'district': 2, 'mgnrega_data': 3})
+        self.assertEqual(self.dump(District), districts)
+        self.assertEqual(self.dump(MGNREGAData), rows)
+        self.assertEqual(District.objects.get(district_code='1803').district_name_normalized, 'raigad')
+        self.assertEqual(verify_rollups(), [])
+
+    def test_snapshot_is_columnar_and_compressed(self):
+        document = json.loads(gzip.decompress(self.export().getvalue()))
+        self.assertEqual((document['format'], document['version']), ('mgnrega-snapshot', 1))
+        self.assertEqual(document['tables']['mgnrega_data']['columns']['month'], ['Dec', 'Nov', 'Dec'])
+
+    def test_refuses_to_overwrite_without_replace(self):
+        with self.assertRaises(SnapshotError):
+            import_snapshot(self.export())
+        self.assertEqual(MGNREGAData.objects.count(), 3)
+
+    def test_rejects_other_versions(self):
+        document = json.loads(gzip.decompress(self.export().getvalue()))
+        document['version'] = 99
+        with self.assertRaisesMessage(SnapshotError, 'version 99'):
+            import_snapshot(io.BytesIO(gzip.compress(json.dumps(document).encode())), replace=True)
+        with self.assertRaises(SnapshotError):
+            import_snapshot(io.BytesIO(b'not a snapshot'), replace=True)
+
+    def test_commands(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / 'mgnrega.snapshot.gz')
+            out = io.StringIO()
+            call_command('export_snapshot', path, stdout=out)
+            self.assertIn('2 districts and 3 rows', out.getvalue())
+            District.objects.all().delete()
+            call_command('import_snapshot', path, stdout=out)
+        self.assertEqual(MGNREGAData.objects.count(), 3)
+
+class SyncTest(APITestCase):
+    def fake_pages(self, total=25):
+        return FetchAllPagesTest.fake_pages(self, total, 10)
+
+    def test_scopes_cover_every_combination(self):
+        self.assertEqual(build_scopes(), [{}])
+        self.assertEqual(build_scopes(['MADHYA PRADESH'], [], ['2023-2024', '2024-2025']), [
+            {'state_name': 'MADHYA PRADESH', 'fin_year': '2023-2024'},
+            {'state_name': 'MADHYA PRADESH', 'fin_year': '2024-2025'},
+        ])
+
+    def test_sync_reports_progress(self):
+        updates = []
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=self.fake_pages()) as fetch_page:
+            result = run_sync(build_scopes(fin_years=['2024-2025']), page_size=10, workers=2, progress=updates.append)
+        self.assertEqual(fetch_page.call_args.args[0]['filters[fin_year]'], '2024-2025')
+        self.assertEqual((result.rows, result.pages, result.ingest.inserted), (25, 3, 25))
+        self.assertEqual([update.rows for update in updates][-1], 25)
+        self.assertEqual(updates[-1].fetch.total_pages, 3)
+        self.assertTrue(DistrictPayload.objects.exists())
+
+    def test_scopes_download_side_by_side(self):
+        # Each scope is a single page; both must be in flight at once to pass the barrier
+        barrier = threading.Barrier(2, timeout=5)
+        codes = {'NIWARI': '1752', 'RAIGAD': '1803'}
+
+        def fetch_page(params, offset, limit):
+            barrier.wait()
+            return make_page(1, ['Dec'], district_code=codes[params['filters[district_name]']])
+
+        updates = []
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=fetch_page):
+            result = run_sync(build_scopes(district_names=['NIWARI', 'RAIGAD']), workers=2, progress=updates.append)
+        self.assertEqual((result.scopes, result.pages, result.rows), (2, 2, 2))
+        self.assertEqual(sorted(update.scope_index for update in updates), [1, 2])
+        self.assertEqual(updates[-1].rows, 2)
+        self.assertEqual(SyncMark.objects.count(), 2)
+
+    def test_dry_run_writes_nothing(self):
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=self.fake_pages()):
+            result = run_sync([{}], page_size=10, dry_run=True, resume=True)
+        self.assertEqual(result.rows, 25)
+        self.assertFalse(MGNREGAData.objects.exists())
+        self.assertFalse(FetchCheckpoint.objects.exists())
+
+    def test_command(self):
+        out = io.StringIO()
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=self.fake_pages()):
+            call_command('sync_mgnrega', '--state', 'MADHYA PRADESH', '--page-size', '10', '--workers', '2', stdout=out)
+        output = out.getvalue()
+        self.assertIn('[1/1 state_name=MADHYA PRADESH] page 3/3, 25 rows', output)
+        self.assertIn('rows/sec', output)
+        self.assertEqual(MGNREGAData.objects.count(), 25)
+
+    def test_initialize_queues_one_job_per_scope(self):
+        url = reverse('initialize_data')
+        self.assertEqual(self.client.post(url).status_code, 403)
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        with mock.patch.object(views.sync_jobs, 'enqueue') as enqueue:
+            first = self.client.post(url)
+            second = self.client.post(url)
+            scoped = self.client.post(url, {'fin_year': '2024-2025'})
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first.data['job_id'], second.data['job_id'])
+        self.assertNotEqual(first.data['job_id'], scoped.data['job_id'])
+        self.assertEqual(scoped.data['scope'], {'fin_year': '2024-2025'})
+        self.assertEqual(enqueue.call_count, 2)
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+        response = self.client.get(first.data['status_url'])
+        self.assertEqual((response.status_code, response.data['status']), (200, 'queued'))
+
+    def test_initialize_accepts_known_scopes_only(self):
+        ingest_records([
+            make_record(),
+            make_record(state_code='32', state_name='KERALA', district_code='3201', district_name='ERNAKULAM'),
+        ])
+        url = reverse('initialize_data')
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        with mock.patch.object(views.sync_jobs, 'enqueue') as enqueue:
+            response = self.client.post(url, {'state_name': 'madhya pradesh', 'district_name': 'Niwari'})
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.data['scope'], {'state_name': 'MADHYA PRADESH', 'district_name': 'NIWARI'})
+            for scope in ({'state_name': 'ATLANTIS'}, {'district_name': 'NOWHERE'},
+                          {'state_name': 'KERALA', 'district_name': 'NIWARI'}, {'fin_year': '2024-2026'}):
+                self.assertEqual(self.client.post(url, scope).status_code, 400, scope)
+            for body in ([1, 2], 'NIWARI'):
+                self.assertEqual(self.client.post(url, body, format='json').status_code, 400, body)
+        self.assertEqual(enqueue.call_count, 1)
+        self.assertEqual(SyncJob.objects.count(), 1)
+
+    def test_job_records_outcome(self):
+        job, _ = queue_job({})
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=self.fake_pages()):
+            job = run_job(job.pk)
+        self.assertEqual(job.status, SyncJob.SUCCEEDED)
+        self.assertEqual(job.result['rows'], 25)
+        self.assertIsNotNone(job.finished_at)
+
+        job, _ = queue_job({})
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=FetchError('API down')):
+            job = run_job(job.pk, fallback=lambda: ingest_records([make_record()]))
+        self.assertEqual(job.status, SyncJob.SUCCEEDED)
+        self.assertIn('API down', job.message)
+        self.assertIn('local file', job.message)
+
+    def test_jobs_of_stopped_workers_are_abandoned(self):
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        orphan = SyncJob.objects.create(scope={}, status=SyncJob.RUNNING, owner='gone:1:abc', heartbeat_at=an_hour_ago)
+        job, created = queue_job({})
+        self.assertTrue(created)
+        self.assertEqual(job.owner, WORKER_ID)
+        orphan.refresh_from_db()
+        self.assertEqual(orphan.status, SyncJob.FAILED)
+        self.assertIn('Abandoned', orphan.message)
+
+        # This worker's own jobs are alive however long they have waited
+        SyncJob.objects.filter(pk=job.pk).update(heartbeat_at=an_hour_ago)
+        self.assertEqual(queue_job({}), (job, False))
+
+        # A job given up on is not run when it is dequeued
+        with mock.patch('mgnrega.sync.run_sync') as sync:
+            self.assertEqual(run_job(orphan.pk).status, SyncJob.FAILED)
+        sync.assert_not_called()
+
+    def test_unknown_job(self):
+        response = self.client.get(reverse('sync_job_status', args=['00000000-0000-0000-0000-000000000000']))
+        self.assertEqual(response.status_code, 404)
+
+class WatermarkTest(TestCase):
+    def test_recent_fin_years(self):
+        self.assertEqual(fin_year_of(date(2025, 3, 31)), '2024-2025')
+        self.assertEqual(recent_fin_years(date(2025, 4, 1)), ['2024-2025', '2025-2026'])
+        self.assertEqual(recent_fin_years(date(2025, 3, 31), count=1), ['2024-2025'])
+
+    def test_marks_track_latest_period(self):
+        result = ingest_records([
+            make_record(fin_year='2024-2025', month='Jan'),
+            make_record(fin_year='2024-2025', month='Dec'),
+            make_record(fin_year='2023-2024', month='Mar'),
+        ])
+        record_sync(result.district_ids)
+        mark = SyncMark.objects.get()
+        self.assertEqual((mark.fin_year, mark.month), ('2024-2025', 'Jan'))
+        self.assertIsNotNone(mark.synced_at)
+        self.assertIsNone(mark.verified_at)
+
+    def test_routine_scopes_skip_past_years_until_verification_is_due(self):
+        scope = {'district_name': 'niwari'}
+        today = date(2025, 6, 1)
+        self.assertEqual(plan_scopes(scope, today), [scope])
+
+        result = ingest_records([make_record()])
+        record_sync(result.district_ids, verified=True)
+        self.assertEqual(plan_scopes(scope, today), [
+            {'district_name': 'niwari', 'fin_year': '2024-2025'},
+            {'district_name': 'niwari', 'fin_year': '2025-2026'},
+        ])
+        self.assertEqual(plan_scopes({'fin_year': '2019-2020'}, today), [{'fin_year': '2019-2020'}])
+
+        # A district that has never been verified forces a full sync of its state
+        ingest_records([make_record(district_code='1753', district_name='TIKAMGARH')])
+        self.assertEqual(plan_scopes({'state_name': 'Madhya Pradesh'}, today), [{'state_name': 'Madhya Pradesh'}])
+
+        SyncMark.objects.update(verified_at=timezone.now() - timedelta(days=8))
+        self.assertEqual(plan_scopes(scope, today), [scope])
+
+    def test_incremental_sync(self):
+        def fetch_calls():
+            with mock.patch('mgnrega.fetch.fetch_page', side_effect=FetchAllPagesTest.fake_pages(self, 5, 10)) as fetch_page:
+                run_sync([{}], page_size=10, incremental=True)
+            return [call.args[0].get('filters[fin_year]') for call in fetch_page.call_args_list]
+
+        self.assertEqual(fetch_calls(), [None])
+        self.assertIsNotNone(SyncMark.objects.get().verified_at)
+        self.assertEqual(fetch_calls(), recent_fin_years())
+
+class IngestRunTest(APITestCase):
+    def fake_pages(self, total=25):
+        return FetchAllPagesTest.fake_pages(self, total, 10)
+
+    def test_sync_records_run(self):
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=self.fake_pages()):
+            result = run_sync([{}], page_size=10, workers=2)
+        run = IngestRun.objects.get(pk=result.run_id)
+        self.assertEqual((run.status, run.source, run.scopes), (IngestRun.SUCCEEDED, IngestRun.API, [{}]))
+        self.assertEqual((run.pages, run.rows_inserted, run.rows_updated, run.rows_skipped), (3, 25, 0, 0))
+        self.assertGreater(run.http_seconds, 0)
+        self.assertGreater(run.db_seconds, 0)
+        self.assertGreaterEqual(run.finished_at, run.started_at)
+
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=self.fake_pages()):
+            result = run_sync([{}], page_size=10)
+        self.assertEqual(IngestRun.objects.get(pk=result.run_id).rows_skipped, 25)
+        self.assertEqual(result.summary()['ingest_run'], result.run_id)
+
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=self.fake_pages()):
+            run_sync([{}], page_size=10, dry_run=True)
+        self.assertEqual(IngestRun.objects.count(), 2)
+
+    @override_settings(MGNREGA_INGEST_BATCH_SIZE=4)
+    def test_file_load_is_ingested_in_batches(self):
+        with mock.patch('mgnrega.views.ingest_records', wraps=ingest_records) as ingest:
+            result = views.load_server_response()
+        self.assertEqual([len(call.args[0]) for call in ingest.call_args_list], [4, 4, 2])
+        run = IngestRun.objects.get()
+        self.assertEqual((run.source, run.status, run.pages), (IngestRun.FILE, IngestRun.SUCCEEDED, 3))
+        self.assertEqual(run.rows_inserted + run.rows_updated, result.inserted + result.updated)
+        self.assertEqual(MGNREGAData.objects.count(), result.inserted)
+
+    def test_failed_scope_does_not_stop_the_run(self):
+        pages = self.fake_pages()
+
+        def fetch_page(params, offset, limit):
+            if params.get('filters[fin_year]') == '2023-2024':
+                raise FetchError('API down')
+            return pages(params, offset, limit)
+
+        scopes = build_scopes(fin_years=['2023-2024', '2024-2025'])
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=fetch_page):
+            with self.assertRaisesMessage(FetchError, '1 of 2 scopes failed'):
+                run_sync(scopes, page_size=10)
+        self.assertEqual(MGNREGAData.objects.count(), 25)
+        run = IngestRun.objects.get()
+        self.assertEqual((run.status, run.rows_inserted, run.error_count), (IngestRun.PARTIAL, 25, 1))
+        self.assertEqual(run.errors, [{'item': {'scope': {'fin_year': '2023-2024'}}, 'error': 'API down'}])
+        self.assertIn('1 of 2 scopes failed', run.message)
+
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=FetchError('API down')):
+            with self.assertRaises(FetchError):
+                run_sync([{}], page_size=10)
+        self.assertEqual(IngestRun.objects.latest('started_at').status, IngestRun.FAILED)
+
+    def test_runs_endpoint(self):
+        with mock.patch('mgnrega.fetch.fetch_page', side_effect=self.fake_pages()):
+            first = run_sync([{}], page_size=10)
+            second = run_sync([{}], page_size=10)
+        response = self.client.get(reverse('ingest_runs'))
+        self.assertEqual(response.status_code, 200)
+        runs = response.data['results']
+        self.assertEqual([run['id'] for run in runs], [second.run_id, first.run_id])
+        self.assertEqual(runs[0]['rows_skipped'], 25)
+        self.assertEqual(set(runs[0]['phases']), {'http', 'parse', 'db'})
+        self.assertIsNotNone(runs[0]['rows_per_second'])
+        self.assertNotIn('errors', runs[0])
+
+        self.assertEqual(len(self.client.get(reverse('ingest_runs'), {'limit': 1}).data['results']), 1)
+        self.assertEqual(self.client.get(reverse('ingest_runs'), {'status': 'failed'}).data['results'], [])
+        self.assertEqual(self.client.get(reverse('ingest_runs'), {'limit': 'x'}).status_code, 400)
+
+        response = self.client.get(reverse('ingest_run_detail', args=[first.run_id]))
+        self.assertEqual((response.data['rows_inserted'], response.data['errors']), (25, []))
+        self.assertEqual(self.client.get(reverse('ingest_run_detail', args=[0])).status_code, 404)
+
+class StaticApiTest(APITestCase):
+    def setUp(self):
+        ingest_records([
+            make_record(),
+            make_record(month='Nov'),
+            make_record(district_code='1753', district_name='TIKAMGARH'),
+        ])
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+
+    def read(self, relative):
+        return (Path(self.root) / relative).read_bytes()
+
+    def manifest(self):
+        return json.loads(self.read('manifest.json'))
+
+    def test_publishes_hashed_compressed_copies_of_the_api(self):
+        result = publish_static_api(self.root)
+        self.assertEqual((result.districts, result.written), (2, 3))
+        manifest = self.manifest()
+        self.assertEqual(set(manifest['performance']), {'niwari', 'tikamgarh'})
+        self.assertRegex(manifest['performance']['niwari'], r'^performance/niwari\.[0-9a-f]{12}\.json$')
+
+        path = manifest['performance']['niwari']
+        response = self.client.get(reverse('district_performance', args=['niwari']))
+        self.assertEqual(self.read(path), response.content)
+        self.assertEqual(gzip.decompress(self.read(path + '.gz')), response.content)
+        self.assertEqual(json.loads(self.read(manifest['districts'])), self.client.get(reverse('district_list')).json())
+
+        # Unchanged content keeps its file
+        result = publish_static_api(self.root)
+        self.assertEqual((result.written, result.reused), (0, 3))
+
+    def test_republishes_changed_districts_and_prunes_old_files(self):
+        publish_static_api(self.root)
+        first = self.manifest()
+        niwari = District.objects.get(district_code='1752')
+
+        ingest_records([make_record(total_exp=1.0)])
+        result = publish_static_api(self.root, district_ids=[niwari.pk])
+        self.assertEqual((result.written, result.reused), (1, 1))
+        second = self.manifest()
+        self.assertNotEqual(second['performance']['niwari'], first['performance']['niwari'])
+        self.assertEqual(second['performance']['tikamgarh'], first['performance']['tikamgarh'])
+        # Clients still holding the previous manifest can fetch its files
+        self.assertTrue((Path(self.root) / first['performance']['niwari']).exists())
+
+        ingest_records([make_record(total_exp=2.0)])
+        result = publish_static_api(self.root, district_ids=[niwari.pk])
+        self.assertEqual(result.removed, 1)
+        self.assertFalse((Path(self.root) / first['performance']['niwari']).exists())
+        self.assertFalse((Path(self.root) / (first['performance']['niwari'] + '.gz')).exists())
+
+    def test_sync_republishes(self):
+        with override_settings(MGNREGA_STATIC_API=True, MGNREGA_STATIC_API_ROOT=self.root), \
+                mock.patch('mgnrega.fetch.fetch_page', side_effect=FetchAllPagesTest.fake_pages(self, 5, 10)):
+            run_sync([{}], page_size=10)
+        self.assertEqual(set(self.manifest()['performance']), {'niwari', 'tikamgarh'})
+
+        # A failed publish does not fail the sync
+        with override_settings(MGNREGA_STATIC_API=True, MGNREGA_STATIC_API_ROOT=self.root), \
+                mock.patch('mgnrega.static_api.publish_static_api', side_effect=ValueError('bad payload')), \
+                mock.patch('mgnrega.fetch.fetch_page', side_effect=FetchAllPagesTest.fake_pages(self, 5, 10)), \
+                self.assertLogs('mgnrega.static_api', 'ERROR') as logs:
+            self.assertEqual(run_sync([{}], page_size=10).rows, 5)
+        self.assertIn('bad payload', logs.output[0])
+
+    def test_serves_published_files(self):
+        publish_static_api(self.root)
+        manifest = self.manifest()
+        url = lambda path: reverse('static_api_file', args=[path])
+        with override_settings(MGNREGA_STATIC_API_ROOT=self.root):
+            response = self.client.get(url('manifest.json'))
+            self.assertEqual(json.loads(response.content), manifest)
+            self.assertIn('no-cache', response['Cache-Control'])
+            self.assertEqual(self.client.get(url('manifest.json'), HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+            path = manifest['performance']['niwari']
+            response = self.client.get(url(path), HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(gzip.decompress(response.content), self.read(path))
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertEqual(self.client.get(url(path)).content, self.read(path))
+
+            # Republishing is picked up at once, without a restart
+            ingest_records([make_record(total_exp=1.0)])
+            publish_static_api(self.root)
+            response = self.client.get(url('manifest.json'))
+            self.assertNotEqual(json.loads(response.content)['performance']['niwari'], path)
+
+            self.assertEqual(self.client.get(url(path + '.gz')).status_code, 404)
+            self.assertEqual(self.client.get(url('../secret.json')).status_code, 404)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('publish_static_api', '--output', self.root, stdout=out)
+        self.assertIn('2 districts published', out.getvalue())
+
+class QueryPlanTest(TestCase):
+    def setUp(self):
+        ingest_records([make_record()])
+
+    def test_performance_rows_use_district_updated_index(self):
+        plan = MGNREGAData.objects.filter(district_id=1).order_by('-last_updated').explain()
+        self.assertIn('mgnrega_district_updated_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_district_name_lookup_uses_normalized_index(self):
+        plan = District.objects.filter(district_name_normalized='niwari').explain()
+        self.assertIn('USING INDEX', plan)
+        self.assertIn('district_name_normalized', plan)
+
+    def test_ingest_key_lookup_uses_unique_constraint(self):
+        plan = MGNREGAData.objects.filter(district_id=1, fin_year='2024-2025', month='Dec').explain()
+        # SQLite backs the unique constraint with an automatic index
+        self.assertRegex(plan, r'USING INDEX \S+ \(district_id=\? AND fin_year=\? AND month=\?\)')
+
+class SchemaConstraintTest(TestCase):
+    def test_duplicate_rows_are_rejected(self):
+        ingest_records([make_record()])
+        district = District.objects.get()
+        with self.assertRaises(IntegrityError):
+            MGNREGAData.objects.create(district=district, fin_year='2024-2025', month='Dec')
+
+    def test_normalized_name_is_maintained_by_database(self):
+        ingest_records([make_record(district_name='Niwari')])
+        self.assertEqual(District.objects.get().district_name_normalized, 'niwari')
+
+# Two districts: NIWARI, a 1x1 degree square at (78.0, 25.0) with a 0.2
+# degree hole at (78.4, 25.4), and RAIGAD, a MultiPolygon square at
+# (79.02, 25.0) that leaves a 0.02 degree sliver between the two
+TEST_BOUNDARIES = Path(__file__).resolve().parent / 'fixtures' / 'district_boundaries.geojson'
+
+class DistrictLocatorTest(TestCase):
+    def setUp(self):
+        self.locator = geo.DistrictLocator(geo.load_boundaries(TEST_BOUNDARIES))
+
+    def test_point_inside_polygon(self):
+        match = self.locator.locate(25.5, 78.2)
+        self.assertEqual((match.district_code, match.method), ('1752', 'polygon'))
+        self.assertEqual(self.locator.locate(25.5, 79.5).district_code, '1803')
+
+    def test_hole_is_not_part_of_polygon(self):
+        match = self.locator.locate(25.5, 78.5)
+        self.assertEqual(match.method, 'nearest_centroid')
+
+    def test_border_sliver_falls_back_to_nearest_centroid(self):
+        match = self.locator.locate(25.5, 79.015)
+        self.assertEqual((match.district_code, match.method), ('1803', 'nearest_centroid'))
+
+    def test_far_away_point_has_no_district(self):
+        self.assertIsNone(self.locator.locate(10.0, 70.0))
+
+class DetectDistrictAPITest(APITestCase):
+    def setUp(self):
+        ingest_records([make_record()])
+        override = override_settings(MGNREGA_DISTRICT_BOUNDARIES=str(TEST_BOUNDARIES))
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(setattr, geo, '_locator', None)
+        geo._locator = None
+
+    def test_detects_district_from_coordinates(self):
+        response = self.client.get(reverse('detect_district'), {'lat': '25.5', 'lon': '78.2'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['district'], 'NIWARI')
+        self.assertEqual(response.data['match'], 'polygon')
+        self.assertIs(geo.get_locator(), geo.get_locator())
+
+    def test_invalid_coordinates(self):
+        for lat, lon in (('north', '78.2'), ('nan', '78.2'), ('25.5', 'inf'), ('-inf', '78.2'), ('91', '78.2'),
+                         ('25.5', '-180.5')):
+            response = self.client.get(reverse('detect_district'), {'lat': lat, 'lon': lon})
+            self.assertEqual(response.status_code, 400, (lat, lon))
+
+    def test_location_outside_known_districts(self):
+        response = self.client.get(reverse('detect_district'), {'lat': '10', 'lon': '70'})
+        self.assertIsNone(response.data['district'])
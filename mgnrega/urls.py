@@ -1,9 +1,20 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('districts/', views.district_list, name='district_list'),
     path('performance/<str:district_name>/', views.district_performance, name='district_performance'),
+    path('performance/<str:district_name>/series/', views.district_performance_series, name='district_performance_series'),
+    path('performance/<str:district_name>/years/', views.district_year_totals, name='district_year_totals'),
+    path('async/districts/', async_views.district_list, name='district_list_async'),
+    path('async/performance/<str:district_name>/', async_views.district_performance, name='district_performance_async'),
+    path('rankings/<str:state_code>/', views.state_rankings, name='state_rankings'),
+    path('states/<str:state_code>/totals/', views.state_totals, name='state_totals'),
     path('initialize/', views.initialize_data, name='initialize_data'),
+    path('sync-jobs/<uuid:job_id>/', views.sync_job_status, name='sync_job_status'),
+    path('static/<path:path>', views.static_api_file, name='static_api_file'),
+    path('ingest-runs/', views.ingest_runs, name='ingest_runs'),
+    path('ingest-runs/<int:run_id>/', views.ingest_run_detail, name='ingest_run_detail'),
     path('detect-district/', views.detect_district, name='detect_district'),
+    path('refresh-stats/', views.refresh_stats, name='refresh_stats'),
 ]
\ No newline at end of file
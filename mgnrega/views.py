@@ -1,400 +1,581 @@
-from django.shortcuts import render
-from django.http import JsonResponse
-from rest_framework.decorators import api_view
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import Http404, HttpResponse
+from django.conf import settings
+from django.urls import reverse
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition, require_GET
+from django.views.decorators.vary import vary_on_headers
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
-from .models import District, MGNREGAData
-from .serializers import DistrictSerializer, MGNREGADataSerializer
-import xml.etree.ElementTree as ET
-import requests
-import json
-from typing import Optional
-from datetime import datetime, timedelta
-import pytz
+from rest_framework.utils.urls import replace_query_param
+from .models import District, IngestRun, SyncJob
+from .serializers import district_values
+from .cache import read_cache
+from .client import get_client
+from .fetch import FetchError
+from .geo import get_locator
+from .ingest import IngestResult, get_batch_size, ingest_records
+from .parsing import ResponseReader
+from .payloads import get_payload, rebuild_payloads
+from .queries import SERIES_METRICS, QueryError, parse_positive_int, performance_rows, performance_series
+from .rankings import district_rankings, get_slice, latest_period
+from .rollups import district_year_rollups, state_month_rollups
+from .recorder import IngestRecorder
+from .refresh import RefreshQueue, get_freshness_window, get_retry_interval
+from .singleflight import SingleFlight
+from .static_api import MANIFEST_NAME, publish_after_sync, published_file
+from .sync import SCOPE_FILTERS, ScopeError, clean_scope, queue_job, run_job, run_sync
+import hashlib
+import logging
+from itertools import islice
+from pathlib import Path
+from urllib.parse import quote
+from collections import namedtuple
+from functools import wraps
+from collections.abc import Mapping
 
-def fetch_mgnrega_data_from_api(district_name=None):
+logger = logging.getLogger(__name__)
+
+def fetch_mgnrega_data_from_api(district_name=None, resume=False, workers=None):
     """
     Fetch MGNREGA data from the data.gov.in API
+
+    Only the recent financial years are fetched unless the district is due
+    for full re-verification; pass resume=True for long full-resource syncs
+    so a failed run picks up from its completed pages.
     """
     try:
-        # API endpoint for MGNREGA data
-        api_url = "https://api.data.gov.in/resource/ee03643a-ee4c-48c2-ac30-9f2ff26ab722"
-        api_key = "579b464db66ec23bdd000001cdd3946e44ce4aad7209ff7b23ac571b"
-        
-        # Parameters for the API request
-        params = {
-            "api-key": api_key,
-            "format": "xml",
-            "limit": 1000  # Adjust as needed
-        }
-        
         # If a specific district is requested, add it to the filters
-        if district_name:
-            params["filters[district_name]"] = district_name
-        
-        # Make the API request
-        response = requests.get(api_url, params=params, timeout=30)
-        
-        if response.status_code == 200:
-            # Parse the XML response
-            root = ET.fromstring(response.content)
-            records = root.find('records')
-            
-            if records is not None:
-                for item in records.findall('item'):
-                    # Extract district information
-                    state_code_elem = item.find('state_code')
-                    state_name_elem = item.find('state_name')
-                    district_code_elem = item.find('district_code')
-                    district_name_elem = item.find('district_name')
-                    
-                    state_code = get_text_from_element(state_code_elem)
-                    state_name = get_text_from_element(state_name_elem)
-                    district_code = get_text_from_element(district_code_elem)
-                    district_name = get_text_from_element(district_name_elem)
-                    
-                    # Create or get district
-                    district, created = District.objects.get_or_create(
-                        district_code=district_code,
-                        defaults={
-                            'state_code': state_code,
-                            'state_name': state_name,
-                            'district_name': district_name
-                        }
-                    )
-                    
-                    # Extract MGNREGA data
-                    fin_year_elem = item.find('fin_year')
-                    month_elem = item.find('month')
-                    
-                    fin_year = get_text_from_element(fin_year_elem)
-                    month = get_text_from_element(month_elem)
-                    
-                    # Check if we already have this data to avoid duplicates
-                    existing_data = MGNREGAData.objects.filter(
-                        district=district,
-                        fin_year=fin_year,
-                        month=month
-                    ).first()
-                    
-                    if existing_data:
-                        # Update existing record
-                        mgnrega_data = existing_data
-                    else:
-                        # Create new record
-                        mgnrega_data = MGNREGAData(district=district, fin_year=fin_year, month=month)
-                    
-                    # Extract all other data elements
-                    approved_labour_budget_elem = item.find('Approved_Labour_Budget')
-                    average_wage_rate_elem = item.find('Average_Wage_rate_per_day_per_person')
-                    average_days_employment_elem = item.find('Average_days_of_employment_provided_per_Household')
-                    differently_abled_persons_worked_elem = item.find('Differently_abled_persons_worked')
-                    material_and_skilled_wages_elem = item.find('Material_and_skilled_Wages')
-                    number_of_completed_works_elem = item.find('Number_of_Completed_Works')
-                    number_of_gps_with_nil_exp_elem = item.find('Number_of_GPs_with_NIL_exp')
-                    number_of_ongoing_works_elem = item.find('Number_of_Ongoing_Works')
-                    persondays_central_liability_elem = item.find('Persondays_of_Central_Liability_so_far')
-                    sc_persondays_elem = item.find('SC_persondays')
-                    sc_workers_against_active_workers_elem = item.find('SC_workers_against_active_workers')
-                    st_persondays_elem = item.find('ST_persondays')
-                    st_workers_against_active_workers_elem = item.find('ST_workers_against_active_workers')
-                    total_adm_expenditure_elem = item.find('Total_Adm_Expenditure')
-                    total_exp_elem = item.find('Total_Exp')
-                    wages_elem = item.find('Wages')
-                    total_households_worked_elem = item.find('Total_Households_Worked')
-                    total_individuals_worked_elem = item.find('Total_Individuals_Worked')
-                    total_active_job_cards_elem = item.find('Total_No_of_Active_Job_Cards')
-                    total_active_workers_elem = item.find('Total_No_of_Active_Workers')
-                    total_hhs_completed_100_days_elem = item.find('Total_No_of_HHs_completed_100_Days_of_Wage_Employment')
-                    total_jobcards_issued_elem = item.find('Total_No_of_JobCards_issued')
-                    total_workers_elem = item.find('Total_No_of_Workers')
-                    total_works_takenup_elem = item.find('Total_No_of_Works_Takenup')
-                    women_persondays_elem = item.find('Women_Persondays')
-                    percent_category_b_works_elem = item.find('percent_of_Category_B_Works')
-                    percent_expenditure_agriculture_elem = item.find('percent_of_Expenditure_on_Agriculture_Allied_Works')
-                    percent_nrm_expenditure_elem = item.find('percent_of_NRM_Expenditure')
-                    percentage_payments_within_15_days_elem = item.find('percentage_payments_gererated_within_15_days')
-                    remarks_elem = item.find('Remarks')
-                    
-                    # Update MGNREGA data record
-                    mgnrega_data.approved_labour_budget = get_int_from_element(approved_labour_budget_elem)
-                    mgnrega_data.average_wage_rate = get_float_from_element(average_wage_rate_elem)
-                    mgnrega_data.average_days_employment = get_int_from_element(average_days_employment_elem)
-                    mgnrega_data.differently_abled_persons_worked = get_int_from_element(differently_abled_persons_worked_elem)
-                    mgnrega_data.material_and_skilled_wages = get_float_from_element(material_and_skilled_wages_elem)
-                    mgnrega_data.number_of_completed_works = get_int_from_element(number_of_completed_works_elem)
-                    mgnrega_data.number_of_gps_with_nil_exp = get_int_from_element(number_of_gps_with_nil_exp_elem)
-                    mgnrega_data.number_of_ongoing_works = get_int_from_element(number_of_ongoing_works_elem)
-                    mgnrega_data.persondays_central_liability = get_int_from_element(persondays_central_liability_elem)
-                    mgnrega_data.sc_persondays = get_int_from_element(sc_persondays_elem)
-                    mgnrega_data.sc_workers_against_active_workers = get_int_from_element(sc_workers_against_active_workers_elem)
-                    mgnrega_data.st_persondays = get_int_from_element(st_persondays_elem)
-                    mgnrega_data.st_workers_against_active_workers = get_int_from_element(st_workers_against_active_workers_elem)
-                    mgnrega_data.total_adm_expenditure = get_float_from_element(total_adm_expenditure_elem)
-                    mgnrega_data.total_exp = get_float_from_element(total_exp_elem)
-                    mgnrega_data.wages = get_float_from_element(wages_elem)
-                    mgnrega_data.total_households_worked = get_int_from_element(total_households_worked_elem)
-                    mgnrega_data.total_individuals_worked = get_int_from_element(total_individuals_worked_elem)
-                    mgnrega_data.total_active_job_cards = get_int_from_element(total_active_job_cards_elem)
-                    mgnrega_data.total_active_workers = get_int_from_element(total_active_workers_elem)
-                    mgnrega_data.total_hhs_completed_100_days = get_int_from_element(total_hhs_completed_100_days_elem)
-                    mgnrega_data.total_jobcards_issued = get_int_from_element(total_jobcards_issued_elem)
-                    mgnrega_data.total_workers = get_int_from_element(total_workers_elem)
-                    mgnrega_data.total_works_takenup = get_int_from_element(total_works_takenup_elem)
-                    mgnrega_data.women_persondays = get_int_from_element(women_persondays_elem)
-                    mgnrega_data.percent_category_b_works = get_int_from_element(percent_category_b_works_elem)
-                    mgnrega_data.percent_expenditure_agriculture = get_float_from_element(percent_expenditure_agriculture_elem)
-                    mgnrega_data.percent_nrm_expenditure = get_float_from_element(percent_nrm_expenditure_elem)
-                    mgnrega_data.percentage_payments_within_15_days = get_float_from_element(percentage_payments_within_15_days_elem)
-                    mgnrega_data.remarks = get_text_from_element(remarks_elem)
-                    
-                    mgnrega_data.save()
-                
-                return True
-        else:
-            print(f"API request failed with status code: {response.status_code}")
-            return False
-            
-    except Exception as e:
-        print(f"Error fetching data from API: {e}")
+        scope = {"district_name": district_name} if district_name else {}
+
+        result = run_sync([scope], resume=resume, workers=workers, incremental=True)
+        logger.info("Ingested MGNREGA data from API: %s", result)
+        return True
+    except FetchError as e:
+        logger.error("Error fetching data from API: %s", e)
         return False
+    except Exception:
+        logger.exception("Error fetching data from API")
+        return False
+
+# Browsers and CDNs may reuse API responses for this many seconds, then
+# revalidate them cheaply with If-None-Match / If-Modified-Since
+API_MAX_AGE = getattr(settings, 'MGNREGA_API_MAX_AGE', 5 * 60)
+
+def patch_api_cache_control(response):
+    """
+    Let browsers and shared caches reuse a successful response (or a 304)
+    for API_MAX_AGE seconds; errors such as an unknown district or a bad
+    parameter are revalidated every time instead
+    """
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        patch_cache_control(response, public=True, max_age=API_MAX_AGE)
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
+
+def cache_successes(view):
+    """
+    Decorate a sync or async view with patch_api_cache_control
+    """
+    if iscoroutinefunction(view):
+        async def wrapper(request, *args, **kwargs):
+            return patch_api_cache_control(await view(request, *args, **kwargs))
+        markcoroutinefunction(wrapper)
+    else:
+        def wrapper(request, *args, **kwargs):
+            return patch_api_cache_control(view(request, *args, **kwargs))
+    return wraps(view)(wrapper)
+
+DistrictVersion = namedtuple('DistrictVersion', ['district', 'payload'])
 
+def catalog_etag(catalog) -> str:
+    """
+    Version of the district catalog: it only changes when districts are added
+    """
+    return f"districts-{catalog['count']}-{catalog['last_id'] or 0}"
+
+def build_district_catalog():
+    catalog = District.objects.aggregate(count=Count('id'), last_id=Max('id'))
+    return {'etag': catalog_etag(catalog), 'data': district_values.data(District.objects.all())}
+
+def get_district_catalog():
+    """
+    The district list and its ETag, from the read cache
+    """
+    return read_cache.get_or_set('districts', build_district_catalog)
+
+def district_list_etag(request):
+    return get_district_catalog()['etag']
+
+@cache_successes
+@condition(etag_func=district_list_etag)
 @api_view(['GET'])
 def district_list(request):
     """
     List all districts
     """
-    districts = District.objects.all()
-    serializer = DistrictSerializer(districts, many=True)
-    return Response(serializer.data)
+    return Response(get_district_catalog()['data'])
+
+district_refreshes = SingleFlight('district-refresh')
+
+def refresh_district(district_name):
+    """
+    Refresh one district from the API, sharing the call with any refresh of
+    the same district already running in this or another worker process
+    """
+    return district_refreshes.run(district_name.lower(), fetch_mgnrega_data_from_api, district_name)
+
+refresh_queue = RefreshQueue(refresh_district, retry_interval=get_retry_interval())
+
+def district_cache_key(district_name) -> str:
+    return f"district:{quote(district_name.lower())}"
+
+def load_district_version(district_name) -> DistrictVersion:
+    district = District.objects.filter(
+        district_name_normalized=district_name.lower()
+    ).select_related('payload').first()
+    payload = get_payload(district) if district is not None else None
+    return DistrictVersion(district, payload)
+
+def get_district_version(request, district_name) -> DistrictVersion:
+    """
+    Look up a district and its pre-rendered payload once per request (and
+    through the read cache), queueing a background refresh when the data is
+    stale
+    """
+    if not hasattr(request, 'district_version'):
+        version = read_cache.get_or_set(
+            district_cache_key(district_name), lambda: load_district_version(district_name)
+        )
+        if version.district is not None:
+            refresh_if_stale(version.district, version.payload)
+        request.district_version = version
+    return request.district_version
 
+def data_checked_at(payload):
+    """
+    When the upstream API last confirmed a district's data
+    """
+    return payload.verified_at or payload.latest_update
+
+def refresh_if_stale(district, payload):
+    """
+    Serve what we have and refresh stale or missing data off the request path
+    """
+    checked = data_checked_at(payload)
+    if checked is None or checked < timezone.now() - get_freshness_window():
+        refresh_queue.enqueue(district.district_name)
+
+def district_performance_etag(request, district_name):
+    payload = get_district_version(request, district_name).payload
+    return payload_etag(request, payload) if payload is not None else None
+
+def district_performance_last_modified(request, district_name):
+    payload = get_district_version(request, district_name).payload
+    return payload.latest_update if payload is not None else None
+
+# Query parameters that select a subset of the performance rows
+QUERY_PARAMS = {'fields', 'from', 'to', 'latest', 'cursor', 'page_size'}
+
+def district_performance_query(request, district):
+    """
+    Rows matching the fields/from/to/latest/cursor parameters. Paginated
+    requests get {"next": url, "results": [...]}, others a plain list.
+    """
+    try:
+        rows, next_cursor, paginated = performance_rows(district, request.query_params)
+    except QueryError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if not paginated:
+        return Response(rows)
+    next_url = None
+    if next_cursor:
+        next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+    return Response({"next": next_url, "results": rows})
+
+@cache_successes
+@vary_on_headers('Accept-Encoding')
+@condition(etag_func=district_performance_etag, last_modified_func=district_performance_last_modified)
 @api_view(['GET'])
 def district_performance(request, district_name):
     """
     Retrieve performance data for a specific district
+
+    The response body is pre-rendered per district (see mgnrega.payloads) and
+    returned as stored, gzipped when the client accepts it. The fields, from,
+    to, latest, cursor and page_size parameters instead query just the rows
+    and columns asked for (see mgnrega.queries.performance_rows). Stored data is
+    always returned immediately. If it is missing or older than the freshness
+    window, a refresh from the API is queued in the background. The X-Data-Age
+    (seconds) and X-Refresh-Pending headers describe the result. Requests whose
+    ETag or Last-Modified still match get a 304 without reading the body.
     """
-    try:
-        # Try to get the district
-        district = District.objects.get(district_name__iexact=district_name)
-        
-        # Get the latest MGNREGA data for this district
-        mgnrega_data = MGNREGAData.objects.filter(district=district).order_by('-last_updated')
-        
-        # If no data exists or data is older than 1 day, fetch fresh data from API
-        should_fetch_fresh_data = False
-        if not mgnrega_data.exists():
-            should_fetch_fresh_data = True
-        else:
-            # Check if the latest data is older than 1 day
-            latest_data = mgnrega_data.first()
-            # Make sure we're comparing timezone-aware datetimes
-            if latest_data.last_updated.tzinfo is None:
-                # If the model's datetime is naive, make it timezone-aware
-                latest_data_time = latest_data.last_updated.replace(tzinfo=pytz.UTC)
-            else:
-                latest_data_time = latest_data.last_updated
-            
-            # Get current time in UTC
-            now = datetime.now(pytz.UTC)
-            
-            if latest_data_time < now - timedelta(days=1):
-                should_fetch_fresh_data = True
-        
-        if should_fetch_fresh_data:
-            # Try to fetch from API
-            success = fetch_mgnrega_data_from_api(district_name)
-            if success:
-                mgnrega_data = MGNREGAData.objects.filter(district=district).order_by('-last_updated')
-        
-        if mgnrega_data.exists():
-            serializer = MGNREGADataSerializer(mgnrega_data, many=True)
-            return Response(serializer.data)
-        else:
-            # Return empty data if nothing found
-            return Response([])
-    except District.DoesNotExist:
+    district, payload = get_district_version(request, district_name)
+    if district is None:
         return Response({"error": "District not found"}, status=status.HTTP_404_NOT_FOUND)
 
-def get_text_from_element(element: Optional[ET.Element]) -> str:
+    if QUERY_PARAMS.intersection(request.query_params):
+        response = district_performance_query(request, district)
+    else:
+        response = payload_response(request, payload)
+    return add_freshness_headers(response, district, payload)
+
+def serves_gzip(request, payload) -> bool:
     """
-    Safely extract text from an XML element
+    Whether the request gets the stored gzipped payload body
     """
-    if element is not None:
-        return element.text or ''
-    return ''
+    if QUERY_PARAMS.intersection(request.GET) or not payload.body_gzip:
+        return False
+    return 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
 
-def get_int_from_element(element: Optional[ET.Element]) -> Optional[int]:
+def payload_etag(request, payload) -> str:
+    # The gzipped body is a different representation and needs its own strong ETag
+    return f"{payload.version}-gzip" if serves_gzip(request, payload) else payload.version
+
+def payload_response(request, payload):
     """
-    Safely extract integer from an XML element
+    The stored payload body, gzipped when the client accepts it
     """
-    if element is not None and element.text:
-        try:
-            return int(element.text)
-        except ValueError:
-            return None
-    return None
+    if serves_gzip(request, payload):
+        response = HttpResponse(bytes(payload.body_gzip), content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+        return response
+    return HttpResponse(bytes(payload.body), content_type='application/json')
+
+def add_freshness_headers(response, district, payload):
+    checked = data_checked_at(payload)
+    if checked is not None:
+        response['X-Data-Age'] = str(int((timezone.now() - checked).total_seconds()))
+    response['X-Refresh-Pending'] = 'true' if refresh_queue.is_pending(district.district_name) else 'false'
+    return response
 
-def get_float_from_element(element: Optional[ET.Element]) -> Optional[float]:
+@cache_successes
+@condition(etag_func=district_performance_etag, last_modified_func=district_performance_last_modified)
+@api_view(['GET'])
+def district_performance_series(request, district_name):
     """
-    Safely extract float from an XML element
+    Performance data for a district as one month axis plus a parallel list
+    per metric, ready to hand to the charts without pivoting on the client
     """
-    if element is not None and element.text:
-        try:
-            return float(element.text)
-        except ValueError:
-            return None
-    return None
+    district, payload = get_district_version(request, district_name)
+    if district is None:
+        return Response({"error": "District not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        return Response(performance_series(district, request.query_params))
+    except QueryError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['GET'])
+def state_rankings(request, state_code):
+    """
+    Rank, percentile and state median of one metric for every district of a
+    state in a month (fin_year and month parameters, the latest month with
+    data by default). With a district parameter only that district's entry
+    is returned alongside the state figures.
+    """
+    metric = request.query_params.get('metric', 'total_exp')
+    if metric not in SERIES_METRICS:
+        return Response({"error": f"Unknown metric: {metric}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    fin_year = request.query_params.get('fin_year')
+    month = request.query_params.get('month')
+    if bool(fin_year) != bool(month):
+        return Response({"error": "fin_year and month must be given together"}, status=status.HTTP_400_BAD_REQUEST)
+    if not fin_year:
+        period = latest_period(state_code)
+        if period is None:
+            return Response({"error": "No data for state"}, status=status.HTTP_404_NOT_FOUND)
+        fin_year, month = period
+
+    table = get_slice(state_code, fin_year, month)
+    column = table['metrics'][metric]
+    data = {
+        'state_code': state_code,
+        'fin_year': fin_year,
+        'month': month,
+        'metric': metric,
+        'districts': column['count'],
+        'median': column['median'],
+    }
+    rankings = district_rankings(table, metric)
+    district_name = request.query_params.get('district')
+    if district_name:
+        matches = [entry for entry in rankings if entry['district_name'].lower() == district_name.lower()]
+        if not matches:
+            return Response({"error": "District not found"}, status=status.HTTP_404_NOT_FOUND)
+        data['district'] = matches[0]
+    else:
+        data['rankings'] = rankings
+    return Response(data)
+
+@api_view(['GET'])
+def state_totals(request, state_code):
+    """
+    Sums and means of the rollup metrics over all districts of a state, one
+    entry per month, read from the state-month rollup table
+    """
+    months = state_month_rollups(state_code)
+    if not months:
+        return Response({"error": "No data for state"}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'state_code': state_code, 'months': months})
+
+@api_view(['GET'])
+def district_year_totals(request, district_name):
+    """
+    Sums and means of the rollup metrics for a district, one entry per
+    financial year, read from the district-year rollup table
+    """
+    district = District.objects.filter(district_name_normalized=district_name.lower()).first()
+    if district is None:
+        return Response({"error": "District not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'district_name': district.district_name, 'years': district_year_rollups(district)})
+
+@api_view(['GET'])
+def refresh_stats(request):
+    """
+    Counters for background refreshes: queued versus deduplicated requests,
+    refreshes executed versus coalesced into one already running, the
+    upstream client's retries and circuit breaker state, and hits, misses and
+    evictions of each read cache tier
+    """
+    return Response({
+        'queue': refresh_queue.stats(),
+        'single_flight': district_refreshes.stats(),
+        'upstream': get_client().stats(),
+        'cache': read_cache.stats(),
+    })
+
+SERVER_RESPONSE = Path(__file__).resolve().parent.parent / 'Server response.txt'
+
+def load_server_response():
+    """
+    Ingest the bundled Server response.txt, streaming its records into the
+    database one ingest batch at a time so memory use does not grow with
+    the file
+    """
+    result = IngestResult()
+    batch_size = get_batch_size()
+    with IngestRecorder([{'file': SERVER_RESPONSE.name}], source=IngestRun.FILE) as recorder:
+        with open(SERVER_RESPONSE, 'rb') as file:
+            records = iter(ResponseReader(file))
+            while True:
+                with recorder.phase('parse'):
+                    batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+                with recorder.phase('db'):
+                    ingest = ingest_records(batch, batch_size=batch_size)
+                recorder.add_page(ingest)
+                result += ingest
+        with recorder.phase('db'):
+            rebuild_payloads(result.changed_district_ids)
+    publish_after_sync(result.changed_district_ids)
+    return result
 
 def parse_xml_data():
     """
     Parse the XML data from Server response.txt and populate our database
     """
     try:
-        with open('Server response.txt', 'r', encoding='utf-8') as file:
-            xml_content = file.read()
-        
-        root = ET.fromstring(xml_content)
-        records = root.find('records')
-        
-        if records is not None:
-            for item in records.findall('item'):
-                # Extract district information
-                state_code_elem = item.find('state_code')
-                state_name_elem = item.find('state_name')
-                district_code_elem = item.find('district_code')
-                district_name_elem = item.find('district_name')
-                
-                state_code = get_text_from_element(state_code_elem)
-                state_name = get_text_from_element(state_name_elem)
-                district_code = get_text_from_element(district_code_elem)
-                district_name = get_text_from_element(district_name_elem)
-                
-                # Create or get district
-                district, created = District.objects.get_or_create(
-                    district_code=district_code,
-                    defaults={
-                        'state_code': state_code,
-                        'state_name': state_name,
-                        'district_name': district_name
-                    }
-                )
-                
-                # Extract MGNREGA data
-                fin_year_elem = item.find('fin_year')
-                month_elem = item.find('month')
-                
-                fin_year = get_text_from_element(fin_year_elem)
-                month = get_text_from_element(month_elem)
-                
-                # Extract all other data elements
-                approved_labour_budget_elem = item.find('Approved_Labour_Budget')
-                average_wage_rate_elem = item.find('Average_Wage_rate_per_day_per_person')
-                average_days_employment_elem = item.find('Average_days_of_employment_provided_per_Household')
-                differently_abled_persons_worked_elem = item.find('Differently_abled_persons_worked')
-                material_and_skilled_wages_elem = item.find('Material_and_skilled_Wages')
-                number_of_completed_works_elem = item.find('Number_of_Completed_Works')
-                number_of_gps_with_nil_exp_elem = item.find('Number_of_GPs_with_NIL_exp')
-                number_of_ongoing_works_elem = item.find('Number_of_Ongoing_Works')
-                persondays_central_liability_elem = item.find('Persondays_of_Central_Liability_so_far')
-                sc_persondays_elem = item.find('SC_persondays')
-                sc_workers_against_active_workers_elem = item.find('SC_workers_against_active_workers')
-                st_persondays_elem = item.find('ST_persondays')
-                st_workers_against_active_workers_elem = item.find('ST_workers_against_active_workers')
-                total_adm_expenditure_elem = item.find('Total_Adm_Expenditure')
-                total_exp_elem = item.find('Total_Exp')
-                wages_elem = item.find('Wages')
-                total_households_worked_elem = item.find('Total_Households_Worked')
-                total_individuals_worked_elem = item.find('Total_Individuals_Worked')
-                total_active_job_cards_elem = item.find('Total_No_of_Active_Job_Cards')
-                total_active_workers_elem = item.find('Total_No_of_Active_Workers')
-                total_hhs_completed_100_days_elem = item.find('Total_No_of_HHs_completed_100_Days_of_Wage_Employment')
-                total_jobcards_issued_elem = item.find('Total_No_of_JobCards_issued')
-                total_workers_elem = item.find('Total_No_of_Workers')
-                total_works_takenup_elem = item.find('Total_No_of_Works_Takenup')
-                women_persondays_elem = item.find('Women_Persondays')
-                percent_category_b_works_elem = item.find('percent_of_Category_B_Works')
-                percent_expenditure_agriculture_elem = item.find('percent_of_Expenditure_on_Agriculture_Allied_Works')
-                percent_nrm_expenditure_elem = item.find('percent_of_NRM_Expenditure')
-                percentage_payments_within_15_days_elem = item.find('percentage_payments_gererated_within_15_days')
-                remarks_elem = item.find('Remarks')
-                
-                # Create MGNREGA data record
-                mgnrega_data = MGNREGAData(
-                    district=district,
-                    fin_year=fin_year,
-                    month=month,
-                    approved_labour_budget=get_int_from_element(approved_labour_budget_elem),
-                    average_wage_rate=get_float_from_element(average_wage_rate_elem),
-                    average_days_employment=get_int_from_element(average_days_employment_elem),
-                    differently_abled_persons_worked=get_int_from_element(differently_abled_persons_worked_elem),
-                    material_and_skilled_wages=get_float_from_element(material_and_skilled_wages_elem),
-                    number_of_completed_works=get_int_from_element(number_of_completed_works_elem),
-                    number_of_gps_with_nil_exp=get_int_from_element(number_of_gps_with_nil_exp_elem),
-                    number_of_ongoing_works=get_int_from_element(number_of_ongoing_works_elem),
-                    persondays_central_liability=get_int_from_element(persondays_central_liability_elem),
-                    sc_persondays=get_int_from_element(sc_persondays_elem),
-                    sc_workers_against_active_workers=get_int_from_element(sc_workers_against_active_workers_elem),
-                    st_persondays=get_int_from_element(st_persondays_elem),
-                    st_workers_against_active_workers=get_int_from_element(st_workers_against_active_workers_elem),
-                    total_adm_expenditure=get_float_from_element(total_adm_expenditure_elem),
-                    total_exp=get_float_from_element(total_exp_elem),
-                    wages=get_float_from_element(wages_elem),
-                    total_households_worked=get_int_from_element(total_households_worked_elem),
-                    total_individuals_worked=get_int_from_element(total_individuals_worked_elem),
-                    total_active_job_cards=get_int_from_element(total_active_job_cards_elem),
-                    total_active_workers=get_int_from_element(total_active_workers_elem),
-                    total_hhs_completed_100_days=get_int_from_element(total_hhs_completed_100_days_elem),
-                    total_jobcards_issued=get_int_from_element(total_jobcards_issued_elem),
-                    total_workers=get_int_from_element(total_workers_elem),
-                    total_works_takenup=get_int_from_element(total_works_takenup_elem),
-                    women_persondays=get_int_from_element(women_persondays_elem),
-                    percent_category_b_works=get_int_from_element(percent_category_b_works_elem),
-                    percent_expenditure_agriculture=get_float_from_element(percent_expenditure_agriculture_elem),
-                    percent_nrm_expenditure=get_float_from_element(percent_nrm_expenditure_elem),
-                    percentage_payments_within_15_days=get_float_from_element(percentage_payments_within_15_days_elem),
-                    remarks=get_text_from_element(remarks_elem)
-                )
-                mgnrega_data.save()
-                
+        result = load_server_response()
+        logger.info("Ingested MGNREGA data from local file: %s", result)
         return True
-    except Exception as e:
-        print(f"Error parsing XML data: {e}")
+    except Exception:
+        logger.exception("Error parsing XML data")
         return False
 
-@api_view(['GET'])
+# Syncs started over HTTP run one at a time on a background thread
+sync_jobs = RefreshQueue(lambda job_id: run_job(job_id, fallback=load_server_response))
+
+def sync_job_data(request, job):
+    return {
+        "job_id": str(job.pk),
+        "status": job.status,
+        "scope": job.scope,
+        "message": job.message,
+        "result": job.result,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "status_url": request.build_absolute_uri(reverse('sync_job_status', args=[job.pk])),
+    }
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
 def initialize_data(request):
     """
-    Initialize the database with data from the live API
+    Queue a sync from the live API and return its job id; staff only.
+
+    The sync runs in the background (falling back to the bundled
+    Server response.txt if the API fails); poll status_url for its outcome.
+    state_name, district_name and fin_year narrow the scope to a known
+    state or district and a financial year. While a sync of the same scope
+    is queued or running, its job is returned instead of starting another
+    one.
     """
-    success = fetch_mgnrega_data_from_api()
-    if success:
-        return Response({"status": "success", "message": "Data initialized successfully from live API"})
-    else:
-        # Fallback to local file if API fails
-        success = parse_xml_data()
-        if success:
-            return Response({"status": "success", "message": "Data initialized from local file"})
-        else:
-            return Response({"status": "error", "message": "Failed to initialize data"}, status=500)
+    if not isinstance(request.data, Mapping):
+        return Response({"error": "Expected a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        scope = clean_scope({name: str(request.data[name]) for name in SCOPE_FILTERS if request.data.get(name)})
+    except ScopeError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    job, created = queue_job(scope)
+    if created:
+        sync_jobs.enqueue(job.pk)
+    return Response(sync_job_data(request, job), status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+def sync_job_status(request, job_id):
+    """
+    Status and outcome of a sync job
+    """
+    job = SyncJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return Response({"error": "Sync job not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(sync_job_data(request, job))
+
+# Published static API files never change once written
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+@require_GET
+def static_api_file(request, path):
+    """
+    A file written by publish_static_api. manifest.json changes with every
+    publish and is revalidated on each use; the hashed files it points to
+    are cached for good and served pre-compressed when the client accepts it.
+    """
+    found = published_file(path, request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if found is None:
+        raise Http404("Not published")
+    content, encoding = found
+    if path == MANIFEST_NAME:
+        etag = quote_etag(hashlib.md5(content).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+    response = HttpResponse(content, content_type='application/json')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    return response
+
+DEFAULT_INGEST_RUNS = 50
+MAX_INGEST_RUNS = 500
+
+def ingest_run_data(run, errors=False):
+    data = {
+        "id": run.pk,
+        "source": run.source,
+        "status": run.status,
+        "scopes": run.scopes,
+        "message": run.message,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+        "seconds": run.duration,
+        "phases": {"http": run.http_seconds, "parse": run.parse_seconds, "db": run.db_seconds},
+        "pages": run.pages,
+        "rows_inserted": run.rows_inserted,
+        "rows_updated": run.rows_updated,
+        "rows_skipped": run.rows_skipped,
+        "rows_per_second": run.rows_per_second,
+        "error_count": run.error_count,
+    }
+    if errors:
+        data["errors"] = run.errors
+    return data
+
+@api_view(['GET'])
+def ingest_runs(request):
+    """
+    Recent ingest runs, newest first, with phase timings and throughput.
+
+    limit (default 50, at most 500) sets how many are returned; source
+    (api or file) and status narrow them. Per-item errors are left out;
+    see the run's own URL for those.
+    """
+    try:
+        limit = parse_positive_int(request.query_params.get('limit', DEFAULT_INGEST_RUNS), 'limit', MAX_INGEST_RUNS)
+    except QueryError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    runs = IngestRun.objects.defer('errors').order_by('-started_at', '-id')
+    for name in ('source', 'status'):
+        if request.query_params.get(name):
+            runs = runs.filter(**{name: request.query_params[name]})
+    return Response({"results": [ingest_run_data(run) for run in runs[:limit]]})
+
+@api_view(['GET'])
+def ingest_run_detail(request, run_id):
+    """
+    One ingest run including its per-item errors
+    """
+    run = IngestRun.objects.filter(pk=run_id).first()
+    if run is None:
+        return Response({"error": "Ingest run not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(ingest_run_data(run, errors=True))
 
 @api_view(['GET'])
 def detect_district(request):
     """
-    Detect district based on user's geolocation (placeholder implementation)
-    In a real application, you would use a reverse geocoding service
+    Detect district based on user's geolocation
+
+    Coordinates are resolved offline against the bundled district boundaries
+    (see mgnrega.geo); no external geocoding service is called.
     """
     lat = request.GET.get('lat')
     lon = request.GET.get('lon')
     
     if not lat or not lon:
         return Response({"error": "Latitude and longitude are required"}, status=status.HTTP_400_BAD_REQUEST)
-    
-    # In a real implementation, you would use a reverse geocoding service
-    # to convert coordinates to district names
-    # For now, we'll return a placeholder response
+
+    try:
+        latitude, longitude = float(lat), float(lon)
+    except ValueError:
+        return Response({"error": "Latitude and longitude must be numbers"}, status=status.HTTP_400_BAD_REQUEST)
+    # Also false for nan and infinities
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return Response(
+            {"error": "Latitude must be within -90 to 90 and longitude within -180 to 180"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    locator = get_locator()
+    if locator is None:
+        return Response({
+            "message": "District boundaries are not installed on this server",
+            "latitude": lat,
+            "longitude": lon,
+            "district": None,
+        })
+
+    match = locator.locate(latitude, longitude)
+    district = None
+    if match is not None:
+        district = District.objects.filter(district_code=match.district_code).first()
+    if district is None:
+        return Response({
+            "message": "No district found for this location",
+            "latitude": lat,
+            "longitude": lon,
+            "district": None,
+        })
+
     return Response({
         "message": "Geolocation detected successfully",
         "latitude": lat,
         "longitude": lon,
-        "district": None  # In a real app, this would be the detected district
-    })
\ No newline at end of file
+        "district": district.district_name,
+        "district_code": district.district_code,
+        "state_name": district.state_name,
+        "match": match.method,
+    })
@@ -0,0 +1,116 @@
+"""
+Per-district high-water marks for incremental syncs.
+
+Past months rarely change upstream, so a routine sync only asks the API for
+the current and previous financial year. Each district's SyncMark records
+the latest (fin_year, month) stored and when the district was last fully
+re-verified; once that is older than MGNREGA_SYNC_VERIFY_INTERVAL (or a
+district has never been synced) the next sync fetches every year again.
+"""
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+from .models import District, MGNREGAData, SyncMark
+from .queries import FISCAL_MONTHS, with_period
+
+DEFAULT_VERIFY_INTERVAL = 7 * 24 * 60 * 60
+DEFAULT_RECENT_YEARS = 2
+
+def get_verify_interval() -> timedelta:
+    """
+    How long a district may go between full re-verifications
+    """
+    return timedelta(seconds=getattr(settings, 'MGNREGA_SYNC_VERIFY_INTERVAL', DEFAULT_VERIFY_INTERVAL))
+
+def fin_year_of(day: date) -> str:
+    """
+    The financial year (April to March) a day falls in, e.g. '2024-2025'
+    """
+    start = day.year if day.month >= 4 else day.year - 1
+    return f"{start}-{start + 1}"
+
+def recent_fin_years(today: Optional[date] = None, count: Optional[int] = None) -> List[str]:
+    """
+    The financial years a routine sync fetches, oldest first
+    """
+    today = today or timezone.localdate()
+    count = count or getattr(settings, 'MGNREGA_SYNC_RECENT_YEARS', DEFAULT_RECENT_YEARS)
+    start = int(fin_year_of(today)[:4])
+    return [f"{year}-{year + 1}" for year in range(start - count + 1, start + 1)]
+
+def scope_districts(scope: Dict[str, str]):
+    """
+    Stored districts an upstream scope covers
+    """
+    districts = District.objects.all()
+    if scope.get('state_name'):
+        districts = districts.filter(state_name__iexact=scope['state_name'])
+    if scope.get('district_name'):
+        districts = districts.filter(district_name_normalized=scope['district_name'].lower())
+    return districts
+
+def plan_scopes(scope: Dict[str, str], today: Optional[date] = None) -> List[Dict[str, str]]:
+    """
+    The upstream scopes a routine sync of scope should fetch.
+
+    A scope already limited to a financial year is fetched as it is. Others
+    are narrowed to the recent financial years, unless a district they cover
+    has no mark or was last verified more than the verify interval ago.
+    """
+    if scope.get('fin_year'):
+        return [scope]
+    districts = scope_districts(scope)
+    marks = SyncMark.objects.filter(district__in=districts).aggregate(
+        marked=Count('id', filter=Q(verified_at__isnull=False)),
+        oldest=Min('verified_at'),
+    )
+    due = marks['oldest'] is None or marks['oldest'] < timezone.now() - get_verify_interval()
+    if due or marks['marked'] < districts.count():
+        return [scope]
+    return [dict(scope, fin_year=fin_year) for fin_year in recent_fin_years(today)]
+
+def latest_periods(district_ids: Iterable[int]) -> Dict[int, Tuple[str, str]]:
+    """
+    The most recent (fin_year, month) stored for each district
+    """
+    periods = {}
+    rows = (
+        with_period(MGNREGAData.objects.filter(district_id__in=list(district_ids)))
+        .values('district_id', 'fin_year')
+        .annotate(latest_month=Max('month_index'))
+        .order_by('district_id', 'fin_year')
+    )
+    for row in rows:
+        if row['latest_month']:
+            # Ordered by fin_year, so the last year seen for a district wins
+            periods[row['district_id']] = (row['fin_year'], FISCAL_MONTHS[row['latest_month'] - 1])
+    return periods
+
+def record_sync(district_ids: Iterable[int], verified: bool = False):
+    """
+    Move the marks of synced districts up to their latest stored period
+    """
+    district_ids = set(district_ids)
+    if not district_ids:
+        return
+    now = timezone.now()
+    periods = latest_periods(district_ids)
+    marks = {mark.district_id: mark for mark in SyncMark.objects.filter(district_id__in=district_ids)}
+    to_create = []
+    for district_id in district_ids:
+        mark = marks.get(district_id)
+        if mark is None:
+            mark = SyncMark(district_id=district_id)
+            to_create.append(mark)
+        mark.fin_year, mark.month = periods.get(district_id, ('', ''))
+        mark.synced_at = now
+        if verified:
+            mark.verified_at = now
+    if to_create:
+        SyncMark.objects.bulk_create(to_create)
+    if marks:
+        SyncMark.objects.bulk_update(list(marks.values()), ['fin_year', 'month', 'synced_at', 'verified_at'])
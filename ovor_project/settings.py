@@ -144,6 +144,8 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 # Add WhiteNoise for serving static files
 MIDDLEWARE = [
+    # Request latency, query and response size metrics, served at /metrics
+    'mgnrega.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add this line
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -157,6 +159,80 @@ MIDDLEWARE = [
 
 # Simplified static files serving
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
+# MGNREGA data is served from the database immediately and refreshed from the
+# API in the background once it is older than this many seconds
+MGNREGA_FRESHNESS_WINDOW = int(os.environ.get('MGNREGA_FRESHNESS_WINDOW', 24 * 60 * 60))
+
+# Only one worker process refreshes a district at a time; its lease on the
+# district expires after this many seconds in case the worker dies mid-refresh
+MGNREGA_REFRESH_LEASE = 5 * 60
+
+# A district is not refreshed again for this many seconds after a refresh,
+# so a failing or empty upstream response is not retried on every request
+MGNREGA_REFRESH_RETRY_INTERVAL = 15 * 60
+
+# Cache-Control max-age (seconds) for the district and performance endpoints
+MGNREGA_API_MAX_AGE = 5 * 60
+
+# Store a gzipped copy of each pre-rendered district performance response
+MGNREGA_PAYLOAD_GZIP = True
+
+# Upstream API client (see mgnrega/client.py): retries per request, the
+# request rate shared by all threads (per second, with bursts), and how many
+# consecutive failures open the circuit breaker for how many seconds
+MGNREGA_UPSTREAM_MAX_RETRIES = 4
+MGNREGA_UPSTREAM_RATE = 5
+MGNREGA_UPSTREAM_BURST = 10
+MGNREGA_UPSTREAM_BREAKER_THRESHOLD = 5
+MGNREGA_UPSTREAM_BREAKER_COOLDOWN = 60
+
+# Routine syncs only fetch this many recent financial years; each district is
+# fully re-fetched once its last verification is older than this many seconds
+MGNREGA_SYNC_RECENT_YEARS = 2
+MGNREGA_SYNC_VERIFY_INTERVAL = 7 * 24 * 60 * 60
+
+# Shared cache for the read endpoints; file based so it works across worker
+# processes without an external service (see mgnrega/cache.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', os.path.join(BASE_DIR, '.cache', 'django')),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+# Each worker also keeps the hottest entries in memory for a few seconds
+MGNREGA_CACHE_ALIAS = 'default'
+MGNREGA_LOCAL_CACHE_SIZE = 256
+MGNREGA_LOCAL_CACHE_TTL = 10
+MGNREGA_SHARED_CACHE_TTL = 5 * 60
+
+# Republish the static API (see mgnrega/static_api.py and the
+# publish_static_api command) into MGNREGA_STATIC_API_ROOT after every sync.
+# It is served from /api/static/ or by a CDN or web server pointed at the
+# directory; it stays out of STATIC_ROOT, which WhiteNoise indexes at startup.
+# Set MGNREGA_STATIC_API=false in the environment to turn it off
+MGNREGA_STATIC_API = os.environ.get('MGNREGA_STATIC_API', 'true').lower() in ('1', 'true')
+MGNREGA_STATIC_API_ROOT = os.environ.get('MGNREGA_STATIC_API_ROOT', os.path.join(BASE_DIR, 'static_api'))
+
+# Ingest, refresh and publish outcomes and failures (with tracebacks) from
+# the mgnrega.* loggers go to the console alongside Django's own output
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'mgnrega': {'handlers': ['console'], 'level': os.environ.get('MGNREGA_LOG_LEVEL', 'INFO')},
+    },
+}
+
+# GeoJSON district boundaries used by /api/detect-district/ (see mgnrega/geo.py)
+MGNREGA_DISTRICT_BOUNDARIES = os.environ.get(
+    'MGNREGA_DISTRICT_BOUNDARIES', os.path.join(BASE_DIR, 'mgnrega', 'data', 'district_boundaries.geojson')
+)
 ```
 
 ### 2. **Add WhiteNoise to requirements.txt**:
@@ -40,6 +40,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
+from mgnrega.metrics import metrics_view
 
 def home(request):
     return JsonResponse({
@@ -57,4 +58,5 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', home, name='home'),
     path('api/', include('mgnrega.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]